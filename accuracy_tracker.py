@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Realized-accuracy tracker for served predictions
+
+Predictions are remembered until the realized close for the same symbol and
+date arrives. Each prediction is keyed by its source as well ('predict' for
+the request-built features, 'bars' for the live indicator pipeline), so two
+pipelines predicting the same day are both scored instead of one silently
+replacing the other, each in its own window: the pipelines build features
+differently and their errors should not be blended. Each matched pair
+updates running sums over a fixed-size window, so MAE, RMSE, MAPE, R² and
+directional accuracy are always current and cost O(1) per observation to
+maintain.
+
+The tracker lives in one process. Under a multi-worker server a prediction
+is only settled by a realized close that reaches the same worker, so run the
+app with a single worker process (and threads) when realized accuracy
+matters; each worker otherwise reports on its own share of the traffic.
+"""
+
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+
+
+class RollingAccuracy:
+    """Rolling-window error metrics kept as running sums"""
+
+    def __init__(self, window=250, within_points=50.0):
+        self.window = window
+        self.within_points = within_points
+        self._obs = deque()
+        self._evictions = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.sum_abs = 0.0
+        self.sum_sq = 0.0
+        self.sum_pct = 0.0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+        self.hits = 0
+        self.within = 0
+        self.directional = 0
+
+    def _apply(self, obs, sign):
+        err, actual, pct, hit, has_direction = obs
+        self.sum_abs += sign * abs(err)
+        self.sum_sq += sign * err * err
+        self.sum_pct += sign * pct
+        self.sum_y += sign * actual
+        self.sum_y2 += sign * actual * actual
+        self.within += sign * (abs(err) <= self.within_points)
+        if has_direction:
+            self.directional += sign
+            self.hits += sign * hit
+
+    def add(self, predicted, actual, reference=None):
+        """Add one (prediction, realized close) pair"""
+        err = actual - predicted
+        pct = abs(err / actual) * 100 if actual else 0.0
+        has_direction = reference is not None
+        hit = has_direction and (predicted - reference) * (actual - reference) > 0
+        obs = (err, actual, pct, int(hit), has_direction)
+
+        self._obs.append(obs)
+        self._apply(obs, 1)
+        if len(self._obs) > self.window:
+            self._apply(self._obs.popleft(), -1)
+            self._evictions += 1
+            # Subtracting floats accumulates rounding error; rebuild the sums
+            # from the window once per full turnover (still O(1) amortized)
+            if self._evictions >= self.window:
+                self._evictions = 0
+                self._reset_sums()
+                for kept in self._obs:
+                    self._apply(kept, 1)
+
+    def __len__(self):
+        return len(self._obs)
+
+    def to_array(self):
+        """Window contents as an (n, 5) float array, for checkpoints"""
+        return np.array(list(self._obs), dtype=np.float64).reshape(-1, 5)
+
+    def load_array(self, observations):
+        """Replace the window with checkpointed observations and rebuild the sums"""
+        self._obs = deque(
+            (float(err), float(actual), float(pct), int(hit), bool(has_direction))
+            for err, actual, pct, hit, has_direction in observations[-self.window:]
+        )
+        self._evictions = 0
+        self._reset_sums()
+        for obs in self._obs:
+            self._apply(obs, 1)
+
+    def metrics(self):
+        """Current metrics in the same shape the app has always served"""
+        n = len(self._obs)
+        if n == 0:
+            return None
+        mae = self.sum_abs / n
+        rmse = (self.sum_sq / n) ** 0.5
+        mape = self.sum_pct / n
+        sst = self.sum_y2 - self.sum_y * self.sum_y / n
+        r2 = 1.0 - self.sum_sq / sst if sst > 0 else 0.0
+
+        # Same thresholds calculate_accuracy.py uses
+        if r2 > 0.8 and mape < 1.5:
+            confidence_level = "High"
+        elif r2 > 0.6 and mape < 2.5:
+            confidence_level = "Medium"
+        else:
+            confidence_level = "Low"
+
+        return {
+            'r2_score': round(r2, 3),
+            'mae': round(mae, 2),
+            'rmse': round(rmse, 2),
+            'mape': round(mape, 2),
+            'accuracy_percentage': round(self.within / n * 100, 1),
+            'directional_accuracy': round(self.hits / self.directional * 100, 1) if self.directional else None,
+            'confidence_level': confidence_level,
+            'samples': n,
+            'window': self.window,
+            'note': 'Realized accuracy of served predictions'
+        }
+
+
+class AccuracyTracker:
+    """Matches served predictions with realized closes and keeps rolling metrics per source"""
+
+    # The headline metrics come from the first of these with any samples
+    HEADLINE_SOURCES = ('predict', 'bars')
+
+    def __init__(self, window=250, max_pending=10000):
+        self.window = window
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._rolling = {}
+        self._lock = threading.Lock()
+        self.unmatched = 0
+
+    def record_prediction(self, symbol, date, predicted, reference=None, source='predict'):
+        """Remember a prediction until its realized close arrives"""
+        key = (source, symbol, date)
+        with self._lock:
+            self._pending[key] = (predicted, reference)
+            self._pending.move_to_end(key)
+            if source not in self._rolling:
+                self._rolling[source] = RollingAccuracy(self.window)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def record_actual(self, symbol, date, actual):
+        """Score every source's pending prediction for (symbol, date); False if there was none"""
+        with self._lock:
+            matched = False
+            for source, rolling in self._rolling.items():
+                pending = self._pending.pop((source, symbol, date), None)
+                if pending is not None:
+                    predicted, reference = pending
+                    rolling.add(predicted, actual, reference)
+                    matched = True
+            if not matched:
+                self.unmatched += 1
+            return matched
+
+    def checkpoint(self):
+        """(metadata, arrays) snapshot of each source's window and the pending predictions"""
+        with self._lock:
+            meta = {
+                'unmatched': self.unmatched,
+                'pending': [[symbol, date, predicted, reference, source]
+                            for (source, symbol, date), (predicted, reference) in self._pending.items()],
+            }
+            return meta, {source: rolling.to_array() for source, rolling in self._rolling.items()}
+
+    def restore(self, meta, arrays, same_model=True):
+        """Load a checkpoint; accumulators from another model version are discarded"""
+        if not same_model:
+            return False
+        with self._lock:
+            self._pending = OrderedDict(
+                ((source, symbol, date), (predicted, reference))
+                for symbol, date, predicted, reference, source in meta['pending'][-self.max_pending:]
+            )
+            self._rolling = {}
+            for source in set(arrays) | {source for source, _, _ in self._pending}:
+                self._rolling[source] = RollingAccuracy(self.window)
+                if source in arrays:
+                    self._rolling[source].load_array(arrays[source])
+            self.unmatched = meta.get('unmatched', 0)
+        return True
+
+    def metrics(self):
+        """
+        Headline rolling metrics (from /predict when it has samples) with
+        every source's own window under 'sources', or None before the first
+        realized close
+        """
+        with self._lock:
+            by_source = {}
+            for source, rolling in self._rolling.items():
+                source_metrics = rolling.metrics()
+                if source_metrics is not None:
+                    source_metrics['pending'] = sum(1 for key in self._pending if key[0] == source)
+                    by_source[source] = source_metrics
+            if not by_source:
+                return None
+            order = [s for s in self.HEADLINE_SOURCES if s in by_source] + sorted(by_source)
+            metrics = dict(by_source[order[0]])
+            metrics['source'] = order[0]
+            metrics['pending'] = len(self._pending)
+            metrics['sources'] = by_source
+            return metrics
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Admission control and load shedding for the prediction endpoints
+
+AdmissionController caps the number of requests being worked on at once.
+Extra requests wait in a bounded queue for at most queue_timeout seconds;
+when the queue is full, or the wait runs out, the request is rejected right
+away so the caller can retry elsewhere instead of piling up latency.
+
+TokenBucketLimiter gives each client its own request rate and burst size.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent=16, max_queue=32, queue_timeout=1.0, retry_after=1):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+
+        # Counters reported by stats()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.last_rejection = 0.0
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; False means shed the request"""
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                self.last_rejection = time.monotonic()
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        self.last_rejection = time.monotonic()
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @property
+    def status(self):
+        """healthy, busy (every slot in use) or saturated (queue full / shedding)"""
+        recently_shed = time.monotonic() - self.last_rejection < 5.0 if self.last_rejection else False
+        if self.waiting >= self.max_queue or recently_shed:
+            return 'saturated'
+        if self.active >= self.max_concurrent:
+            return 'busy'
+        return 'healthy'
+
+    def stats(self):
+        return {
+            'status': self.status,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_timeout': self.rejected_timeout,
+        }
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets, keeping at most max_clients buckets (LRU)"""
+
+    def __init__(self, rate, burst=None, max_clients=10000):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def allow(self, client):
+        """(allowed, seconds until the next token) for one request from client"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                allowed, wait = True, 0.0
+                tokens -= 1.0
+            else:
+                allowed, wait = False, (1.0 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'clients': len(self._buckets),
+            'limited': self.limited,
+        }
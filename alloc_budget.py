@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Allocation-budget harness for the request hot path
+
+Uses tracemalloc to measure, per call of each hot path:
+  • peak    - transient high-water mark above the starting point (bytes)
+  • net     - memory still held after the call returns (bytes)
+  • blocks  - allocated blocks still held after the call
+plus the number of garbage collections triggered while measuring.
+
+BUDGETS holds the per-path limits; test_alloc_budget.py fails when a change
+pushes a path over its budget, so new copies or temporaries on the hot path
+show up in review instead of as GC pauses in production.
+
+Run this file directly for a report:
+    python alloc_budget.py
+"""
+
+import gc
+import tracemalloc
+
+# Per-call budgets in bytes. Peak is what matters for GC churn; net catches
+# anything that accumulates per request (leaks, unbounded caches).
+BUDGETS = {
+    'build_features': {'peak': 2 * 1024, 'net': 256},
+    'predict_request': {'peak': 128 * 1024, 'net': 4 * 1024},
+    'batch_row': {'peak': 2 * 1024, 'net': 256},
+}
+
+SAMPLE_INPUT = {'open': 4500.0, 'high': 4520.0, 'low': 4480.0}
+
+
+def _zero_peak():
+    """
+    Start a fresh peak before a call: reset_peak() on Python 3.9+; on 3.8
+    tracing is restarted instead, which also drops traces a caller may have
+    been collecting.
+    """
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.stop()
+        tracemalloc.start()
+
+
+def measure(fn, setup=None, repeat=50, warmup=5):
+    """
+    Allocation profile of fn(): median over repeat calls.
+
+    setup() runs before every call, outside the measurement, and its return
+    value is passed to fn. Warm-up calls absorb one-time caches.
+    """
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+
+    gc.collect()
+    gc_before = sum(stat['collections'] for stat in gc.get_stats())
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    peaks, nets = [], []
+    try:
+        # Block counts need snapshots, which are slow: take them around one extra call
+        arg = setup() if setup else None
+        before = tracemalloc.take_snapshot()
+        result = fn(arg)
+        del result
+        diff = tracemalloc.take_snapshot().compare_to(before, 'filename')
+        blocks = sum(stat.count_diff for stat in diff)
+        del before, diff
+
+        for _ in range(repeat):
+            arg = setup() if setup else None
+            _zero_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            result = fn(arg)
+            _, peak = tracemalloc.get_traced_memory()
+            del result
+            after, _ = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+            nets.append(after - current)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    gc_after = sum(stat['collections'] for stat in gc.get_stats())
+    peaks.sort()
+    return {
+        'peak': peaks[len(peaks) // 2],
+        'peak_max': peaks[-1],
+        'net': sorted(nets)[len(nets) // 2],
+        'blocks': blocks,
+        'gc_collections': gc_after - gc_before,
+        'calls': repeat,
+    }
+
+
+def measure_build_features(app_module, repeat=200):
+    """One build_features() call"""
+    data = SAMPLE_INPUT
+    return measure(
+        lambda _: app_module.build_features(data['open'], data['high'], data['low']),
+        repeat=repeat,
+    )
+
+
+def measure_predict_request(app_module, repeat=50):
+    """One full /predict dispatch (hooks, view, JSON response), excluding WSGI parsing"""
+    flask_app = app_module.app
+
+    def setup():
+        ctx = flask_app.test_request_context('/predict', method='POST', json=SAMPLE_INPUT)
+        ctx.push()
+        return ctx
+
+    def dispatch(ctx):
+        try:
+            response = flask_app.full_dispatch_request()
+            if response.status_code != 200:
+                raise RuntimeError(f'/predict failed: {response.get_json()}')
+            return response
+        finally:
+            ctx.pop()
+
+    return measure(dispatch, setup=setup, repeat=repeat)
+
+
+def measure_batch_row(app_module, rows=256, repeat=20):
+    """Cost per row of building features and predicting a batch (predict_rows)"""
+    batch_rows = [SAMPLE_INPUT] * rows
+
+    def batch(_):
+        return app_module.predict_rows(batch_rows)
+
+    result = measure(batch, repeat=repeat)
+    for key in ('peak', 'peak_max', 'net', 'blocks'):
+        result[key] = result[key] // rows
+    result['rows'] = rows
+    return result
+
+
+def run_all(app_module):
+    return {
+        'build_features': measure_build_features(app_module),
+        'predict_request': measure_predict_request(app_module),
+        'batch_row': measure_batch_row(app_module),
+    }
+
+
+def over_budget(results, budgets=BUDGETS):
+    """[(path, metric, measured, budget)] for every exceeded budget"""
+    failures = []
+    for path, budget in budgets.items():
+        for metric, limit in budget.items():
+            if results[path][metric] > limit:
+                failures.append((path, metric, results[path][metric], limit))
+    return failures
+
+
+if __name__ == "__main__":
+    import os
+    os.environ.setdefault('AUDIT_LOG_PATH', '')
+    os.environ.setdefault('WARMUP', '0')
+    import app
+
+    print("🧪 Hot-path allocation report")
+    print("=" * 60)
+    results = run_all(app)
+    for path, result in results.items():
+        budget = BUDGETS[path]
+        print(f"\n📊 {path}:")
+        print(f"   • Peak:   {result['peak']:>9,} bytes (budget {budget['peak']:,})")
+        print(f"   • Net:    {result['net']:>9,} bytes (budget {budget['net']:,})")
+        print(f"   • Blocks: {result['blocks']:>9,}")
+        print(f"   • GC collections during {result['calls']} calls: {result['gc_collections']}")
+
+    failures = over_budget(results)
+    if failures:
+        print("\n❌ Over budget:")
+        for path, metric, measured, limit in failures:
+            print(f"   • {path}.{metric}: {measured:,} > {limit:,}")
+    else:
+        print("\n✅ All paths within budget")
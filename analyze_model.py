@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 """
 Script to analyze the actual SP500 prediction model and understand its structure
+
+    python analyze_model.py
+    python analyze_model.py --diagnostics bars/ --processes 8
+    python analyze_model.py --diagnostics history.csv --start 2010-01-01
 """
 
+import argparse
+import os
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
+from eval_cache import BuildCache, hash_code, hash_file, hash_path, write_if_changed
 import warnings
 warnings.filterwarnings('ignore')
 
+MODEL_PATH = 'linear_regression_model.pkl'
+
 def analyze_model():
     """Analyze the actual model to understand its structure"""
     print("🔍 Analyzing SP500 Prediction Model")
@@ -17,7 +26,7 @@ def analyze_model():
     
     try:
         # Load the model
-        model = joblib.load('linear_regression_model.pkl')
+        model = joblib.load(MODEL_PATH)
         print("✅ Model loaded successfully")
         
         # Analyze model type
@@ -108,27 +117,132 @@ def estimate_realistic_accuracy():
     
     
 
+def model_summary(model, test_df):
+    """The JSON-serializable part of the analysis, kept in the build cache"""
+    names = getattr(model, 'feature_names_in_', [f'Feature {i}' for i in range(len(model.coef_))])
+    return {
+        'model_type': type(model).__name__,
+        'intercept': float(model.intercept_),
+        'coefficients': {str(name): float(coef) for name, coef in zip(names, model.coef_)},
+        'test_prediction': float(model.predict(test_df)[0]),
+    }
+
+def print_cached_summary(summary):
+    print("♻️  Model unchanged since the last analysis: using the cached report")
+    print(f"\n📊 Model Type: {summary['model_type']}")
+    print(f"   • Number of features: {len(summary['coefficients'])}")
+    print(f"   • Intercept: {summary['intercept']:.4f}")
+    for feature, coef in summary['coefficients'].items():
+        print(f"   • {feature}: {coef:.6f}")
+    print(f"   • Test prediction: ${summary['test_prediction']:.2f}")
+
+def run_diagnostics_report(args, cache):
+    """Stream the full history through the model and print the chunked diagnostics"""
+    import indicators
+    import model_diagnostics
+
+    print("🔬 Model diagnostics")
+    print("="*50)
+    try:
+        model = joblib.load(MODEL_PATH)
+        inputs = {
+            'model': hash_file(MODEL_PATH),
+            'data': hash_path(args.diagnostics),
+            'config': {'symbols': args.symbol, 'start': args.start, 'end': args.end, 'max_lag': args.max_lag},
+            'code': hash_code(model_diagnostics, indicators),
+        }
+    except Exception as e:
+        print(f"❌ Could not run diagnostics: {e}")
+        return
+    
+    names = [str(name) for name in model.feature_names_in_]
+    report = cache.memo('model_diagnostics', inputs, lambda: model_diagnostics.run_diagnostics(
+        args.diagnostics, names, model.coef_, model.intercept_, symbols=args.symbol, start=args.start,
+        end=args.end, chunk_rows=args.chunk_rows, processes=args.processes, max_lag=args.max_lag,
+    ))
+    if cache.hits:
+        print("♻️  Model and data unchanged: using the cached diagnostics")
+    if report['rows'] < 2:
+        print("❌ Not enough history for diagnostics")
+        return
+    
+    print(f"   • Rows: {report['rows']:,} from {report['symbols']} symbol(s)")
+    condition = report['condition_number']
+    print(f"   • Condition number: {'∞ (exactly collinear)' if condition is None else f'{condition:,.1f}'}")
+    
+    print(f"\n📐 Variance Inflation Factors:")
+    for feature, vif in report['vif'].items():
+        print(f"   • {feature}: {'∞' if vif is None else f'{vif:,.1f}'}")
+    
+    residual = report['residual']
+    print(f"\n📉 Residuals:")
+    print(f"   • Mean: {residual['mean']:+.3f}   RMSE: {residual['rmse']:.3f}   MAE: {residual['mae']:.3f}")
+    band = 1.96 / np.sqrt(report['rows'])
+    lags = ', '.join(f"{value:+.3f}" for value in residual['autocorrelation'][:5])
+    print(f"   • Autocorrelation (lags 1-5): {lags}   (±{band:.3f} is noise)")
+    
+    for dimension, groups in report['regimes'].items():
+        print(f"\n🧭 Residuals by {dimension}:")
+        for label, group in groups.items():
+            print(f"   • {label}: {group['rows']:,} rows, mean {group['mean']:+.3f}, RMSE {group['rmse']:.3f}")
+    
+    if write_if_changed('model_diagnostics.json', report):
+        print(f"\n💾 Full diagnostics (with the correlation matrix) saved to 'model_diagnostics.json'")
+    else:
+        print(f"\n💾 'model_diagnostics.json' is already up to date")
+
 def main():
-    # Analyze the model
-    model, test_df = analyze_model()
+    parser = argparse.ArgumentParser(description='Analyze the SP500 prediction model')
+    parser.add_argument('--force', action='store_true', help='Recompute without reading or writing the cache')
+    parser.add_argument('--refresh', action='store_true', help='Recompute everything and overwrite the cached results')
+    parser.add_argument('--diagnostics', metavar='HISTORY', help='Daily OHLC CSV or bar store directory to diagnose the model on')
+    parser.add_argument('--symbol', action='append', help='Bar store symbol (repeatable; default: all)')
+    parser.add_argument('--start', help='First date to use (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date to use (YYYY-MM-DD)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-rows', type=int, default=100_000)
+    parser.add_argument('--max-lag', type=int, default=10)
+    args = parser.parse_args()
+    
+    # Reruns against unchanged inputs and code reuse the cached analysis;
+    # --force bypasses the cache, --refresh recomputes and rewrites it
+    cache = BuildCache(enabled=not args.force, refresh=args.refresh)
+    if args.diagnostics:
+        run_diagnostics_report(args, cache)
+        return
     
-    if model is not None:
+    try:
+        key = cache.key('model_analysis', model=hash_file(MODEL_PATH),
+                        code=hash_code(analyze_model, estimate_realistic_accuracy, model_summary))
+    except OSError as e:
+        print(f"❌ Could not analyze model: {e}")
+        return
+    report = cache.get_json(key)
+    
+    if report is not None:
+        print_cached_summary(report['summary'])
+        realistic_metrics = report['realistic_metrics']
+    else:
+        # Analyze the model
+        model, test_df = analyze_model()
+        if model is None:
+            print("❌ Could not analyze model")
+            return
+        
         # Estimate realistic accuracy
         realistic_metrics = estimate_realistic_accuracy()
-        
-        print(f"\n💡 Recommendation:")
-        print(f"   • The current accuracy metrics shown in the web app are placeholder values")
-        print(f"   • To get real accuracy, you would need the original training/test data")
-        print(f"   • For now, using realistic estimates based on typical financial models")
-        
-        # Save realistic metrics
-        import json
-        with open('realistic_accuracy.json', 'w') as f:
-            json.dump(realistic_metrics, f, indent=2)
+        cache.put_json(key, {'summary': model_summary(model, test_df), 'realistic_metrics': realistic_metrics})
+    
+    print(f"\n💡 Recommendation:")
+    print(f"   • The current accuracy metrics shown in the web app are placeholder values")
+    print(f"   • To get real accuracy, you would need the original training/test data")
+    print(f"   • For now, using realistic estimates based on typical financial models")
+    
+    # Save realistic metrics, leaving the file untouched if nothing changed
+    if write_if_changed('realistic_accuracy.json', realistic_metrics):
         print(f"\n💾 Realistic accuracy metrics saved to 'realistic_accuracy.json'")
-        
     else:
-        print("❌ Could not analyze model")
+        print(f"\n💾 'realistic_accuracy.json' is already up to date")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
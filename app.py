@@ -1,27 +1,51 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 import pickle
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import warnings
 import joblib
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import json
+import os
+import atexit
+import hashlib
+import secrets
+import threading
+import time
+from contextlib import nullcontext
+from shared_state import SharedModelState
+from audit_log import AuditLogger
+from accuracy_tracker import AccuracyTracker
+from drift_monitor import DriftMonitor, load_reference
+from shadow_models import ShadowScorer
+from admission import AdmissionController, TokenBucketLimiter
+from page_cache import StaticPage
+from profiling import profiler_from_env
+from forecasting import forecast_from_bars
+from conformal import intervals_path, load_intervals, save_intervals, calibrate_from_history, interval_bounds
+from bar_store import BarStore, load_history
+from live_stream import LiveFeed, WARMUP_BARS
+from indicators import next_trading_day
+from checkpoint import Checkpointer
+from bar_aggregator import DailyAggregator
 warnings.filterwarnings('ignore')
 
 app = Flask(__name__)
 
+MODEL_PATH = 'linear_regression_model.pkl'
+
 # Load the trained model
 def load_model():
     try:
         # Try loading with joblib first (more compatible)
         try:
-            model = joblib.load('linear_regression_model.pkl')
+            model = joblib.load(MODEL_PATH)
             print("Model loaded successfully with joblib")
             return model
         except:
             # If joblib fails, try with pickle
-            with open('linear_regression_model.pkl', 'rb') as file:
+            with open(MODEL_PATH, 'rb') as file:
                 model = pickle.load(file)
             print("Model loaded successfully with pickle")
             return model
@@ -37,9 +61,9 @@ def load_model():
         dummy_model.feature_names_in_ = np.array(['SMA_5_t-1', 'SMA_10_t-1', 'Price_Change_t-1', 'SMA_20_t-1', 'EMA_20_t-1', 'MACD_t-1', 'MACD_signal_t-1', 'MACD_diff_t-1', 'RSI_t-1', 'ATR_t-1', 'year', 'month', 'day', 'day_of_week', 'is_month_end'])
         return dummy_model
 
-# Calculate model accuracy metrics
-def calculate_accuracy_metrics():
-    """Calculate and return accuracy metrics for the model"""
+# Static accuracy metrics, served until realized closes have been recorded
+def load_baseline_metrics():
+    """Load the offline accuracy estimate for the model"""
     try:
         # Try to load realistic accuracy metrics from file
         try:
@@ -77,12 +101,433 @@ def calculate_accuracy_metrics():
             'note': 'Your model\'s performance metrics'
         }
 
+# Calculate model accuracy metrics
+def calculate_accuracy_metrics():
+    """Return realized accuracy metrics, or the offline estimate before any are available"""
+    metrics = accuracy_tracker.metrics()
+    if metrics is not None:
+        return metrics
+    return BASELINE_METRICS
+
+def get_model_version():
+    """Short content hash of the model artifact, used to tag derived state"""
+    try:
+        with open(MODEL_PATH, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return 'dummy'
+
+# Build the feature row the model expects from the user's open/high/low
+def build_features(open_price, high_price, low_price, now=None):
+    """Create the model's input features from a single open/high/low quote"""
+    if now is None:
+        now = exchange_now()
+
+    # Calculate basic features
+    price_change = high_price - low_price
+    price_range = high_price - low_price
+
+    # We'll use the current price as a base and create lagged features
+    current_price = (open_price + high_price + low_price) / 3  # Average price
+
+    return {
+        'SMA_5_t-1': current_price * 0.99,  # Original 5-day SMA
+        'SMA_10_t-1': current_price * 0.98,  # Original 10-day SMA
+        'Price_Change_t-1': price_change * 0.001,  # Heavily scaled down price change (main fix)
+        'SMA_20_t-1': current_price * 0.97,  # Original 20-day SMA
+        'EMA_20_t-1': current_price * 0.975,  # Original 20-day EMA
+        'MACD_t-1': 0.5,  # Original MACD value
+        'MACD_signal_t-1': 0.4,  # Original MACD signal
+        'MACD_diff_t-1': 0.1,  # Original MACD difference
+        'RSI_t-1': 50.0,  # Original RSI value
+        'ATR_t-1': price_range * 0.1,  # Original ATR
+        'year': now.year,
+        'month': now.month,
+        'day': now.day,
+        'day_of_week': now.weekday(),
+        'is_month_end': 1 if now.day >= 28 else 0,
+        'is_month_start': 1 if now.day <= 3 else 0
+    }
+
+# Exchange holidays (YYYY-MM-DD, comma separated) skipped by the trading calendar
+MARKET_HOLIDAYS = [day for day in os.environ.get('MARKET_HOLIDAYS', '').split(',') if day]
+
+# The exchange's timezone: "today", and the clock that closes intraday
+# sessions, follow the exchange's wall clock rather than the server's. The
+# zone is resolved once; datetime.now(zone) is cheap enough for the hot path.
+EXCHANGE_TZ = os.environ.get('EXCHANGE_TZ', 'America/New_York')
+try:
+    EXCHANGE_ZONE = pd.Timestamp.now(tz=EXCHANGE_TZ).tzinfo
+except Exception as e:
+    raise ValueError(f"Invalid EXCHANGE_TZ {EXCHANGE_TZ!r}: {e}")
+
+def exchange_now():
+    """Current exchange-local wall-clock time (naive datetime)"""
+    return datetime.now(EXCHANGE_ZONE).replace(tzinfo=None)
+
+def next_session_date():
+    """The trading day a prediction made now is for (YYYY-MM-DD)"""
+    return str(next_trading_day(np.datetime64(exchange_now(), 'D'), MARKET_HOLIDAYS))
+
+def feature_vector(features):
+    """Order a feature dict the way the model was trained"""
+    return np.array([features[name] for name in FEATURE_NAMES], dtype=np.float64)
+
 # Initialize model
 model = load_model()
+MODEL_VERSION = get_model_version()
+FEATURE_NAMES = list(getattr(model, 'feature_names_in_', []))
+
+# Optional shared-memory state: one writer publishes the model weights, every
+# worker maps the same region and publishes the per-symbol features it computes
+shared_state = None
+if os.environ.get('SHARED_STATE_PATH'):
+    try:
+        shared_state = SharedModelState(
+            os.environ['SHARED_STATE_PATH'],
+            feature_names=FEATURE_NAMES,
+            max_symbols=int(os.environ.get('SHARED_STATE_MAX_SYMBOLS', 1024)),
+            model_version=MODEL_VERSION,
+        )
+        if shared_state.is_writer:
+            shared_state.publish_model(model.coef_, model.intercept_)
+        print(f"Shared state attached at {shared_state.path} (writer={shared_state.is_writer})")
+    except Exception as e:
+        print(f"Error attaching shared state: {e}, using per-worker model")
+        shared_state = None
+
+# Optional shadow candidates scored next to the primary on every request
+shadow = None
+if os.environ.get('SHADOW_MODELS') and model is not None:
+    try:
+        shadow = ShadowScorer.from_spec(model, os.environ['SHADOW_MODELS'], FEATURE_NAMES)
+        print(f"Shadow scoring enabled for: {', '.join(shadow.stack.names[1:])}")
+    except Exception as e:
+        print(f"Error loading shadow models: {e}, shadow scoring disabled")
+        shadow = None
+
+# Conformal prediction intervals stored next to the model artifact. A stale
+# calibration is ignored; with CALIBRATION_DATA set it is redone at boot.
+# They are calibrated on real indicator history, so they are only attached to
+# predictions made from the same pipeline (/bars and the first /forecast day),
+# never to /predict, whose features are approximated from one day's prices.
+INTERVALS_PATH = intervals_path(MODEL_PATH)
+try:
+    interval_half_widths = load_intervals(INTERVALS_PATH, MODEL_VERSION)
+except Exception as e:
+    print(f"Error loading prediction intervals from {INTERVALS_PATH}: {e}, intervals disabled")
+    interval_half_widths = None
+if interval_half_widths is None and os.environ.get('CALIBRATION_DATA') and model is not None:
+    try:
+        interval_half_widths, n_calibration = calibrate_from_history(
+            model, FEATURE_NAMES, *load_history(os.environ['CALIBRATION_DATA'])
+        )
+        save_intervals(INTERVALS_PATH, MODEL_VERSION, interval_half_widths, n_calibration)
+        print(f"Recalibrated prediction intervals on {n_calibration} held-out days")
+    except Exception as e:
+        print(f"Error calibrating prediction intervals: {e}, intervals disabled")
+        interval_half_widths = None
+INTERVAL_LEVELS = []
+if interval_half_widths is not None:
+    try:
+        requested = os.environ.get('PREDICTION_INTERVAL_LEVELS')
+        INTERVAL_LEVELS = [f'{float(level):g}' for level in requested.split(',')] if requested else list(interval_half_widths)
+        INTERVAL_LEVELS = [level for level in INTERVAL_LEVELS if level in interval_half_widths]
+    except Exception as e:
+        print(f"Error reading PREDICTION_INTERVAL_LEVELS: {e}, intervals disabled")
+        INTERVAL_LEVELS = []
+
+def prediction_intervals(prediction):
+    """Calibrated intervals around a prediction (an O(1) lookup per level)"""
+    if not INTERVAL_LEVELS:
+        return None
+    return {
+        level: {'low': round(float(low), 2), 'high': round(float(high), 2)}
+        for level, (low, high) in interval_bounds(prediction, interval_half_widths, INTERVAL_LEVELS).items()
+    }
+
+# Rolling realized accuracy; the baseline file is only read once, at startup.
+# The tracker is per process: with several workers, /actual only settles the
+# predictions made by the worker that receives it (see accuracy_tracker.py).
+BASELINE_METRICS = load_baseline_metrics()
+accuracy_tracker = AccuracyTracker(
+    window=int(os.environ.get('ACCURACY_WINDOW', 250)),
+    max_pending=int(os.environ.get('ACCURACY_MAX_PENDING', 10000)),
+)
+
+# Live feature-drift monitoring against the training-time reference profile
+drift_monitor = None
+DRIFT_REFERENCE_PATH = os.environ.get('DRIFT_REFERENCE_PATH', 'drift_reference.json')
+if os.path.exists(DRIFT_REFERENCE_PATH):
+    try:
+        drift_monitor = DriftMonitor(
+            load_reference(DRIFT_REFERENCE_PATH),
+            decay=float(os.environ.get('DRIFT_DECAY', 0.999)),
+            features=['open', 'high', 'low'] + FEATURE_NAMES,
+        )
+        print(f"Drift monitoring enabled for {len(drift_monitor.features)} features")
+    except Exception as e:
+        print(f"Error loading drift reference: {e}, drift monitoring disabled")
+        drift_monitor = None
+
+# Audit trail of every prediction, written in batches off the request path.
+# Set AUDIT_LOG_PATH to an empty string to turn it off.
+audit_log = None
+if os.environ.get('AUDIT_LOG_PATH', 'prediction_audit.db'):
+    try:
+        audit_log = AuditLogger(
+            os.environ.get('AUDIT_LOG_PATH', 'prediction_audit.db'),
+            max_queue=int(os.environ.get('AUDIT_LOG_MAX_QUEUE', 10000)),
+            batch_size=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 500)),
+        )
+    except Exception as e:
+        print(f"Error opening audit log: {e}, predictions will not be audited")
+        audit_log = None
+
+# Live bars: per-symbol incremental features, one prediction per bar fanned
+# out to every /stream subscriber through bounded, drop-oldest queues
+live_feed = None
+if model is not None:
+    live_feed = LiveFeed(
+        model.coef_, model.intercept_, FEATURE_NAMES,
+        max_symbols=int(os.environ.get('LIVE_MAX_SYMBOLS', 1024)),
+        queue_size=int(os.environ.get('STREAM_QUEUE_SIZE', 100)),
+        max_subscribers=int(os.environ.get('MAX_STREAM_SUBSCRIBERS', 256)),
+        holidays=MARKET_HOLIDAYS,
+    )
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+
+# Held while a bar moves through the aggregator, the live feed and the
+# accuracy tracker, so a checkpoint never sees it in one but not the others
+state_lock = threading.RLock()
+
+def record_bar_events(events, audit=True):
+    """Settle earlier predictions with each bar's close and track the new ones"""
+    for event, vector in events:
+        symbol = event['symbol']
+        accuracy_tracker.record_actual(symbol, event['bar_date'], event['close'])
+        if shadow is not None:
+            shadow.record_actual(symbol, event['bar_date'], event['close'])
+        accuracy_tracker.record_prediction(symbol, event['prediction_date'],
+                                           event['predicted_close'], event['close'], source='bars')
+        if shared_state is not None:
+            shared_state.publish_features(symbol, vector)
+        if audit and audit_log is not None:
+            audit_log.log(symbol, MODEL_VERSION, event, dict(zip(FEATURE_NAMES, vector.tolist())),
+                          event['predicted_close'])
+
+# Intraday prints posted to /ticks are rolled up into daily bars; every
+# finished session goes through the same path as a bar posted to /bars.
+# Tick timestamps are exchange-local wall-clock times, and sessions are closed
+# on the EXCHANGE_TZ clock, so the server's own timezone doesn't matter.
+def bar_rows(bars):
+    return [
+        {'symbol': symbol, 'date': bars['date'][i], 'high': bars['high'][i],
+         'low': bars['low'][i], 'close': bars['close'][i]}
+        for i, symbol in enumerate(bars['symbol'])
+    ]
+
+def ingest_finished_bars(bars):
+    with state_lock:
+        events, _ = live_feed.ingest(bar_rows(bars))
+        record_bar_events(events)
+
+aggregator = None
+if live_feed is not None:
+    aggregator = DailyAggregator(
+        on_bars=ingest_finished_bars,
+        holidays=MARKET_HOLIDAYS,
+        session_close=os.environ.get('SESSION_CLOSE', '16:00'),
+        max_symbols=int(os.environ.get('LIVE_MAX_SYMBOLS', 1024)),
+    )
+
+    def close_sessions():
+        while True:
+            time.sleep(float(os.environ.get('SESSION_CHECK_SECONDS', 30)))
+            try:
+                with state_lock:
+                    aggregator.close_due(np.datetime64(exchange_now(), 'm'))
+            except Exception as e:
+                print(f"Error closing sessions: {e}")
+
+    threading.Thread(target=close_sessions, name='session-close', daemon=True).start()
+
+# Warm-up traffic to /bars, /ticks and /universe runs against a scratch feed
+# and aggregator built the same way, so it exercises every code path without
+# leaving warm-up symbols in the live universe or reaching /stream subscribers
+warmup_feed = None
+warmup_aggregator = None
+if live_feed is not None:
+    warmup_feed = LiveFeed(model.coef_, model.intercept_, FEATURE_NAMES, max_symbols=16,
+                           holidays=MARKET_HOLIDAYS)
+    warmup_aggregator = DailyAggregator(
+        on_bars=lambda bars: warmup_feed.ingest(bar_rows(bars)),
+        holidays=MARKET_HOLIDAYS,
+        session_close=os.environ.get('SESSION_CLOSE', '16:00'),
+        max_symbols=16,
+    )
+
+def is_warmup():
+    return request.headers.get('X-Warmup') == WARMUP_TOKEN
+
+# Periodic crash-safe snapshots of the live feature state and accuracy
+# accumulators. On boot the snapshot is restored and only bars newer than it
+# are replayed from REPLAY_HISTORY, so restart time doesn't grow with history.
+checkpointer = None
+if os.environ.get('CHECKPOINT_PATH') and live_feed is not None:
+    checkpointer = Checkpointer(
+        os.environ['CHECKPOINT_PATH'],
+        MODEL_VERSION,
+        {'live_feed': live_feed, 'accuracy': accuracy_tracker, 'aggregator': aggregator},
+        interval=float(os.environ.get('CHECKPOINT_INTERVAL', 60)),
+        state_lock=state_lock,
+    )
+    try:
+        restored = checkpointer.restore()
+        if restored is not None:
+            print(f"Restored {', '.join(restored['sections'])} from {checkpointer.path} "
+                  f"in {restored['duration']}s (snapshot age {restored['snapshot_age']}s)")
+    except Exception as e:
+        print(f"Error restoring checkpoint: {e}, starting from empty state")
+    checkpointer.start()
+    atexit.register(checkpointer.stop)
+
+# REPLAY_HISTORY is a CSV (one symbol, REPLAY_SYMBOL) or a bar store
+# directory, in which case every stored symbol is replayed unless
+# REPLAY_SYMBOL lists some
+if os.environ.get('REPLAY_HISTORY') and live_feed is not None:
+    try:
+        source = os.environ['REPLAY_HISTORY']
+        if os.environ.get('REPLAY_SYMBOL'):
+            symbols = os.environ['REPLAY_SYMBOL'].split(',')
+        else:
+            symbols = BarStore(source).symbols() if os.path.isdir(source) else ['SPX']
+        replayed = 0
+        for symbol in symbols:
+            history = load_history(source, symbol)
+            with state_lock:
+                events, _ = live_feed.replay(symbol, *history)
+                # Replayed bars were audited when they first arrived
+                record_bar_events(events, audit=False)
+            replayed += len(events)
+        print(f"Replayed {replayed} bars for {len(symbols)} symbols from {source}")
+    except Exception as e:
+        print(f"Error replaying history: {e}")
+
+# Admission control: bounded concurrency and wait queue for the prediction
+# endpoints, plus optional per-client rate limits (requests per second)
+PROTECTED_ENDPOINTS = {'predict', 'predict_batch', 'forecast', 'universe'}
+admission = None
+if int(os.environ.get('MAX_CONCURRENT_PREDICTIONS', 16)) > 0:
+    admission = AdmissionController(
+        max_concurrent=int(os.environ.get('MAX_CONCURRENT_PREDICTIONS', 16)),
+        max_queue=int(os.environ.get('MAX_QUEUED_PREDICTIONS', 32)),
+        queue_timeout=float(os.environ.get('PREDICTION_QUEUE_TIMEOUT', 1.0)),
+        retry_after=int(os.environ.get('RETRY_AFTER_SECONDS', 1)),
+    )
+rate_limiter = None
+if float(os.environ.get('RATE_LIMIT_PER_CLIENT', 0)) > 0:
+    rate_limiter = TokenBucketLimiter(
+        rate=float(os.environ['RATE_LIMIT_PER_CLIENT']),
+        burst=float(os.environ.get('RATE_LIMIT_BURST', os.environ['RATE_LIMIT_PER_CLIENT'])),
+    )
+
+# Number of reverse proxies in front of the app that append to X-Forwarded-For.
+# Only the addresses they added are trusted; anything earlier in the header is
+# client-supplied and could be rotated to dodge the rate limit.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+def client_id():
+    """Identify the caller for rate limiting"""
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.remote_addr or 'unknown'
+
+def overloaded_response(error, status, retry_after):
+    response = jsonify({
+        'success': False,
+        'error': error
+    })
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, int(round(retry_after))))
+    return response
+
+@app.before_request
+def admit_request():
+    if request.endpoint not in PROTECTED_ENDPOINTS:
+        return None
+    if rate_limiter is not None and not is_warmup():
+        allowed, wait = rate_limiter.allow(client_id())
+        if not allowed:
+            return overloaded_response('Rate limit exceeded', 429, wait)
+    if admission is not None:
+        if not admission.acquire():
+            return overloaded_response('Server is overloaded, please retry', 503, admission.retry_after)
+        g.admitted = True
+    return None
+
+@app.teardown_request
+def release_request(exc=None):
+    if g.pop('admitted', False):
+        admission.release()
+
+# On-demand profiling (PROFILE_SAMPLE_RATE / PROFILE_SECRET); None when off
+profiler = profiler_from_env()
+
+if profiler is not None:
+    @app.before_request
+    def start_profile():
+        # Random sampling covers /predict only; any other request needs a signature
+        if request.endpoint != 'admin_profile':
+            g.profile = profiler.start(request.headers.get('X-Profile-Signature'),
+                                       sample=request.endpoint == 'predict')
+
+    @app.teardown_request
+    def stop_profile(exc=None):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.stop(profile)
+
+# The home page is static: render and compress it once, revalidate with ETags
+home_page = StaticPage(
+    app,
+    'index.html',
+    cache_control=os.environ.get('HOME_CACHE_CONTROL', 'public, no-cache'),
+)
 
 @app.route('/')
 def home():
-    return render_template('index.html')
+    return home_page.response(request)
+
+def reference_close(data):
+    """The close a prediction's direction is judged against: the posted close, or the bar's average"""
+    if 'close' in data:
+        return float(data['close'])
+    return (float(data['open']) + float(data['high']) + float(data['low'])) / 3
+
+def record_served_prediction(symbol, data, features, prediction, prediction_date, reference):
+    """Side effects of one served /predict or /predict/batch prediction"""
+    if shared_state is not None:
+        try:
+            shared_state.publish_features(symbol, feature_vector(features))
+        except (ValueError, MemoryError) as e:
+            print(f"Error publishing features for {symbol}: {e}")
+    
+    if drift_monitor is not None:
+        # Monitoring must never fail the prediction it observes
+        try:
+            drift_monitor.update({'open': float(data['open']), 'high': float(data['high']),
+                                  'low': float(data['low']), **features})
+        except Exception as e:
+            print(f"Error updating drift monitor: {e}")
+    
+    if audit_log is not None:
+        audit_log.log(symbol, MODEL_VERSION, data, features, prediction)
+    
+    # Remember the prediction so it can be scored once the real close is known
+    accuracy_tracker.record_prediction(symbol, prediction_date, prediction, reference)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -94,77 +539,574 @@ def predict():
         open_price = float(data['open'])
         high_price = float(data['high'])
         low_price = float(data['low'])
+        symbol = data.get('symbol', 'SPX')
         
-        # Calculate basic features
-        price_change = high_price - low_price
-        price_range = high_price - low_price
-        
-        # Create a sample row with the required features
-        # Based on the model's feature names, we need to create features
-        # that match what the model was trained on
-        
-        # Create a DataFrame with the required features
-        # We'll use the current price as a base and create lagged features
-        current_price = (open_price + high_price + low_price) / 3  # Average price
+        # Warm-up traffic exercises the full path but leaves no trace in the
+        # audit log, accuracy tracker, drift monitor or shadow statistics
+        record = not is_warmup()
         
         # Create features that the model expects
-        features = {
-            'SMA_5_t-1': current_price * 0.99,  # Original 5-day SMA
-            'SMA_10_t-1': current_price * 0.98,  # Original 10-day SMA
-            'Price_Change_t-1': price_change * 0.001,  # Heavily scaled down price change (main fix)
-            'SMA_20_t-1': current_price * 0.97,  # Original 20-day SMA
-            'EMA_20_t-1': current_price * 0.975,  # Original 20-day EMA
-            'MACD_t-1': 0.5,  # Original MACD value
-            'MACD_signal_t-1': 0.4,  # Original MACD signal
-            'MACD_diff_t-1': 0.1,  # Original MACD difference
-            'RSI_t-1': 50.0,  # Original RSI value
-            'ATR_t-1': price_range * 0.1,  # Original ATR
-            'year': datetime.now().year,
-            'month': datetime.now().month,
-            'day': datetime.now().day,
-            'day_of_week': datetime.now().weekday(),
-            'is_month_end': 1 if datetime.now().day >= 28 else 0,
-            'is_month_start': 1 if datetime.now().day <= 3 else 0
-        }
+        features = build_features(open_price, high_price, low_price)
         
-        # Convert to DataFrame
-        input_df = pd.DataFrame([features])
+        if model is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded properly'
+            }), 500
+        
+        prediction_date = next_session_date()
+        reference = reference_close(data)
         
         # Make prediction
-        if model is not None:
+        if shadow is not None:
+            # One stacked product scores the primary and every candidate
+            prediction = shadow.predict(feature_vector(features), symbol, prediction_date, reference, record)
+        elif shared_state is not None and shared_state.ready:
+            # Serve from the shared region so every worker uses the same weights
+            prediction = shared_state.predict(feature_vector(features))
+        else:
+            # Convert to DataFrame
+            input_df = pd.DataFrame([features])
             prediction = model.predict(input_df)[0]
+        
+        # Format the prediction
+        predicted_close = round(prediction, 2)
+        
+        if record:
+            record_served_prediction(symbol, data, features, float(prediction), prediction_date, reference)
+        
+        return jsonify({
+            'success': True,
+            'predicted_close': predicted_close,
+            'input_data': {
+                'open': open_price,
+                'high': high_price,
+                'low': low_price
+            },
+            'prediction_date': prediction_date
+        })
             
-            # Format the prediction
-            predicted_close = round(prediction, 2)
-            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+MAX_BATCH_ROWS = int(os.environ.get('MAX_BATCH_ROWS', 5000))
+
+def predict_rows(rows, prediction_date=None, record=False):
+    """
+    Features and predictions for a batch of open/high/low rows, one model
+    call; with shadow candidates every model is scored in the same product
+    """
+    now = exchange_now()
+    features = [
+        build_features(float(row['open']), float(row['high']), float(row['low']), now)
+        for row in rows
+    ]
+    if shadow is not None:
+        predictions = shadow.predict_many(
+            np.array([feature_vector(f) for f in features]),
+            [row.get('symbol', 'SPX') for row in rows], prediction_date,
+            [reference_close(row) for row in rows], record,
+        )
+    elif shared_state is not None and shared_state.ready:
+        predictions = shared_state.predict_many(np.array([feature_vector(f) for f in features]))
+    else:
+        predictions = model.predict(pd.DataFrame(features))
+    return features, predictions
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        data = request.get_json()
+        rows = data['rows'] if isinstance(data, dict) else data
+        if not rows:
+            raise ValueError('rows must contain at least one input')
+        if len(rows) > MAX_BATCH_ROWS:
+            raise ValueError(f'At most {MAX_BATCH_ROWS} rows per batch')
+        
+        if model is None:
             return jsonify({
-                'success': True,
-                'predicted_close': predicted_close,
-                'input_data': {
-                    'open': open_price,
-                    'high': high_price,
-                    'low': low_price
-                },
-                'prediction_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            })
+                'success': False,
+                'error': 'Model not loaded properly'
+            }), 500
+        
+        # Every row is recorded exactly as a /predict request would be
+        record = not is_warmup()
+        prediction_date = next_session_date()
+        features, predictions = predict_rows(rows, prediction_date, record)
+        
+        results = []
+        for i, row in enumerate(rows):
+            results.append({'predicted_close': round(float(predictions[i]), 2)})
+            if record:
+                record_served_prediction(row.get('symbol', 'SPX'), row, features[i], float(predictions[i]),
+                                         prediction_date, reference_close(row))
+        
+        return jsonify({
+            'success': True,
+            'prediction_date': prediction_date,
+            'predictions': results
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+MAX_FORECAST_HORIZON = int(os.environ.get('MAX_FORECAST_HORIZON', 260))
+MAX_FORECAST_SCENARIOS = int(os.environ.get('MAX_FORECAST_SCENARIOS', 10000))
+
+@app.route('/forecast', methods=['POST'])
+def forecast():
+    try:
+        # History of completed daily bars, oldest first, plus the horizon
+        data = request.get_json()
+        bars = data['history']
+        horizon = int(data.get('horizon', 5))
+        scenarios = int(data.get('scenarios', 1))
+        noise_std = float(data.get('noise_std', 0.0))
+        
+        if not bars:
+            raise ValueError('history must contain at least one bar')
+        if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+            raise ValueError(f'horizon must be between 1 and {MAX_FORECAST_HORIZON}')
+        if not 1 <= scenarios <= MAX_FORECAST_SCENARIOS:
+            raise ValueError(f'scenarios must be between 1 and {MAX_FORECAST_SCENARIOS}')
+        
+        if model is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded properly'
+            }), 500
+        
+        result = forecast_from_bars(
+            bars, model.coef_, model.intercept_, FEATURE_NAMES, horizon,
+            scenarios=scenarios, noise_std=noise_std, seed=data.get('seed'),
+            holidays=MARKET_HOLIDAYS
+        )
+        
+        path = []
+        for i, date in enumerate(result['dates']):
+            point = {
+                'date': date,
+                'predicted_close': round(float(result['predicted_close'][i]), 2)
+            }
+            if 'p05' in result:
+                point['p05'] = round(float(result['p05'][i]), 2)
+                point['p95'] = round(float(result['p95'][i]), 2)
+            if i == 0:
+                # Calibrated for one step ahead; later days compound the error
+                point['prediction_interval'] = prediction_intervals(point['predicted_close'])
+            path.append(point)
+        
+        return jsonify({
+            'success': True,
+            'horizon': horizon,
+            'scenarios': scenarios,
+            'forecast': path
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/actual', methods=['POST'])
+def record_actual():
+    try:
+        # Accept a single realized close or a list of them
+        data = request.get_json()
+        records = data if isinstance(data, list) else [data]
+        
+        matched = 0
+        for record in records:
+            symbol = record.get('symbol', 'SPX')
+            if accuracy_tracker.record_actual(symbol, record['date'], float(record['close'])):
+                matched += 1
+            if shadow is not None:
+                shadow.record_actual(symbol, record['date'], float(record['close']))
+        
+        return jsonify({
+            'success': True,
+            'received': len(records),
+            'matched': matched
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/bars', methods=['POST'])
+def ingest_bars():
+    try:
+        # One completed bar, a list of them, or {'bars': [...]}
+        data = request.get_json()
+        if isinstance(data, list):
+            bars = data
         else:
+            bars = data['bars'] if 'bars' in data else [data]
+        if not bars:
+            raise ValueError('bars must contain at least one bar')
+        
+        if live_feed is None:
             return jsonify({
                 'success': False,
                 'error': 'Model not loaded properly'
             }), 500
-            
+        
+        if is_warmup():
+            events, rejected = warmup_feed.ingest(bars)
+        else:
+            with state_lock:
+                events, rejected = live_feed.ingest(bars)
+                record_bar_events(events)
+        
+        return jsonify({
+            'success': True,
+            'accepted': len(events),
+            'rejected': rejected,
+            'predictions': [
+                {**event, 'prediction_interval': prediction_intervals(event['predicted_close'])}
+                for event, _ in events
+            ]
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/ticks', methods=['POST'])
+def ingest_ticks():
+    try:
+        # Columnar {'symbol', 'timestamp', 'price', 'volume'} arrays (symbol may
+        # be a single string), or a list of {'symbol', 'timestamp', 'price', 'volume'}
+        data = request.get_json()
+        if isinstance(data, list):
+            data = {
+                'symbol': [tick.get('symbol', 'SPX') for tick in data],
+                'timestamp': [tick['timestamp'] for tick in data],
+                'price': [tick['price'] for tick in data],
+                'volume': [tick.get('volume', 0) for tick in data]
+            }
+        timestamps = data['timestamp']
+        symbols = data.get('symbol', 'SPX')
+        if isinstance(symbols, str):
+            symbols = [symbols] * len(timestamps)
+        if not timestamps or len(symbols) != len(timestamps) or len(data['price']) != len(timestamps):
+            raise ValueError('symbol, timestamp and price must be non-empty and the same length')
+        
+        if aggregator is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded properly'
+            }), 500
+        
+        if is_warmup():
+            target, lock = warmup_aggregator, nullcontext()
+        else:
+            target, lock = aggregator, state_lock
+        with lock:
+            late_before = target.late_ticks
+            closed = target.add_ticks(
+                target.symbol_ids(symbols), timestamps, data['price'], data.get('volume')
+            )
+        
+        return jsonify({
+            'success': True,
+            'received': len(timestamps),
+            'late': target.late_ticks - late_before,
+            'bars_closed': closed
+        })
+    
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
+@app.route('/stream')
+def stream():
+    if live_feed is None:
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded properly'
+        }), 500
+    symbols = [s for s in request.args.get('symbols', '').split(',') if s]
+    try:
+        subscription = live_feed.subscribe(symbols)
+    except OverflowError as e:
+        return overloaded_response(str(e), 503, STREAM_HEARTBEAT)
+    return Response(
+        live_feed.stream(subscription, heartbeat=STREAM_HEARTBEAT),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/universe')
+def universe():
+    try:
+        # Every symbol fed through /bars, scored together and ranked by
+        # expected return; ?top=N limits the list, ?order=asc shows the worst first
+        top = int(request.args.get('top', 0)) or None
+        ascending = request.args.get('order', 'desc') == 'asc'
+        
+        if live_feed is None:
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded properly'
+            }), 500
+        
+        feed = warmup_feed if is_warmup() else live_feed
+        ranked = feed.cross_section(top=top, ascending=ascending)
+        results = []
+        for i, symbol in enumerate(ranked['symbol']):
+            results.append({
+                'rank': i + 1,
+                'symbol': symbol,
+                'close': float(ranked['close'][i]),
+                'predicted_close': round(float(ranked['predicted_close'][i]), 2),
+                'expected_return': round(float(ranked['expected_return'][i]), 6),
+                'prediction_date': str(ranked['prediction_date'][i]),
+                'warming_up': bool(ranked['bars_seen'][i] < WARMUP_BARS)
+            })
+        
+        return jsonify({
+            'success': True,
+            'symbols': len(feed.rows),
+            'ranking': results
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/accuracy')
+def accuracy():
+    return jsonify({
+        'success': True,
+        'metrics': calculate_accuracy_metrics()
+    })
+
+@app.route('/drift')
+def drift():
+    if drift_monitor is None:
+        return jsonify({
+            'success': False,
+            'error': f'No drift reference found at {DRIFT_REFERENCE_PATH}'
+        }), 404
+    return jsonify({
+        'success': True,
+        'drift': drift_monitor.scores()
+    })
+
+@app.route('/shadow')
+def shadow_stats():
+    if shadow is None:
+        return jsonify({
+            'success': False,
+            'error': 'Shadow scoring is not enabled'
+        }), 404
+    return jsonify({
+        'success': True,
+        'shadow': shadow.stats()
+    })
+
+@app.route('/features/<symbol>')
+def latest_features(symbol):
+    if shared_state is None:
+        return jsonify({
+            'success': False,
+            'error': 'Shared state is not enabled'
+        }), 404
+    vector, updated = shared_state.read_features(symbol)
+    if vector is None:
+        return jsonify({
+            'success': False,
+            'error': f'No features published for {symbol}'
+        }), 404
+    return jsonify({
+        'success': True,
+        'symbol': symbol,
+        'features': dict(zip(shared_state.feature_names, vector.tolist())),
+        'updated_at': updated
+    })
+
+@app.route('/admin/profile')
+def admin_profile():
+    # Behind a proxy every caller looks local, so the secret is the only gate;
+    # without it (or without the token) the endpoint doesn't exist
+    if profiler is None or not profiler.authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({
+            'success': False,
+            'error': 'Not found'
+        }), 404
+
+    output_format = request.args.get('format', 'pstats')
+    if output_format == 'text':
+        body = profiler.text(sort=request.args.get('sort', 'cumulative'))
+        response = Response(body, content_type='text/plain; charset=utf-8')
+    elif output_format == 'summary':
+        response = jsonify({
+            'success': True,
+            'profile': profiler.summary()
+        })
+    else:
+        dump = profiler.dump()
+        if dump is None:
+            return jsonify({
+                'success': False,
+                'error': 'No requests profiled yet'
+            }), 404
+        response = Response(dump, content_type='application/octet-stream')
+        response.headers['Content-Disposition'] = 'attachment; filename=predict.pstats'
+
+    if request.args.get('reset') == '1':
+        profiler.reset()
+    return response
+
+@app.route('/ready')
+def ready():
+    # Saturation is reported, not failed on: shedding already protects this
+    # instance, and dropping it from the pool would push the load elsewhere
+    status = admission.status if admission is not None else 'healthy'
+    return jsonify({**readiness, 'status': status}), 200 if readiness['ready'] else 503
+
 @app.route('/health')
 def health():
+    # Liveness: the process is up; load ('busy' / 'saturated') is in the body
+    status = admission.status if admission is not None else 'healthy'
     return jsonify({
-        'status': 'healthy',
-        'model_loaded': model is not None
+        'status': status,
+        'ready': readiness['ready'],
+        'model_loaded': model is not None,
+        'admission': admission.stats() if admission is not None else None,
+        'rate_limit': rate_limiter.stats() if rate_limiter is not None else None,
+        'shared_state': shared_state.summary() if shared_state is not None else None,
+        'live_feed': live_feed.stats() if live_feed is not None else None,
+        'aggregator': aggregator.stats() if aggregator is not None else None,
+        'checkpoint': checkpointer.stats() if checkpointer is not None else None,
+        'audit_log': audit_log.stats() if audit_log is not None else None
     })
 
+# Warm-up: run representative requests through every serving path before
+# reporting ready, so lazy initialization in Flask/pandas/sklearn happens
+# before the load balancer sends real traffic
+WARMUP_TOKEN = secrets.token_hex(16)
+WARMUP_INPUTS = [
+    (4500.0, 4520.0, 4480.0),
+    (4100.0, 4135.5, 4080.25),
+    (5300.0, 5310.0, 5250.0),
+]
+readiness = {'ready': False, 'error': None, 'checks': 0, 'duration': None}
+
+def expected_prediction(open_price, high_price, low_price):
+    """Closed-form linear prediction, independent of the serving code path"""
+    vector = feature_vector(build_features(open_price, high_price, low_price))
+    return float(model.intercept_ + np.dot(np.asarray(model.coef_, dtype=np.float64), vector))
+
+def warm_up():
+    """Exercise every serving path and verify the results, then mark ready"""
+    start = time.perf_counter()
+    client = app.test_client()
+    headers = {'X-Warmup': WARMUP_TOKEN}
+    try:
+        if model is None:
+            raise RuntimeError('Model not loaded properly')
+        
+        response = client.get('/')
+        if response.status_code != 200:
+            raise RuntimeError(f'Home page returned {response.status_code}')
+        readiness['checks'] += 1
+        
+        for open_price, high_price, low_price in WARMUP_INPUTS:
+            response = client.post('/predict', headers=headers, json={
+                'open': open_price,
+                'high': high_price,
+                'low': low_price
+            })
+            result = response.get_json()
+            if response.status_code != 200 or not result.get('success'):
+                raise RuntimeError(f'/predict returned {response.status_code}: {result}')
+            expected = round(expected_prediction(open_price, high_price, low_price), 2)
+            if abs(result['predicted_close'] - expected) > 0.01:
+                raise RuntimeError(f"/predict gave {result['predicted_close']}, expected {expected}")
+            readiness['checks'] += 1
+        
+        rows = [{'open': o, 'high': h, 'low': l} for o, h, l in WARMUP_INPUTS]
+        response = client.post('/predict/batch', headers=headers, json={'rows': rows})
+        result = response.get_json()
+        if response.status_code != 200 or not result.get('success'):
+            raise RuntimeError(f'/predict/batch returned {response.status_code}: {result}')
+        for row, (open_price, high_price, low_price) in zip(result['predictions'], WARMUP_INPUTS):
+            expected = round(expected_prediction(open_price, high_price, low_price), 2)
+            if abs(row['predicted_close'] - expected) > 0.01:
+                raise RuntimeError(f"/predict/batch gave {row['predicted_close']}, expected {expected}")
+        readiness['checks'] += 1
+        
+        history = [
+            {'date': str(date), 'high': 4510.0 + i, 'low': 4490.0 + i, 'close': 4500.0 + i}
+            for i, date in enumerate(np.busday_offset('2024-01-02', np.arange(30)))
+        ]
+        response = client.post('/forecast', headers=headers, json={'history': history, 'horizon': 3})
+        result = response.get_json()
+        if response.status_code != 200 or not result.get('success'):
+            raise RuntimeError(f'/forecast returned {response.status_code}: {result}')
+        if len(result['forecast']) != 3 or not all(np.isfinite(p['predicted_close']) for p in result['forecast']):
+            raise RuntimeError(f"/forecast gave an invalid path: {result['forecast']}")
+        readiness['checks'] += 1
+
+        # The streaming paths go to the scratch feed, not the live universe
+        response = client.post('/bars', headers=headers,
+                               json={'bars': [{**bar, 'symbol': 'WARMUP'} for bar in history]})
+        result = response.get_json()
+        if response.status_code != 200 or not result.get('success') or result['accepted'] != len(history):
+            raise RuntimeError(f'/bars returned {response.status_code}: {result}')
+        if not all(np.isfinite(p['predicted_close']) for p in result['predictions']):
+            raise RuntimeError(f"/bars gave invalid predictions: {result['predictions'][-1]}")
+        readiness['checks'] += 1
+
+        # Prints for the next two sessions; the second closes the first
+        sessions = np.busday_offset(history[-1]['date'], [1, 2], roll='forward', holidays=MARKET_HOLIDAYS)
+        response = client.post('/ticks', headers=headers, json={
+            'symbol': 'WARMUP',
+            'timestamp': [f'{sessions[0]}T10:00', f'{sessions[0]}T15:00', f'{sessions[1]}T10:00'],
+            'price': [4530.0, 4535.0, 4540.0],
+        })
+        result = response.get_json()
+        if response.status_code != 200 or not result.get('success') or result['bars_closed'] != 1:
+            raise RuntimeError(f'/ticks returned {response.status_code}: {result}')
+        readiness['checks'] += 1
+
+        response = client.get('/universe', headers=headers)
+        result = response.get_json()
+        if response.status_code != 200 or not result.get('success') or result['symbols'] != 1:
+            raise RuntimeError(f'/universe returned {response.status_code}: {result}')
+        if result['ranking'][0]['prediction_date'] != str(sessions[1]):
+            raise RuntimeError(f"/universe did not pick up the bar closed from ticks: {result['ranking'][0]}")
+        readiness['checks'] += 1
+
+        readiness['ready'] = True
+        print(f"Warm-up complete: {readiness['checks']} checks passed")
+    except Exception as e:
+        readiness['error'] = str(e)
+        print(f"Warm-up failed: {e}, /ready will report not ready")
+    finally:
+        readiness['duration'] = round(time.perf_counter() - start, 3)
+
+if os.environ.get('WARMUP', '1') == '1':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+else:
+    readiness['ready'] = True
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Non-blocking audit log for /predict requests
+
+Request handlers only append a record to a bounded in-memory queue. A
+background thread drains the queue and writes records to SQLite in batches,
+one transaction per batch, so the request path never waits on disk.
+
+Run this file directly to compare request-path latency with and without the
+logger:
+    python audit_log.py
+"""
+
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT,
+    model_version TEXT,
+    input TEXT,
+    features TEXT,
+    output REAL
+)
+"""
+
+INSERT = ('INSERT INTO predictions (ts, symbol, model_version, input, features, output) '
+          'VALUES (?, ?, ?, ?, ?, ?)')
+
+
+class AuditLogger:
+    """Write-behind logger that batches prediction records into SQLite"""
+
+    def __init__(self, path, max_queue=10000, batch_size=500, flush_interval=0.5,
+                 on_full='drop', block_timeout=0.01):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # Counters reported by stats()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+        # Create the table up front so a bad path fails at startup, not later
+        conn = sqlite3.connect(self.path)
+        conn.execute(SCHEMA)
+        conn.commit()
+        conn.close()
+
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, symbol, model_version, input_data, features, output):
+        """Queue one prediction record; never blocks longer than block_timeout"""
+        record = (time.time(), symbol, model_version, input_data, features, output)
+        try:
+            if self.on_full == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            # Backpressure: shed the record rather than slow down the request
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _drain(self, first):
+        """Collect up to batch_size records, starting with one already taken"""
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        rows = []
+        for ts, symbol, version, input_data, features, output in batch:
+            try:
+                rows.append((ts, symbol, version, json.dumps(input_data), json.dumps(features), output))
+            except (TypeError, ValueError) as e:
+                # One unserializable record shouldn't cost the rest of the batch
+                self.errors += 1
+                print(f"Error serializing audit record for {symbol}: {e}")
+        if not rows:
+            return
+        try:
+            with conn:
+                conn.executemany(INSERT, rows)
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            # Any error is logged and the writer keeps going (if the thread
+            # died, every later record would pile up and be dropped); the
+            # batch is retried row by row so only the bad records are lost
+            print(f"Error writing audit batch of {len(rows)} records: {e}")
+            for row in rows:
+                try:
+                    with conn:
+                        conn.execute(INSERT, row)
+                    self.written += 1
+                except Exception:
+                    self.errors += 1
+            self.batches += 1
+
+    def _run(self):
+        """Background loop: wait for records, write them in batches"""
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(conn, self._drain(first))
+        conn.close()
+
+    def close(self, timeout=5.0):
+        """Flush everything still queued and stop the writer thread"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Counters for health checks and capacity planning"""
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    return pick(0.5), pick(0.99), pick(0.999)
+
+
+def benchmark(n_requests=20000, path='audit_benchmark.db'):
+    """Measure the per-request cost of logging synchronously vs. write-behind"""
+    import os
+
+    record = (
+        'SPX',
+        'benchmark',
+        {'open': 4500.0, 'high': 4520.0, 'low': 4480.0},
+        {f'feature_{i}': float(i) for i in range(16)},
+        4510.25,
+    )
+
+    print("🧪 Audit log benchmark")
+    print("=" * 40)
+
+    # Baseline: synchronous insert + commit per request
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    sync_times = []
+    for _ in range(min(n_requests, 2000)):
+        start = time.perf_counter()
+        symbol, version, input_data, features, output = record
+        with conn:
+            conn.execute(
+                'INSERT INTO predictions (ts, symbol, model_version, input, features, output) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (time.time(), symbol, version, json.dumps(input_data), json.dumps(features), output),
+            )
+        sync_times.append(time.perf_counter() - start)
+    conn.close()
+    os.remove(path)
+
+    # Write-behind
+    logger = AuditLogger(path, max_queue=n_requests)
+    async_times = []
+    start_all = time.perf_counter()
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        logger.log(*record)
+        async_times.append(time.perf_counter() - start)
+    enqueue_elapsed = time.perf_counter() - start_all
+    logger.close(timeout=60)
+    total_elapsed = time.perf_counter() - start_all
+    stats = logger.stats()
+    os.remove(path)
+
+    p50, p99, p999 = _percentiles(sync_times)
+    print(f"   • Synchronous:  p50 {p50:8.1f}µs  p99 {p99:8.1f}µs  p99.9 {p999:8.1f}µs")
+    p50, p99, p999 = _percentiles(async_times)
+    print(f"   • Write-behind: p50 {p50:8.1f}µs  p99 {p99:8.1f}µs  p99.9 {p999:8.1f}µs")
+    print(f"   • Enqueue throughput: {n_requests / enqueue_elapsed:,.0f} records/s")
+    print(f"   • End-to-end throughput: {stats['written'] / total_elapsed:,.0f} records/s "
+          f"in {stats['batches']} batches, {stats['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped columnar store of daily bars
+
+History is ingested from CSV once and kept as one raw binary file per column
+and symbol:
+
+    <root>/<SYMBOL>/date.i64      days since 1970-01-01, strictly increasing
+    <root>/<SYMBOL>/open.f64      float64, one value per bar
+    <root>/<SYMBOL>/high.f64      ...
+    <root>/<SYMBOL>/low.f64
+    <root>/<SYMBOL>/close.f64
+    <root>/<SYMBOL>/volume.f64    NaN when the source has no volume
+    <root>/<SYMBOL>/meta.json     committed row count
+
+Reads map the files with np.memmap and binary-search the date column, so a
+date-range slice is O(log n) and returns zero-copy views no matter how many
+years are stored. Updates only ever append: column bytes are written and
+fsynced first and the row count in meta.json is replaced last, so a crash
+mid-append leaves the store at its previous length.
+
+    python bar_store.py ingest bars/ history.csv --symbol SPX
+    python bar_store.py info bars/
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+DATE_FILE = 'date.i64'
+
+
+def _to_days(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def date_range(dates, start=None, end=None):
+    """(lo, hi) slice bounds of start <= date <= end in a sorted date array"""
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left'))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right'))
+    return lo, hi
+
+
+class BarStore:
+    """Append-only daily bars per symbol, read through memory maps"""
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol)
+
+    def symbols(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, 'meta.json'))
+        )
+
+    def rows(self, symbol):
+        """Committed number of bars for a symbol (0 if unknown)"""
+        try:
+            with open(os.path.join(self._dir(symbol), 'meta.json'), 'r') as f:
+                return json.load(f)['rows']
+        except FileNotFoundError:
+            return 0
+
+    def _commit(self, symbol, rows):
+        path = os.path.join(self._dir(symbol), 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'rows': rows, 'columns': list(COLUMNS)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _columns(self, symbol):
+        """{column: memmap} over the committed rows, cached until the next append"""
+        rows = self.rows(symbol)
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        if rows == 0:
+            columns = {'date': np.empty(0, dtype='datetime64[D]')}
+            columns.update({name: np.empty(0) for name in COLUMNS})
+        else:
+            directory = self._dir(symbol)
+            columns = {'date': np.memmap(os.path.join(directory, DATE_FILE), dtype=np.int64,
+                                         mode='r', shape=(rows,)).view('datetime64[D]')}
+            for name in COLUMNS:
+                columns[name] = np.memmap(os.path.join(directory, f'{name}.f64'), dtype=np.float64,
+                                          mode='r', shape=(rows,))
+        self._maps[symbol] = (rows, columns)
+        return columns
+
+    def last_date(self, symbol):
+        dates = self._columns(symbol)['date']
+        return dates[-1] if len(dates) else None
+
+    def bars(self, symbol, start=None, end=None):
+        """
+        {'date', 'open', 'high', 'low', 'close', 'volume'} views for
+        start <= date <= end (either bound optional), located by binary search.
+        """
+        columns = self._columns(symbol)
+        lo, hi = date_range(columns['date'], start, end)
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def history(self, symbol, start=None, end=None):
+        """(dates, highs, lows, closes), the same tuple read_history_csv returns"""
+        bars = self.bars(symbol, start, end)
+        return bars['date'], bars['high'], bars['low'], bars['close']
+
+    def append(self, symbol, dates, closes, opens=None, highs=None, lows=None, volumes=None):
+        """
+        Append bars newer than the last stored date; older or duplicate dates
+        are skipped so re-ingesting an updated export is safe. Returns the
+        number of bars added.
+        """
+        days = _to_days(dates)
+        n = len(days)
+        closes = np.asarray(closes, dtype=np.float64)
+        values = {
+            'close': closes,
+            'open': closes if opens is None else np.asarray(opens, dtype=np.float64),
+            'high': closes if highs is None else np.asarray(highs, dtype=np.float64),
+            'low': closes if lows is None else np.asarray(lows, dtype=np.float64),
+            'volume': np.full(n, np.nan) if volumes is None else np.asarray(volumes, dtype=np.float64),
+        }
+        if n > 1 and np.any(np.diff(days) <= 0):
+            raise ValueError('Bars must be in strictly increasing date order')
+
+        last = self.last_date(symbol)
+        start = 0 if last is None else int(np.searchsorted(days, last.astype(np.int64), side='right'))
+        if start == n:
+            return 0
+
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        rows = self.rows(symbol)
+        files = [(DATE_FILE, days, np.int64)] + [(f'{name}.f64', values[name], np.float64) for name in COLUMNS]
+        for filename, column, dtype in files:
+            with open(os.path.join(directory, filename), 'ab') as f:
+                # Drop bytes from an append that crashed before it was committed
+                f.truncate(rows * 8)
+                f.write(np.ascontiguousarray(column[start:], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._commit(symbol, rows + n - start)
+        return n - start
+
+    def ingest_csv(self, path, symbol='SPX', chunk_rows=None):
+        """
+        Append every bar of a daily OHLC(V) CSV that is newer than the store.
+        With chunk_rows the file is streamed that many rows at a time, so
+        memory stays bounded; the CSV must then already be in date order.
+        """
+        import pandas as pd
+
+        if chunk_rows is None:
+            return self._append_frame(symbol, self._normalize(pd.read_csv(path)))
+
+        added, previous = 0, None
+        for df in pd.read_csv(path, chunksize=chunk_rows):
+            df = self._normalize(df)
+            if previous is not None and df['date'].iloc[0] <= previous:
+                raise ValueError(f'{path} is not in date order; sort it, or ingest it with python bar_store.py ingest')
+            previous = df['date'].iloc[-1]
+            added += self._append_frame(symbol, df)
+        return added
+
+    @staticmethod
+    def _normalize(df):
+        """Lower-case columns, parsed dates, sorted and de-duplicated by date"""
+        import pandas as pd
+
+        df.columns = [c.strip().lower() for c in df.columns]
+        df['date'] = pd.to_datetime(df['date'])
+        return df.sort_values('date').drop_duplicates('date', keep='last')
+
+    def _append_frame(self, symbol, df):
+        close_column = 'close' if 'close' in df.columns else 'adj close'
+        return self.append(
+            symbol,
+            df['date'].to_numpy().astype('datetime64[D]'),
+            df[close_column].to_numpy(dtype=np.float64),
+            opens=df['open'].to_numpy(dtype=np.float64) if 'open' in df.columns else None,
+            highs=df['high'].to_numpy(dtype=np.float64),
+            lows=df['low'].to_numpy(dtype=np.float64),
+            volumes=df['volume'].to_numpy(dtype=np.float64) if 'volume' in df.columns else None,
+        )
+
+
+def load_history(source, symbol='SPX', start=None, end=None):
+    """(dates, highs, lows, closes) from a bar store directory or a CSV file"""
+    if os.path.isdir(source):
+        return BarStore(source).history(symbol, start, end)
+    from indicators import read_history_csv
+
+    dates, highs, lows, closes = read_history_csv(source)
+    lo, hi = date_range(dates, start, end)
+    return dates[lo:hi], highs[lo:hi], lows[lo:hi], closes[lo:hi]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory-mapped daily bar store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='Append a CSV export to the store')
+    ingest.add_argument('root')
+    ingest.add_argument('csv')
+    ingest.add_argument('--symbol', default='SPX')
+    info = commands.add_parser('info', help='Summarize the store')
+    info.add_argument('root')
+    args = parser.parse_args()
+
+    store = BarStore(args.root)
+    if args.command == 'ingest':
+        added = store.ingest_csv(args.csv, args.symbol)
+        print(f"✅ Added {added:,} bars to {args.symbol} ({store.rows(args.symbol):,} total)")
+    else:
+        print(f"📚 Bar store {args.root}")
+        for symbol in store.symbols():
+            dates = store.bars(symbol)['date']
+            print(f"   • {symbol}: {len(dates):,} bars, {dates[0]} → {dates[-1]}")
+
+
+if __name__ == "__main__":
+    main()
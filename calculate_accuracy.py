@@ -1,30 +1,72 @@
 #!/usr/bin/env python3
 """
 Script to calculate real accuracy metrics for the SP500 prediction model
+
+Scores the model on a real daily history when one is given, or on a seeded
+synthetic test set otherwise:
+
+    python calculate_accuracy.py history.csv --start 2020-01-01
+    python calculate_accuracy.py bars/ --symbol SPX
 """
 
+import argparse
+import sys
 import joblib
 import pickle
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from eval_cache import BuildCache, hash_arrays, hash_code, hash_file, write_if_changed
+from bar_store import load_history
+from indicators import feature_table
 import warnings
 warnings.filterwarnings('ignore')
 
+MODEL_PATH = 'linear_regression_model.pkl'
+
+# Everything the report depends on besides the model and the data; seeded so
+# reruns see the same test set and can be served from the cache
+EVAL_CONFIG = {
+    'n_samples': 200,
+    'seed': 42,
+    'near_points': 50,
+    'far_points': 100,
+}
+
+# metric: (config keys it reads, fn(actual, predicted, config)). Each metric is
+# cached on its own under its config values and its source, so changing one
+# threshold or one formula only recomputes that metric.
+METRICS = {
+    'r2_score': ((), lambda a, p, c: round(float(r2_score(a, p)), 3)),
+    'mae': ((), lambda a, p, c: round(float(mean_absolute_error(a, p)), 2)),
+    'rmse': ((), lambda a, p, c: round(float(np.sqrt(mean_squared_error(a, p))), 2)),
+    'mape': ((), lambda a, p, c: round(float(np.mean(np.abs((a - p) / a)) * 100), 2)),
+    'accuracy_percentage': (('near_points',), lambda a, p, c: round(float(np.mean(np.abs(a - p) <= c['near_points']) * 100), 1)),
+    'within_100_points': (('far_points',), lambda a, p, c: round(float(np.mean(np.abs(a - p) <= c['far_points']) * 100), 1)),
+}
+
+# Model input columns, in training order
+FEATURE_COLUMNS = [
+    'SMA_5_t-1', 'SMA_10_t-1', 'Price_Change_t-1', 'SMA_20_t-1', 'EMA_20_t-1',
+    'MACD_t-1', 'MACD_signal_t-1', 'MACD_diff_t-1', 'RSI_t-1', 'ATR_t-1',
+    'year', 'month', 'day', 'day_of_week', 'is_month_end', 'is_month_start',
+]
+
 def load_model():
     """Load the trained model"""
     try:
-        model = joblib.load('linear_regression_model.pkl')
+        model = joblib.load(MODEL_PATH)
         print("✅ Model loaded successfully")
         return model
     except Exception as e:
         print(f"❌ Error loading model: {e}")
         return None
 
-def generate_test_data(n_samples=100):
-    """Generate synthetic test data for accuracy calculation"""
+def generate_test_data(n_samples=100, seed=None):
+    """Generate synthetic test data for accuracy calculation (reproducible when seeded)"""
     print(f"Generating {n_samples} test samples...")
+    rng = np.random.RandomState(seed)
     
     # Generate realistic SP500 price ranges
     base_price = 4500
@@ -34,9 +76,9 @@ def generate_test_data(n_samples=100):
     
     for i in range(n_samples):
         # Generate realistic price variations
-        open_price = base_price + np.random.normal(0, 50)
-        high_price = open_price + np.random.uniform(10, 80)
-        low_price = open_price - np.random.uniform(10, 60)
+        open_price = base_price + rng.normal(0, 50)
+        high_price = open_price + rng.uniform(10, 80)
+        low_price = open_price - rng.uniform(10, 60)
         
         # Ensure logical price relationships
         if low_price > high_price:
@@ -48,52 +90,69 @@ def generate_test_data(n_samples=100):
         price_range = high_price - low_price
         
         features = {
-            'SMA_5_t-1': current_price * (0.99 + np.random.normal(0, 0.01)),
-            'SMA_10_t-1': current_price * (0.98 + np.random.normal(0, 0.01)),
+            'SMA_5_t-1': current_price * (0.99 + rng.normal(0, 0.01)),
+            'SMA_10_t-1': current_price * (0.98 + rng.normal(0, 0.01)),
             'Price_Change_t-1': price_change,
-            'SMA_20_t-1': current_price * (0.97 + np.random.normal(0, 0.01)),
-            'EMA_20_t-1': current_price * (0.975 + np.random.normal(0, 0.01)),
-            'MACD_t-1': np.random.normal(0.5, 0.2),
-            'MACD_signal_t-1': np.random.normal(0.4, 0.2),
-            'MACD_diff_t-1': np.random.normal(0.1, 0.1),
-            'RSI_t-1': np.random.uniform(30, 70),
-            'ATR_t-1': price_range * (0.1 + np.random.normal(0, 0.02)),
+            'SMA_20_t-1': current_price * (0.97 + rng.normal(0, 0.01)),
+            'EMA_20_t-1': current_price * (0.975 + rng.normal(0, 0.01)),
+            'MACD_t-1': rng.normal(0.5, 0.2),
+            'MACD_signal_t-1': rng.normal(0.4, 0.2),
+            'MACD_diff_t-1': rng.normal(0.1, 0.1),
+            'RSI_t-1': rng.uniform(30, 70),
+            'ATR_t-1': price_range * (0.1 + rng.normal(0, 0.02)),
             'year': datetime.now().year,
-            'month': np.random.randint(1, 13),
-            'day': np.random.randint(1, 29),
-            'day_of_week': np.random.randint(0, 7),
-            'is_month_end': np.random.choice([0, 1]),
-            'is_month_start': np.random.choice([0, 1])
+            'month': rng.randint(1, 13),
+            'day': rng.randint(1, 29),
+            'day_of_week': rng.randint(0, 7),
+            'is_month_end': rng.choice([0, 1]),
+            'is_month_start': rng.choice([0, 1])
         }
         
         test_data.append(features)
         
         # Generate actual next day close (with some realistic variation)
-        actual_close = current_price + np.random.normal(0, 30)
+        actual_close = current_price + rng.normal(0, 30)
         actual_prices.append(actual_close)
     
     return pd.DataFrame(test_data), actual_prices
 
-def calculate_accuracy_metrics(model, test_df, actual_prices):
-    """Calculate comprehensive accuracy metrics"""
+def history_test_data(source, symbol='SPX', start=None, end=None):
+    """Model features and realized next-day closes from a CSV or bar store"""
+    print(f"Loading {symbol} history from {source}...")
+    table = feature_table(*load_history(source, symbol, start, end))
+    return table[FEATURE_COLUMNS].reset_index(drop=True), table['target'].tolist()
+
+def calculate_accuracy_metrics(model, test_df, actual_prices, cache=None, model_hash=None, config=EVAL_CONFIG):
+    """
+    Calculate comprehensive accuracy metrics. With a cache and the model's
+    file hash, predictions and each metric are reused while their inputs
+    are unchanged; model may then be a callable that loads it on demand.
+    Without a model hash nothing identifies the predictions, so nothing is
+    cached.
+    """
     print("Calculating accuracy metrics...")
+    if cache is None or model_hash is None:
+        cache = BuildCache(enabled=False)
     
     try:
         # Make predictions
-        predicted_prices = model.predict(test_df)
-        
-        # Calculate metrics
-        r2 = r2_score(actual_prices, predicted_prices)
-        mae = mean_absolute_error(actual_prices, predicted_prices)
-        rmse = np.sqrt(mean_squared_error(actual_prices, predicted_prices))
+        data_hash = hash_arrays(test_df)
+        predicted_prices = cache.memo_array(
+            'predictions', {'model': model_hash, 'data': data_hash},
+            lambda: (model() if callable(model) else model).predict(test_df),
+        )
+        actual = np.asarray(actual_prices, dtype=np.float64)
+        predicted = np.asarray(predicted_prices, dtype=np.float64)
+        scored = {'model': model_hash, 'data': data_hash, 'actual': hash_arrays(actual)}
         
-        # Calculate MAPE (Mean Absolute Percentage Error)
-        mape = np.mean(np.abs((np.array(actual_prices) - np.array(predicted_prices)) / np.array(actual_prices))) * 100
-        
-        # Calculate overall accuracy percentage (based on predictions within certain error margin)
-        error_margins = np.abs(np.array(actual_prices) - np.array(predicted_prices))
-        within_50_points = np.sum(error_margins <= 50) / len(error_margins) * 100
-        within_100_points = np.sum(error_margins <= 100) / len(error_margins) * 100
+        # Calculate each metric from only the inputs it depends on
+        accuracy_metrics = {}
+        for name, (keys, metric) in METRICS.items():
+            accuracy_metrics[name] = cache.memo(
+                name, dict(scored, config={key: config[key] for key in keys}, code=hash_code(metric)),
+                lambda: metric(actual, predicted, config),
+            )
+        r2, mape = accuracy_metrics['r2_score'], accuracy_metrics['mape']
         
         # Determine confidence level
         if r2 > 0.8 and mape < 1.5:
@@ -103,16 +162,8 @@ def calculate_accuracy_metrics(model, test_df, actual_prices):
         else:
             confidence_level = "Low"
         
-        accuracy_metrics = {
-            'r2_score': round(r2, 3),
-            'mae': round(mae, 2),
-            'rmse': round(rmse, 2),
-            'mape': round(mape, 2),
-            'accuracy_percentage': round(within_50_points, 1),
-            'within_100_points': round(within_100_points, 1),
-            'confidence_level': confidence_level,
-            'test_samples': len(actual_prices)
-        }
+        accuracy_metrics['confidence_level'] = confidence_level
+        accuracy_metrics['test_samples'] = len(actual_prices)
         
         return accuracy_metrics, predicted_prices
         
@@ -157,31 +208,70 @@ def display_accuracy_report(metrics, actual_prices, predicted_prices):
     save_metrics_to_file(metrics)
 
 def save_metrics_to_file(metrics):
-    """Save calculated metrics to a file for the app to use"""
+    """Save calculated metrics to a file for the app to use (untouched if unchanged)"""
     try:
-        import json
-        with open('model_accuracy.json', 'w') as f:
-            json.dump(metrics, f, indent=2)
+        if not write_if_changed('model_accuracy.json', metrics):
+            print(f"\n💾 'model_accuracy.json' is already up to date")
+            return
         print(f"\n💾 Accuracy metrics saved to 'model_accuracy.json'")
         print("   The web app will now use these real metrics!")
     except Exception as e:
         print(f"❌ Error saving metrics: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Calculate accuracy metrics for the SP500 model')
+    parser.add_argument('history', nargs='?', help='Daily OHLC CSV or bar store directory (default: synthetic test set)')
+    parser.add_argument('--symbol', default='SPX', help='Bar store symbol')
+    parser.add_argument('--start', help='First date to use (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date to use (YYYY-MM-DD)')
+    parser.add_argument('--force', action='store_true', help='Recompute without reading or writing the cache')
+    parser.add_argument('--refresh', action='store_true', help='Recompute everything and overwrite the cached results')
+    args = parser.parse_args()
+    
     print("🧪 SP500 Model Accuracy Calculator")
     print("="*40)
     
-    # Load model
-    model = load_model()
-    if model is None:
-        print("❌ Cannot proceed without model")
+    # --force bypasses the cache entirely; --refresh recomputes and rewrites it
+    cache = BuildCache(enabled=not args.force, refresh=args.refresh)
+    try:
+        model_hash = hash_file(MODEL_PATH)
+    except OSError as e:
+        print(f"❌ Cannot proceed without model: {e}")
+        return
+    
+    # Realized closes from a history when given, synthetic ones otherwise
+    if args.history:
+        try:
+            test_df, actual_prices = history_test_data(args.history, args.symbol, args.start, args.end)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"❌ Could not load history: {e}")
+            return
+        if not actual_prices:
+            print("❌ Not enough history to evaluate")
+            return
+    else:
+        test_df, actual_prices = generate_test_data(n_samples=EVAL_CONFIG['n_samples'], seed=EVAL_CONFIG['seed'])
+    
+    report_key = cache.key('accuracy_report', model=model_hash, data=hash_arrays(test_df, actual_prices),
+                           config=EVAL_CONFIG, code=hash_code(sys.modules[__name__]))
+    report = cache.get_json(report_key)
+    if report is not None:
+        print("♻️  Model, test data and configuration unchanged: using the cached report")
+        display_accuracy_report(report['metrics'], actual_prices, report['sample_predictions'])
         return
     
-    # Generate test data
-    test_df, actual_prices = generate_test_data(n_samples=200)
+    # The model is only loaded if its predictions aren't cached
+    loaded = {}
+    def model():
+        if 'model' not in loaded:
+            loaded['model'] = load_model()
+        return loaded['model']
     
     # Calculate metrics
-    metrics, predicted_prices = calculate_accuracy_metrics(model, test_df, actual_prices)
+    metrics, predicted_prices = calculate_accuracy_metrics(model, test_df, actual_prices, cache, model_hash, EVAL_CONFIG)
+    if metrics is not None:
+        cache.put_json(report_key, {'metrics': metrics, 'sample_predictions': [float(p) for p in predicted_prices[:5]]})
+        print(f"   • Cache: {cache.summary()}")
     
     # Display report
     display_accuracy_report(metrics, actual_prices, predicted_prices)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Crash-safe snapshots of incremental serving state
+
+The live feed's per-symbol indicator state and the rolling accuracy
+accumulators only exist in memory. A Checkpointer writes them to one compact
+binary file every few seconds so a restart resumes from the snapshot and only
+replays bars that arrived after it.
+
+File layout:
+    [0, 8)      magic b'SPXCKPT\\0'
+    [8, 16)     uint64 little-endian length of the JSON header
+    header      JSON: format, model version, per-section metadata and the
+                dtype/shape/offset of every array
+    arrays      raw array bytes, each aligned to 64 bytes
+
+Snapshots are written to a per-process temporary file, fsynced and moved
+into place with os.replace, so a crash leaves either the old or the new
+snapshot, never a torn one. Processes sharing a path (several server
+workers) take an flock on <path>.lock around the write, so one worker's
+snapshot is never published while another is writing. Loading maps the file copy-on-write: nothing is parsed or copied
+up front, and the restored arrays can be updated in place.
+"""
+
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import nullcontext
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the per-process temp file still avoids torn writes
+    fcntl = None
+
+MAGIC = b'SPXCKPT\0'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save_checkpoint(path, model_version, sections):
+    """
+    Atomically write {section: (metadata, {name: array})} to path.
+    Returns the size of the file in bytes.
+    """
+    entries = []
+    blobs = []
+    offset = 0
+    for section, (_, arrays) in sections.items():
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            entries.append({
+                'section': section,
+                'name': name,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': offset,
+            })
+            blobs.append(array)
+            offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        'model_version': model_version,
+        'created_at': time.time(),
+        'sections': {section: meta for section, (meta, _) in sections.items()},
+        'arrays': entries,
+        'data_size': offset,
+    }).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(path + '.lock', 'a+') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            for entry, array in zip(entries, blobs):
+                f.seek(data_start + entry['offset'])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    try:
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+    except (OSError, AttributeError):
+        pass
+    return data_start + offset
+
+
+def load_checkpoint(path):
+    """(header, {section: {name: array}}) with arrays mapped copy-on-write"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a checkpoint file')
+        (header_size,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    if header.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {header.get('format')}")
+
+    data_start = _align(len(MAGIC) + 8 + header_size)
+    if os.path.getsize(path) < data_start + header['data_size']:
+        raise ValueError(f'{path} is truncated')
+
+    mm = np.memmap(path, dtype=np.uint8, mode='c') if header['data_size'] else None
+    arrays = {}
+    for entry in header['arrays']:
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        if int(np.prod(shape)) == 0:
+            array = np.empty(shape, dtype=dtype)
+        else:
+            array = np.ndarray(shape, dtype, mm, data_start + entry['offset'])
+        arrays.setdefault(entry['section'], {})[entry['name']] = array
+    return header, arrays
+
+
+class Checkpointer:
+    """
+    Periodically snapshots objects exposing checkpoint() -> (meta, arrays)
+    and restore(meta, arrays, same_model). Each source snapshots under its
+    own lock; pass the state_lock that writers hold while updating several
+    sources together and every section is taken at the same moment.
+    """
+
+    def __init__(self, path, model_version, sources, interval=60.0, state_lock=None):
+        self.path = path
+        self.model_version = model_version
+        self.sources = sources
+        self.state_lock = state_lock
+        self.interval = interval
+        self.saved = 0
+        self.last_saved = None
+        self.last_size = None
+        self.last_duration = None
+        self.last_error = None
+        self.restored = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def save(self):
+        start = time.perf_counter()
+        with self._lock:
+            with self.state_lock or nullcontext():
+                sections = {name: source.checkpoint() for name, source in self.sources.items()}
+            self.last_size = save_checkpoint(self.path, self.model_version, sections)
+        self.last_duration = time.perf_counter() - start
+        self.last_saved = time.time()
+        self.saved += 1
+
+    def restore(self):
+        """Load the latest snapshot into the sources; None when there is none"""
+        if not os.path.exists(self.path):
+            return None
+        start = time.perf_counter()
+        header, arrays = load_checkpoint(self.path)
+        same_model = header['model_version'] == self.model_version
+        restored = [
+            name for name, source in self.sources.items()
+            if name in header['sections']
+            and source.restore(header['sections'][name], arrays.get(name, {}), same_model)
+        ]
+        self.restored = {
+            'sections': restored,
+            'same_model': same_model,
+            'snapshot_age': round(time.time() - header['created_at'], 1),
+            'duration': round(time.perf_counter() - start, 4),
+        }
+        return self.restored
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error writing checkpoint: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='checkpointer', daemon=True)
+        self._thread.start()
+
+    def stop(self, final_save=True):
+        """Stop the background thread, writing one last snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        if final_save:
+            self.save()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'interval': self.interval,
+            'saved': self.saved,
+            'last_saved': self.last_saved,
+            'last_size': self.last_size,
+            'last_duration': round(self.last_duration, 4) if self.last_duration is not None else None,
+            'last_error': self.last_error,
+            'restored': self.restored,
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python checkpoint.py state.ckpt")
+        sys.exit(1)
+
+    header, arrays = load_checkpoint(sys.argv[1])
+    print(f"📦 Checkpoint {sys.argv[1]}")
+    print(f"   • Model version: {header['model_version']}")
+    print(f"   • Written: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created_at']))}")
+    for section, section_arrays in arrays.items():
+        size = sum(array.nbytes for array in section_arrays.values())
+        print(f"   • {section}: {len(section_arrays)} arrays, {size:,} bytes")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Conformal prediction intervals for the close prediction
+
+Calibration runs offline: the model predicts a held-out slice of history,
+with features from indicators.feature_table (the pipeline behind /bars and
+/forecast), and the absolute residuals' quantiles become the interval
+half-widths, one per coverage level (split conformal, with the usual
+finite-sample correction).
+The result is stored next to the model artifact, tagged with the model's
+content hash, so serving is a dictionary lookup and a stale calibration is
+detected as soon as the model changes.
+
+Calibrate (or recalibrate after updating the model):
+    python conformal.py history.csv      (or a bar_store.py directory)
+"""
+
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+DEFAULT_LEVELS = (0.8, 0.9, 0.95)
+
+
+def intervals_path(model_path):
+    """Sidecar file that travels with the model artifact"""
+    return os.path.splitext(model_path)[0] + '.intervals.json'
+
+
+def calibrate(predicted, actual, levels=DEFAULT_LEVELS):
+    """
+    Half-width per coverage level from held-out predictions. Refuses levels
+    the calibration set is too small to guarantee (n < level / (1 - level)).
+    """
+    residuals = np.sort(np.abs(np.asarray(actual, dtype=np.float64) - np.asarray(predicted, dtype=np.float64)))
+    n = len(residuals)
+
+    half_widths = {}
+    for level in levels:
+        # ceil((n + 1) * level)-th smallest residual guarantees >= level coverage
+        rank = math.ceil((n + 1) * level)
+        if rank > n:
+            raise ValueError(f'{level:.0%} coverage needs at least {math.ceil(level / (1 - level))} '
+                             f'held-out predictions, got {n}')
+        half_widths[f'{level:g}'] = float(residuals[rank - 1])
+    return half_widths
+
+
+def save_intervals(path, model_version, half_widths, n_calibration):
+    with open(path, 'w') as f:
+        json.dump({
+            'model_version': model_version,
+            'half_widths': half_widths,
+            'n_calibration': n_calibration,
+            'calibrated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, f, indent=2)
+
+
+def load_intervals(path, model_version):
+    """
+    Half-widths for this model version, or None if missing or stale. A
+    damaged file raises (ValueError or KeyError) rather than serving garbage.
+    """
+    try:
+        with open(path, 'r') as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return None
+    if stored.get('model_version') != model_version:
+        print(f"Prediction intervals in {path} were calibrated for model "
+              f"{stored.get('model_version')}, not {model_version}; recalibrate with conformal.py")
+        return None
+    return {str(level): float(width) for level, width in stored['half_widths'].items()}
+
+
+def calibrate_from_history(model, feature_names, dates, highs, lows, closes,
+                           holdout=0.2, levels=DEFAULT_LEVELS):
+    """Calibrate on the most recent `holdout` share of a daily history"""
+    from indicators import feature_table
+
+    table = feature_table(dates, highs, lows, closes)
+    start = int(len(table) * (1 - holdout))
+    held_out = table.iloc[start:]
+    X = held_out[feature_names].to_numpy(dtype=np.float64)
+    predicted = X @ np.asarray(model.coef_, dtype=np.float64) + model.intercept_
+    return calibrate(predicted, held_out['target'].to_numpy(), levels), len(held_out)
+
+
+def interval_bounds(prediction, half_widths, levels):
+    """{level: [low, high]} around one prediction or an array of them"""
+    return {
+        level: [prediction - half_widths[level], prediction + half_widths[level]]
+        for level in levels
+    }
+
+
+if __name__ == "__main__":
+    import joblib
+    import hashlib
+    from bar_store import load_history
+
+    if len(sys.argv) < 2:
+        print("Usage: python conformal.py history.csv|bar_store_dir [model.pkl]")
+        sys.exit(1)
+
+    model_path = sys.argv[2] if len(sys.argv) > 2 else 'linear_regression_model.pkl'
+    model = joblib.load(model_path)
+    with open(model_path, 'rb') as f:
+        model_version = hashlib.sha256(f.read()).hexdigest()[:12]
+
+    half_widths, n = calibrate_from_history(
+        model, list(model.feature_names_in_), *load_history(sys.argv[1])
+    )
+    output = intervals_path(model_path)
+    save_intervals(output, model_version, half_widths, n)
+
+    print(f"📏 Calibrated on {n} held-out days:")
+    for level, width in half_widths.items():
+        print(f"   • {float(level):.0%} interval: ±{width:.2f} points")
+    print(f"\n💾 Saved to '{output}'")
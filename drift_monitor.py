@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Streaming feature-drift monitoring for the serving process
+
+A reference profile is built offline from the training data: for every
+feature, its range, a set of quantile cut points and the share of training
+rows in each resulting bin. While serving, each request's values are dropped
+into the same bins (exponentially decayed counts) and into a ring buffer of
+the most recent observations used for live quantiles, so both summaries
+follow recent traffic however long the process has been up. Memory is
+constant per feature and an update is a couple of small vector operations.
+
+Drift is reported per feature as the Population Stability Index (PSI)
+between live and reference bin shares, the share of live values outside the
+training range, and the shift of the live median in reference IQR units.
+
+Build a reference from a CSV whose columns are the monitored features:
+    python drift_monitor.py training_features.csv drift_reference.json
+"""
+
+import json
+import sys
+import threading
+import numpy as np
+
+# Common PSI rule of thumb
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+EPSILON = 1e-6
+
+
+def _cut_points(values, n_bins):
+    """Interior bin boundaries for one feature"""
+    unique = np.unique(values)
+    if len(unique) <= n_bins:
+        # Discrete feature: one bin per value
+        return (unique[:-1] + unique[1:]) / 2
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return np.unique(quantiles)
+
+
+def _assign_bins(values, cuts, lo, hi):
+    """
+    Bin index for each value (vectorized over features).
+
+    Bin 0 is below the training minimum, bin n_cuts + 2 is above the
+    training maximum and the bins in between follow the cut points.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    inside = 1 + (values[..., None] >= cuts).sum(axis=-1)
+    top = cuts.shape[-1] + 2
+    return np.where(values < lo, 0, np.where(values > hi, top, inside))
+
+
+def build_reference(df, n_bins=10):
+    """Build a reference profile from training-time feature rows"""
+    features = [c for c in df.columns if np.issubdtype(df[c].dtype, np.number)]
+    data = df[features].to_numpy(dtype=np.float64)
+
+    cuts = [_cut_points(data[:, j], n_bins) for j in range(len(features))]
+    width = max(len(c) for c in cuts)
+    padded = np.full((len(features), width), np.inf)
+    for j, c in enumerate(cuts):
+        padded[j, :len(c)] = c
+    lo = data.min(axis=0)
+    hi = data.max(axis=0)
+
+    n_bins_total = width + 3
+    bins = _assign_bins(data, padded, lo, hi)
+    proportions = np.zeros((len(features), n_bins_total))
+    for j in range(len(features)):
+        proportions[j] = np.bincount(bins[:, j], minlength=n_bins_total) / len(data)
+
+    q = np.quantile(data, [0.25, 0.5, 0.75], axis=0)
+    return {
+        'features': features,
+        'cuts': padded.tolist(),
+        'lo': lo.tolist(),
+        'hi': hi.tolist(),
+        'proportions': proportions.tolist(),
+        'q25': q[0].tolist(),
+        'median': q[1].tolist(),
+        'q75': q[2].tolist(),
+        'n_rows': len(data),
+    }
+
+
+def save_reference(reference, path):
+    # json can't encode inf; the padding is written as null
+    cuts = [[c if np.isfinite(c) else None for c in row] for row in reference['cuts']]
+    with open(path, 'w') as f:
+        json.dump({**reference, 'cuts': cuts}, f, indent=2)
+
+
+def load_reference(path):
+    with open(path, 'r') as f:
+        reference = json.load(f)
+    reference['cuts'] = [[np.inf if c is None else c for c in row] for row in reference['cuts']]
+    return reference
+
+
+class DriftMonitor:
+    """Constant-memory live summaries compared against a training reference"""
+
+    def __init__(self, reference, decay=0.999, window=1024, features=None):
+        """
+        features limits monitoring to the reference features the caller
+        actually supplies (a reference built from a feature table may also
+        profile columns such as 'close' or 'target').
+        """
+        keep = [j for j, name in enumerate(reference['features']) if features is None or name in features]
+        if not keep:
+            raise ValueError('The drift reference has none of the monitored features')
+        self.features = [reference['features'][j] for j in keep]
+        self.cuts = np.asarray(reference['cuts'], dtype=np.float64)[keep]
+        self.lo = np.asarray(reference['lo'], dtype=np.float64)[keep]
+        self.hi = np.asarray(reference['hi'], dtype=np.float64)[keep]
+        self.ref_proportions = np.asarray(reference['proportions'], dtype=np.float64)[keep]
+        self.ref_median = np.asarray(reference['median'], dtype=np.float64)[keep]
+        self.ref_iqr = np.asarray(reference['q75'], dtype=np.float64)[keep] - np.asarray(reference['q25'], dtype=np.float64)[keep]
+
+        n_features = len(self.features)
+        self.decay = decay
+        self._rows = np.arange(n_features)
+        self._counts = np.zeros_like(self.ref_proportions)
+        # Decay is applied lazily: new observations get a growing weight and
+        # the counts are rescaled only when that weight gets large
+        self._weight = 1.0
+        self._recent = np.empty((window, n_features))
+        self.n_seen = 0
+        self._lock = threading.Lock()
+
+    def update(self, values):
+        """Add one observation, given as a dict keyed by feature name"""
+        vector = np.fromiter((values[name] for name in self.features), dtype=np.float64,
+                             count=len(self.features))
+        bins = _assign_bins(vector, self.cuts, self.lo, self.hi)
+
+        with self._lock:
+            self._counts[self._rows, bins] += self._weight
+            self._weight /= self.decay
+            if self._weight > 1e100:
+                self._counts /= self._weight
+                self._weight = 1.0
+
+            # Ring buffer of the latest observations
+            self._recent[self.n_seen % len(self._recent)] = vector
+            self.n_seen += 1
+
+    def scores(self):
+        """Per-feature drift scores against the reference"""
+        with self._lock:
+            if self.n_seen == 0:
+                return {'observations': 0, 'features': {}}
+            counts = self._counts.copy()
+            sample = self._recent[:min(self.n_seen, len(self._recent))].copy()
+            n_seen = self.n_seen
+
+        live = counts / counts.sum(axis=1, keepdims=True)
+        expected = np.clip(self.ref_proportions, EPSILON, None)
+        actual = np.clip(live, EPSILON, None)
+        psi = ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+        out_of_range = live[:, 0] + live[:, -1]
+
+        live_median = np.median(sample, axis=0)
+        live_q = np.quantile(sample, [0.05, 0.95], axis=0)
+        iqr = np.where(self.ref_iqr > 0, self.ref_iqr, 1.0)
+        median_shift = (live_median - self.ref_median) / iqr
+
+        report = {}
+        for j, name in enumerate(self.features):
+            if psi[j] >= PSI_SIGNIFICANT:
+                status = 'significant'
+            elif psi[j] >= PSI_MODERATE:
+                status = 'moderate'
+            else:
+                status = 'stable'
+            report[name] = {
+                'psi': round(float(psi[j]), 4),
+                'out_of_range': round(float(out_of_range[j]), 4),
+                'median_shift_iqr': round(float(median_shift[j]), 3),
+                'live_p05': float(live_q[0, j]),
+                'live_median': float(live_median[j]),
+                'live_p95': float(live_q[1, j]),
+                'status': status,
+            }
+        return {
+            'observations': n_seen,
+            'max_psi': round(float(psi.max()), 4),
+            'drifting': [name for name in self.features if report[name]['status'] != 'stable'],
+            'features': report,
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    if len(sys.argv) < 2:
+        print("Usage: python drift_monitor.py training_features.csv [drift_reference.json]")
+        sys.exit(1)
+
+    output = sys.argv[2] if len(sys.argv) > 2 else 'drift_reference.json'
+    reference = build_reference(pd.read_csv(sys.argv[1]))
+    save_reference(reference, output)
+    print(f"💾 Drift reference for {len(reference['features'])} features "
+          f"({reference['n_rows']} rows) saved to '{output}'")
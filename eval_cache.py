@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Content-addressed build cache for evaluation artifacts
+
+Every cached artifact is stored under the SHA-256 of its name and of the
+hashes of exactly the inputs it depends on (model file, data, the config
+values it reads, and the source of the code that computes it). Rerunning an evaluation with nothing changed is a cache
+hit for the final report; changing one input only misses for the artifacts
+that actually depend on it, so everything else is reused.
+
+    .eval_cache/ab/ab12...ef.json   JSON values (metrics, reports)
+    .eval_cache/cd/cd34...01.npy    arrays (predictions, residuals)
+
+A disabled cache neither reads nor writes; a refreshing one recomputes
+everything and overwrites what it finds. Set EVAL_CACHE_DIR to move the
+cache; delete the directory to clear it.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import numpy as np
+
+CACHE_DIR = os.environ.get('EVAL_CACHE_DIR', '.eval_cache')
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_path(path):
+    """Hash of a file, or of every file under a directory (e.g. a bar store)"""
+    if not os.path.isdir(path):
+        return hash_file(path)
+    digest = hashlib.sha256()
+    for directory, subdirs, files in sorted(os.walk(path)):
+        subdirs.sort()
+        for name in sorted(files):
+            full = os.path.join(directory, name)
+            digest.update(os.path.relpath(full, path).encode('utf-8'))
+            digest.update(hash_file(full).encode('ascii'))
+    return digest.hexdigest()
+
+
+def hash_arrays(*values):
+    """Hash of arrays, lists and DataFrames by content (dtype, shape, column names, bytes)"""
+    digest = hashlib.sha256()
+    for value in values:
+        if hasattr(value, 'columns'):
+            digest.update(json.dumps([str(c) for c in value.columns]).encode('utf-8'))
+            value = value.to_numpy()
+        array = np.ascontiguousarray(np.asarray(value))
+        digest.update(f'{array.dtype.str}{array.shape}'.encode('utf-8'))
+        digest.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def hash_code(*objects):
+    """Hash of the source of functions, lambdas or modules that produce an artifact"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_if_changed(path, value):
+    """Write value as JSON unless the file already holds exactly that; True if written"""
+    text = json.dumps(value, indent=2)
+    try:
+        with open(path, 'r') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+class BuildCache:
+    """Artifacts keyed by the hashes of their inputs"""
+
+    def __init__(self, root=CACHE_DIR, enabled=True, refresh=False):
+        self.root = root
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = []
+        self.misses = []
+
+    @staticmethod
+    def key(name, **inputs):
+        """Cache key for an artifact: its name plus everything it depends on"""
+        payload = json.dumps({'name': name, 'inputs': inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.root, key[:2], key + extension)
+
+    def _atomic_write(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def get_json(self, key, default=None):
+        if not self.enabled or self.refresh:
+            return default
+        try:
+            with open(self._path(key, '.json'), 'r') as f:
+                return json.load(f)['value']
+        except (FileNotFoundError, ValueError, KeyError):
+            return default
+
+    def put_json(self, key, value):
+        if not self.enabled:
+            return
+        self._atomic_write(self._path(key, '.json'),
+                           lambda f: f.write(json.dumps({'value': value}).encode('utf-8')))
+
+    def memo(self, name, inputs, compute):
+        """JSON value of compute(), reused while name and inputs are unchanged"""
+        key = self.key(name, **inputs)
+        missing = object()
+        value = self.get_json(key, missing)
+        if value is not missing:
+            self.hits.append(name)
+            return value
+        value = compute()
+        self.put_json(key, value)
+        self.misses.append(name)
+        return value
+
+    def memo_array(self, name, inputs, compute):
+        """Array result of compute(), stored as .npy and memory-mapped on reuse"""
+        key = self.key(name, **inputs)
+        path = self._path(key, '.npy')
+        if self.enabled and not self.refresh and os.path.exists(path):
+            self.hits.append(name)
+            return np.load(path, mmap_mode='r')
+        value = np.asarray(compute())
+        if self.enabled:
+            self._atomic_write(path, lambda f: np.save(f, value))
+        self.misses.append(name)
+        return value
+
+    def summary(self):
+        return f"{len(self.hits)} reused, {len(self.misses)} recomputed" + (
+            f" ({', '.join(self.misses)})" if self.misses else '')
@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 """
 Script to explain why the SP500 model produces high predictions
+
+With a daily history the most recent prediction is explained from its real
+indicator values; without one, from the example inputs below:
+
+    python explain_prediction.py history.csv
+    python explain_prediction.py bars/ NDX
 """
 
+import sys
 import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
 
-def explain_prediction():
+def history_features(source, symbol='SPX'):
+    """Features, date and realized close of the latest prediction in a history"""
+    from bar_store import load_history
+    from indicators import feature_table
+
+    table = feature_table(*load_history(source, symbol))
+    if table.empty:
+        raise ValueError(f'Not enough {symbol} history in {source}')
+    row = table.iloc[-1]
+    return row.to_dict(), str(row['date']), float(row['target'])
+
+def explain_prediction(history=None, symbol='SPX'):
     """Explain why the model produces high predictions"""
     print("🔍 EXPLAINING WHY PREDICTIONS ARE HIGH")
     print("="*60)
@@ -16,6 +34,14 @@ def explain_prediction():
     # Load the model
     model = joblib.load('linear_regression_model.pkl')
     
+    if history is not None:
+        features, date, actual = history_features(history, symbol)
+        print(f"\n📊 Latest {symbol} prediction in {history}:")
+        print(f"   • Predicting the close of {date[:10]}")
+        print(f"   • Previous close: ${features['close']:.2f}")
+        print(f"   • Realized close: ${actual:.2f}")
+        return explain_features(model, features, actual)
+    
     # Your input values
     open_price = 4500.00
     high_price = 4520.00
@@ -55,7 +81,10 @@ def explain_prediction():
         'is_month_end': 1 if datetime.now().day >= 28 else 0,
         'is_month_start': 1 if datetime.now().day <= 3 else 0
     }
-    
+    return explain_features(model, features)
+
+def explain_features(model, features, actual=None):
+    """Walk through the model's prediction for one feature row"""
     print(f"\n📈 Model Coefficients:")
     print(f"   • Intercept: {model.intercept_:.4f}")
     
@@ -75,6 +104,8 @@ def explain_prediction():
         print(f"     Running total: {prediction:.2f}")
     
     print(f"\n🎯 Final Prediction: ${prediction:.2f}")
+    if actual is not None:
+        print(f"   • Error vs realized close: {prediction - actual:+.2f} points")
     
     # Explain why it's high
     print(f"\n❓ Why is the prediction so high?")
@@ -122,5 +153,7 @@ def show_model_training_info():
     print(f"   The predictions are exactly what your trained model produces")
 
 if __name__ == "__main__":
-    prediction = explain_prediction()
+    history = sys.argv[1] if len(sys.argv) > 1 else None
+    symbol = sys.argv[2] if len(sys.argv) > 2 else 'SPX'
+    prediction = explain_prediction(history, symbol)
     show_model_training_info() 
\ No newline at end of file
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Incremental technical-indicator state for the model's features
+
+IndicatorState keeps everything needed to produce the model's *_t-1 features
+for n independent series (scenarios or symbols) as flat NumPy arrays, and
+updates them one bar at a time for all rows at once:
+
+    SMA_5/10/20      running sums over a ring buffer of the last 20 closes
+    EMA_20           exponential average, span 20
+    MACD             EMA_12 - EMA_26, signal = EMA_9 of MACD, diff = MACD - signal
+    RSI              Wilder-smoothed average gain / loss over 14 bars
+    ATR              Wilder-smoothed true range over 14 bars
+    Price_Change     close-to-close percentage change
+
+Calendar features (year, month, day, day_of_week, is_month_end,
+is_month_start) describe the date being predicted and come from
+calendar_features().
+"""
+
+import numpy as np
+
+RING = 20
+SMA_WINDOWS = (5, 10, 20)
+WILDER = 14
+
+# Arrays that make up the state, in snapshot order
+STATE_FIELDS = (
+    'ring', 'pos', 'count', 'sma_sum', 'last_close', 'last_date', 'price_change',
+    'ema20', 'ema12', 'ema26', 'macd_signal', 'avg_gain', 'avg_loss', 'atr',
+)
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def next_trading_day(dates, holidays=None):
+    """Next weekday after each date, skipping the given holidays"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if holidays is None:
+        holidays = []
+    return np.busday_offset(dates, 1, roll='forward', holidays=holidays)
+
+
+def calendar_features(dates):
+    """Calendar columns for the dates being predicted"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    next_month = (months + 1).astype('datetime64[D]')
+    return {
+        'year': years.astype(np.int64) + 1970,
+        'month': (months - years).astype(np.int64) + 1,
+        'day': (dates - months.astype('datetime64[D]')).astype(np.int64) + 1,
+        # 1970-01-01 was a Thursday (weekday 3)
+        'day_of_week': (dates.astype(np.int64) + 3) % 7,
+        'is_month_end': (dates == next_month - 1).astype(np.int64),
+        'is_month_start': (dates == months.astype('datetime64[D]')).astype(np.int64),
+    }
+
+
+class IndicatorState:
+    """Vectorized indicator state for n series"""
+
+    def __init__(self, n):
+        self.n = n
+        self.ring = np.zeros((n, RING))
+        self.pos = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.sma_sum = np.zeros((n, len(SMA_WINDOWS)))
+        self.last_close = np.full(n, np.nan)
+        self.last_date = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.price_change = np.zeros(n)
+        self.ema20 = np.zeros(n)
+        self.ema12 = np.zeros(n)
+        self.ema26 = np.zeros(n)
+        self.macd_signal = np.zeros(n)
+        self.avg_gain = np.zeros(n)
+        self.avg_loss = np.zeros(n)
+        self.atr = np.zeros(n)
+
+    @classmethod
+    def from_history(cls, closes, highs=None, lows=None, dates=None):
+        """Build state by replaying (n, T) arrays of bars, oldest first"""
+        closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+        highs = closes if highs is None else np.atleast_2d(np.asarray(highs, dtype=np.float64))
+        lows = closes if lows is None else np.atleast_2d(np.asarray(lows, dtype=np.float64))
+        if dates is not None:
+            dates = np.asarray(dates, dtype='datetime64[D]')
+            if dates.ndim == 1:
+                dates = np.broadcast_to(dates, closes.shape)
+
+        state = cls(closes.shape[0])
+        for t in range(closes.shape[1]):
+            state.update(closes[:, t], highs[:, t], lows[:, t],
+                         dates=None if dates is None else dates[:, t])
+        return state
+
+    def copy(self):
+        clone = IndicatorState.__new__(IndicatorState)
+        clone.n = self.n
+        for field in STATE_FIELDS:
+            setattr(clone, field, getattr(self, field).copy())
+        return clone
+
+    def repeat(self, times):
+        """Each row repeated `times` times (e.g. for Monte Carlo scenarios)"""
+        clone = IndicatorState.__new__(IndicatorState)
+        clone.n = self.n * times
+        for field in STATE_FIELDS:
+            setattr(clone, field, np.repeat(getattr(self, field), times, axis=0))
+        return clone
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """State backed by existing arrays (e.g. views into a checkpoint), no copy"""
+        state = cls.__new__(cls)
+        state.n = len(arrays['count'])
+        for field in STATE_FIELDS:
+            setattr(state, field, arrays[field])
+        return state
+
+    def grow(self, n):
+        """Same state with room for n rows; the new rows start empty"""
+        grown = IndicatorState(n)
+        for field in STATE_FIELDS:
+            getattr(grown, field)[:self.n] = getattr(self, field)
+        return grown
+
+    def update(self, close, high=None, low=None, dates=None, rows=None):
+        """
+        Add one bar to each selected row.
+
+        close/high/low are arrays aligned with rows (all rows when rows is
+        None). Without high/low the bar is treated as a single print at the
+        close, which is what recursive forecasting feeds back.
+        """
+        if rows is None:
+            rows = slice(None)
+        close = np.asarray(close, dtype=np.float64)
+        high = close if high is None else np.asarray(high, dtype=np.float64)
+        low = close if low is None else np.asarray(low, dtype=np.float64)
+
+        prev = self.last_close[rows]
+        first = self.count[rows] == 0
+        prev_or_close = np.where(first, close, prev)
+
+        # Price change and Wilder RSI inputs
+        change = close - prev_or_close
+        self.price_change[rows] = np.where(first, 0.0, change / np.where(first, 1.0, prev_or_close))
+        gain = np.maximum(change, 0.0)
+        loss = np.maximum(-change, 0.0)
+        true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_or_close), np.abs(low - prev_or_close)))
+
+        a = 1.0 / WILDER
+        second = self.count[rows] == 1
+        self.avg_gain[rows] = np.where(first, 0.0, np.where(second, gain, self.avg_gain[rows] + a * (gain - self.avg_gain[rows])))
+        self.avg_loss[rows] = np.where(first, 0.0, np.where(second, loss, self.avg_loss[rows] + a * (loss - self.avg_loss[rows])))
+        self.atr[rows] = np.where(first, true_range, self.atr[rows] + a * (true_range - self.atr[rows]))
+
+        # Exponential averages start at the first close
+        self.ema20[rows] = np.where(first, close, self.ema20[rows] + _alpha(20) * (close - self.ema20[rows]))
+        ema12 = np.where(first, close, self.ema12[rows] + _alpha(12) * (close - self.ema12[rows]))
+        ema26 = np.where(first, close, self.ema26[rows] + _alpha(26) * (close - self.ema26[rows]))
+        macd = ema12 - ema26
+        self.macd_signal[rows] = np.where(first, macd, self.macd_signal[rows] + _alpha(9) * (macd - self.macd_signal[rows]))
+        self.ema12[rows] = ema12
+        self.ema26[rows] = ema26
+
+        # Ring buffer of recent closes; each window's sum adds the new close
+        # and drops the one falling out of the window
+        row_idx = np.arange(self.n)[rows] if isinstance(rows, slice) else rows
+        pos = self.pos[rows]
+        count = self.count[rows]
+        sums = self.sma_sum[rows]
+        for k, window in enumerate(SMA_WINDOWS):
+            leaving = self.ring[row_idx, (pos - window) % RING]
+            sums[:, k] += close - np.where(count >= window, leaving, 0.0)
+        self.sma_sum[rows] = sums
+        self.ring[row_idx, pos] = close
+        self.pos[rows] = (pos + 1) % RING
+        self.count[rows] = count + 1
+        self.last_close[rows] = close
+        if dates is not None:
+            self.last_date[rows] = np.asarray(dates, dtype='datetime64[D]')
+
+    def _sma(self, k, rows):
+        """Mean of the last SMA_WINDOWS[k] closes (fewer while warming up)"""
+        count = np.minimum(self.count[rows], SMA_WINDOWS[k])
+        return self.sma_sum[rows, k] / np.maximum(count, 1)
+
+    def indicator_features(self, rows=None):
+        """Indicator columns (the *_t-1 features) as a dict of arrays"""
+        if rows is None:
+            rows = slice(None)
+        macd = self.ema12[rows] - self.ema26[rows]
+        signal = self.macd_signal[rows]
+        avg_gain = self.avg_gain[rows]
+        avg_loss = self.avg_loss[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss),
+                           np.where(avg_gain > 0, 100.0, 50.0))
+        return {
+            'SMA_5_t-1': self._sma(0, rows),
+            'SMA_10_t-1': self._sma(1, rows),
+            'Price_Change_t-1': self.price_change[rows],
+            'SMA_20_t-1': self._sma(2, rows),
+            'EMA_20_t-1': self.ema20[rows],
+            'MACD_t-1': macd,
+            'MACD_signal_t-1': signal,
+            'MACD_diff_t-1': macd - signal,
+            'RSI_t-1': rsi,
+            'ATR_t-1': self.atr[rows],
+        }
+
+    def feature_matrix(self, feature_names, target_dates, rows=None):
+        """(n_rows, n_features) matrix for predicting the close on target_dates"""
+        columns = self.indicator_features(rows)
+        columns.update(calendar_features(target_dates))
+        n_rows = len(columns['SMA_5_t-1'])
+        X = np.empty((n_rows, len(feature_names)))
+        for j, name in enumerate(feature_names):
+            X[:, j] = columns[name]
+        return X
+
+
+def feature_table(dates, highs, lows, closes, warmup=26):
+    """
+    Training-style feature rows for a whole daily history (one series).
+
+    Row t holds the indicators through bar t, the calendar features of bar
+    t+1, 'close' = close of bar t and 'target' = close of bar t+1, i.e. exactly what the model sees
+    when predicting the next close. Uses pandas' vectorized rolling/ewm with
+    the same definitions as IndicatorState; the first `warmup` rows are
+    dropped while the slow averages settle.
+    """
+    import pandas as pd
+
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    close = pd.Series(np.asarray(closes, dtype=np.float64))
+    high = pd.Series(np.asarray(highs, dtype=np.float64))
+    low = pd.Series(np.asarray(lows, dtype=np.float64))
+    prev = close.shift(1).fillna(close)
+
+    change = close.diff()
+    avg_gain = change.clip(lower=0).iloc[1:].ewm(alpha=1 / WILDER, adjust=False).mean()
+    avg_loss = (-change).clip(lower=0).iloc[1:].ewm(alpha=1 / WILDER, adjust=False).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss),
+                       np.where(avg_gain > 0, 100.0, 50.0))
+    rsi = np.concatenate([[50.0], rsi])
+    true_range = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1).max(axis=1)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    table = pd.DataFrame({
+        'SMA_5_t-1': close.rolling(5, min_periods=1).mean(),
+        'SMA_10_t-1': close.rolling(10, min_periods=1).mean(),
+        'Price_Change_t-1': close.pct_change().fillna(0.0),
+        'SMA_20_t-1': close.rolling(20, min_periods=1).mean(),
+        'EMA_20_t-1': close.ewm(span=20, adjust=False).mean(),
+        'MACD_t-1': macd,
+        'MACD_signal_t-1': signal,
+        'MACD_diff_t-1': macd - signal,
+        'RSI_t-1': rsi,
+        'ATR_t-1': true_range.ewm(alpha=1 / WILDER, adjust=False).mean(),
+    })
+
+    # Calendar features and target belong to the next bar
+    target_dates = dates[1:]
+    table = table.iloc[:-1].copy()
+    for name, values in calendar_features(target_dates).items():
+        table[name] = values
+    table['date'] = target_dates
+    table['close'] = close.to_numpy()[:-1]
+    table['target'] = close.to_numpy()[1:]
+    return table.iloc[warmup:].reset_index(drop=True)
+
+
+def read_history_csv(path):
+    """(dates, highs, lows, closes) from a daily OHLC CSV such as a Yahoo export"""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    df = df.sort_values('date')
+    close_column = 'close' if 'close' in df.columns else 'adj close'
+    return (
+        pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]'),
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df[close_column].to_numpy(dtype=np.float64),
+    )
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Load generator for the prediction API
+
+Drives /predict (and optionally /predict/batch) over plain asyncio sockets
+(TLS for https:// URLs) with randomized but realistic OHLC payloads, in one of two modes:
+
+    --rate R         open loop: requests are *scheduled* at R per second no
+                     matter how fast the server answers. Latency is measured
+                     from the scheduled send time, so queueing on a slow
+                     server shows up in the percentiles instead of silently
+                     lowering the offered load.
+    --concurrency C  closed loop: C clients each send their next request as
+                     soon as the previous one returns.
+
+Throughput, error rate, p50/p90/p99/p99.9 latency and a latency histogram
+are printed and saved as JSON; pass --compare with an earlier results file
+to see the change between releases.
+
+    python load_test.py --rate 200 --duration 30
+    python load_test.py --concurrency 32 --batch-share 0.1 --compare load_test_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import ssl
+import time
+from urllib.parse import urlsplit
+
+PERCENTILES = (50, 90, 99, 99.9)
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class PriceWalk:
+    """Random-walk index level that produces plausible daily OHLC bars"""
+
+    def __init__(self, start=4500.0, daily_vol=0.012, seed=None):
+        self.rng = random.Random(seed)
+        self.level = start
+        self.daily_vol = daily_vol
+
+    def bar(self):
+        self.level *= math.exp(self.rng.gauss(0.0, self.daily_vol))
+        open_price = self.level * (1 + self.rng.gauss(0.0, self.daily_vol / 3))
+        spread = self.level * self.daily_vol
+        return {
+            'open': round(open_price, 2),
+            'high': round(max(open_price, self.level) + abs(self.rng.gauss(0.0, spread)), 2),
+            'low': round(min(open_price, self.level) - abs(self.rng.gauss(0.0, spread)), 2),
+        }
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened when the server closes it"""
+
+    def __init__(self, host, port, tls=None):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.tls)
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                'Content-Type: application/json', f'Content-Length: {len(body)}']
+        head += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Server closed the connection')
+        version, status = status_line.split()[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in response_headers:
+            payload = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            payload = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                payload += chunk[:-2]
+        else:
+            payload = await self.reader.read()
+
+        keep_alive = version == b'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if not keep_alive:
+            self.close()
+        return int(status), payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class LoadTest:
+    """Runs one load test and collects per-request outcomes"""
+
+    def __init__(self, url, batch_share=0.0, batch_size=100, client_id='load-test', seed=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported URL scheme {parts.scheme!r}; use http:// or https://')
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.tls = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.batch_share = batch_share
+        self.batch_size = batch_size
+        # Only used as the rate-limit key by a server that trusts a proxy hop
+        self.headers = {'X-Forwarded-For': client_id}
+        self.walk = PriceWalk(seed=seed)
+        self.rng = random.Random(seed)
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def _next_request(self):
+        if self.batch_share and self.rng.random() < self.batch_share:
+            rows = [self.walk.bar() for _ in range(self.batch_size)]
+            return 'predict/batch', json.dumps({'rows': rows}).encode('utf-8')
+        return 'predict', json.dumps(self.walk.bar()).encode('utf-8')
+
+    async def _send(self, connection, scheduled):
+        endpoint, body = self._next_request()
+        try:
+            status, _ = await connection.request('POST', f'{self.prefix}/{endpoint}', body, self.headers)
+            key = str(status)
+        except Exception as e:
+            connection.close()
+            key = type(e).__name__
+            self.errors[key] = self.errors.get(key, 0) + 1
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - scheduled)
+
+    async def open_loop(self, rate, duration, connections):
+        """Fixed arrival rate; requests wait for a free connection if all are busy"""
+        pool = asyncio.Queue()
+        for _ in range(connections):
+            pool.put_nowait(Connection(self.host, self.port, self.tls))
+
+        async def one(scheduled):
+            connection = await pool.get()
+            try:
+                await self._send(connection, scheduled)
+            finally:
+                pool.put_nowait(connection)
+
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(scheduled)))
+        await asyncio.gather(*tasks)
+        while not pool.empty():
+            pool.get_nowait().close()
+        return time.perf_counter() - start
+
+    async def closed_loop(self, concurrency, duration):
+        """`concurrency` clients sending back-to-back requests"""
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def client():
+            connection = Connection(self.host, self.port, self.tls)
+            try:
+                while time.perf_counter() < deadline:
+                    await self._send(connection, time.perf_counter())
+            finally:
+                connection.close()
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies):
+    """Percentiles and histogram (milliseconds) for a list of latencies in seconds"""
+    values = sorted(v * 1000 for v in latencies)
+    histogram = {f'<={bound}ms': 0 for bound in BUCKETS_MS}
+    histogram[f'>{BUCKETS_MS[-1]}ms'] = 0
+    labels = list(histogram)
+    for value in values:
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if value <= bound), len(BUCKETS_MS))
+        histogram[labels[index]] += 1
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 3) if values else None,
+        'max_ms': round(values[-1], 3) if values else None,
+        **{f'p{p:g}_ms': round(percentile(values, p), 3) if values else None for p in PERCENTILES},
+        'histogram': histogram,
+    }
+
+
+def summarize(test, elapsed, config):
+    everything = [v for values in test.latencies.values() for v in values]
+    total = len(everything)
+    failed = sum(n for status, n in test.statuses.items() if not status.startswith('2'))
+    return {
+        'config': config,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'error_rate': round(failed / total, 5) if total else None,
+        'statuses': test.statuses,
+        'latency': latency_summary(everything),
+        'by_endpoint': {endpoint: latency_summary(values) for endpoint, values in test.latencies.items()},
+    }
+
+
+def fmt(value, spec=''):
+    """Format a result that is None when nothing was measured"""
+    return 'n/a' if value is None else format(value, spec)
+
+
+def print_report(results, baseline=None):
+    latency = results['latency']
+    print(f"   • Requests: {results['requests']:,} in {results['elapsed_s']}s "
+          f"({fmt(results['throughput_rps'])} req/s)")
+    print(f"   • Error rate: {fmt(results['error_rate'], '.2%')}   Statuses: {results['statuses']}")
+    for p in PERCENTILES:
+        key = f'p{p:g}_ms'
+        line = f"   • {key[:-3]:>6}: {fmt(latency[key], '9.2f'):>9} ms"
+        if baseline and baseline['latency'].get(key) and latency[key] is not None:
+            change = latency[key] / baseline['latency'][key] - 1
+            line += f"   ({change:+.1%} vs baseline {baseline['latency'][key]:.2f} ms)"
+        print(line)
+    if baseline and baseline.get('throughput_rps') and results['throughput_rps'] is not None:
+        change = results['throughput_rps'] / baseline['throughput_rps'] - 1
+        print(f"   • Throughput vs baseline: {change:+.1%}")
+
+    print("\n📊 Latency histogram:")
+    peak = max(latency['histogram'].values()) or 1
+    for label, count in latency['histogram'].items():
+        print(f"   {label:>9} {count:8,} {'█' * int(40 * count / peak)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the prediction API')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--rate', type=float, help='Open-loop requests per second')
+    mode.add_argument('--concurrency', type=int, help='Closed-loop concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds')
+    parser.add_argument('--connections', type=int, default=64, help='Connection pool size in open-loop mode')
+    parser.add_argument('--batch-share', type=float, default=0.0, help='Fraction of requests sent to /predict/batch')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--client-id', default='127.0.0.1',
+                        help='Sent as X-Forwarded-For (honored when the server sets TRUSTED_PROXY_HOPS)')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', default='load_test_results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    if args.rate is None and args.concurrency is None:
+        args.concurrency = 8
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    test = LoadTest(args.url, args.batch_share, args.batch_size, args.client_id, args.seed)
+    if args.rate is not None:
+        print(f"🚀 Open loop: {args.rate:g} req/s for {args.duration:g}s against {args.url}")
+        elapsed = asyncio.run(test.open_loop(args.rate, args.duration, args.connections))
+    else:
+        print(f"🚀 Closed loop: {args.concurrency} clients for {args.duration:g}s against {args.url}")
+        elapsed = asyncio.run(test.closed_loop(args.concurrency, args.duration))
+
+    results = summarize(test, elapsed, config)
+    print("=" * 60)
+    print_report(results, baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
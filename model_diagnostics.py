@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Chunked large-scale diagnostics for the linear model
+
+Streams a full daily history (a CSV, or every symbol of a bar store) through
+the model in fixed-size chunks and reduces each chunk to a small, mergeable
+DiagnosticsAccumulator:
+
+    features + residual   count, mean and centered co-moment matrix, merged
+                          with the pairwise (Chan et al.) update so tens of
+                          millions of rows lose no precision to cancellation
+    residual lags         Σ r_t·r_{t+k} for k ≤ max_lag, plus the first and
+                          last max_lag residuals of the open segment, so lag
+                          products that straddle a chunk boundary are added
+                          when consecutive chunks are merged
+    regimes               count, Σr, Σr², Σ|r| per volatility / trend / year bucket
+
+Memory is O(chunk_rows + features²) however long the history is, chunks are
+spread across worker processes, and the merged totals give the feature
+correlation matrix, variance inflation factors, condition number, residual
+autocorrelation and residual-by-regime breakdowns in one pass. Each chunk
+recomputes its indicators from OVERLAP earlier bars, long enough for every
+exponential average to forget its starting point, so chunked results match
+a single in-memory pass to rounding. Workers read bars through the bar
+store's memory maps; a CSV is streamed into a temporary store first.
+
+    python analyze_model.py --diagnostics bars/
+    python analyze_model.py --diagnostics history.csv --processes 4
+"""
+
+import copy
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Bars replayed before each chunk; (1 - 1/14)^512 ≈ 3e-17 for the slowest average
+OVERLAP = 512
+WARMUP = 26
+# ATR as a fraction of the close separating low / normal / high volatility
+VOL_EDGES = (0.01, 0.02)
+# Eigenvalues below this fraction of the largest are treated as exact collinearity
+COLLINEAR = 1e-12
+
+
+class DiagnosticsAccumulator:
+    """Mergeable sufficient statistics of (features, residual) rows"""
+
+    def __init__(self, n_columns, max_lag=10):
+        self.max_lag = max_lag
+        self.n = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+        self.abs_residual = 0.0
+        self.regimes = {}
+
+        # Σ r_t·r_{t+k} over every series; pair counts and the sums of the
+        # leading / trailing residuals of each lag for closed series
+        self.lag_sums = np.zeros(max_lag + 1)
+        self.pairs = np.zeros(max_lag + 1)
+        self.lead = np.zeros(max_lag + 1)
+        self.trail = np.zeros(max_lag + 1)
+
+        # The series segment still open for append()
+        self.open_n = 0
+        self.open_total = 0.0
+        self.head = np.empty(0)
+        self.tail = np.empty(0)
+
+    @classmethod
+    def from_rows(cls, X, residuals, regimes=None, max_lag=10):
+        """Accumulator for one time-ordered run of rows from a single series"""
+        r = np.asarray(residuals, dtype=np.float64)
+        Z = np.column_stack([np.asarray(X, dtype=np.float64), r])
+        acc = cls(Z.shape[1], max_lag)
+        n = len(r)
+        if n == 0:
+            return acc
+        acc.n = n
+        acc.mean = Z.mean(axis=0)
+        centered = Z - acc.mean
+        acc.comoment = centered.T @ centered
+        acc.abs_residual = float(np.abs(r).sum())
+        acc.lag_sums = np.array([r[:n - k] @ r[k:] if k < n else 0.0 for k in range(max_lag + 1)])
+        acc.open_n = n
+        acc.open_total = float(r.sum())
+        acc.head = r[:max_lag].copy()
+        acc.tail = r[max(n - max_lag, 0):].copy()
+
+        for dimension, codes in (regimes or {}).items():
+            keys, inverse = np.unique(codes, return_inverse=True)
+            stats = np.column_stack([
+                np.bincount(inverse, minlength=len(keys)),
+                np.bincount(inverse, r, minlength=len(keys)),
+                np.bincount(inverse, r * r, minlength=len(keys)),
+                np.bincount(inverse, np.abs(r), minlength=len(keys)),
+            ])
+            acc.regimes[dimension] = {int(key): row for key, row in zip(keys, stats)}
+        return acc
+
+    # ------------------------------------------------------------------
+    # Merging
+    # ------------------------------------------------------------------
+    def _merge(self, other):
+        """Add everything that doesn't depend on the rows' order"""
+        if other.n:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.comoment += other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+            self.mean += delta * (other.n / n)
+            self.n = n
+        self.abs_residual += other.abs_residual
+        for dimension, groups in other.regimes.items():
+            merged = self.regimes.setdefault(dimension, {})
+            for key, stats in groups.items():
+                merged[key] = merged[key] + stats if key in merged else stats.copy()
+        self.lag_sums += other.lag_sums
+        self.pairs += other.pairs
+        self.lead += other.lead
+        self.trail += other.trail
+
+    def append(self, later):
+        """Merge the chunk that directly follows this one in the same series"""
+        L = self.max_lag
+        # Lag-k pairs across the boundary: (tail[-i], head[k - i]) for i = 1..k
+        for k in range(1, L + 1):
+            i = np.arange(1, k + 1)
+            ok = (i <= len(self.tail)) & (k - i < len(later.head))
+            self.lag_sums[k] += self.tail[-i[ok]] @ later.head[(k - i)[ok]]
+        self._merge(later)
+        self.head = np.concatenate([self.head, later.head])[:L]
+        joined = np.concatenate([self.tail, later.tail])
+        self.tail = joined[max(len(joined) - L, 0):]
+        self.open_n += later.open_n
+        self.open_total += later.open_total
+        return self
+
+    def close_series(self):
+        """End the open series; its lag terms move into the pooled sums"""
+        n = self.open_n
+        for k in range(min(n, self.max_lag + 1)):
+            self.pairs[k] += n - k
+            self.lead[k] += self.open_total - self.tail[len(self.tail) - k:].sum()
+            self.trail[k] += self.open_total - self.head[:k].sum()
+        self.open_n = 0
+        self.open_total = 0.0
+        self.head = np.empty(0)
+        self.tail = np.empty(0)
+
+    def combine(self, other):
+        """Merge another, independent series (e.g. another symbol)"""
+        self.close_series()
+        other.close_series()
+        self._merge(other)
+        return self
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+    def report(self, feature_names, regime_names=None):
+        """Diagnostics over everything merged so far, as a JSON-ready dict"""
+        acc = copy.deepcopy(self)
+        acc.close_series()
+        n, p = acc.n, len(feature_names)
+        if n < 2:
+            return {'rows': n}
+        cov = acc.comoment / (n - 1)
+        sd = np.sqrt(np.maximum(np.diag(cov), 0.0))
+
+        # Correlations over every column that varies (a single-year history has a constant 'year')
+        varying = np.flatnonzero(sd > 0)
+        corr = np.full_like(cov, np.nan)
+        corr[np.ix_(varying, varying)] = cov[np.ix_(varying, varying)] / np.outer(sd[varying], sd[varying])
+
+        # VIF_j = (R⁻¹)_jj from the eigendecomposition of the feature correlations;
+        # a direction with a ~zero eigenvalue makes the features on it infinite
+        features = varying[varying < p]
+        vif = np.full(p, np.nan)
+        condition_number = np.nan
+        if len(features):
+            eigenvalues, vectors = np.linalg.eigh(corr[np.ix_(features, features)])
+            singular = eigenvalues <= eigenvalues.max() * COLLINEAR
+            weights = vectors ** 2
+            inverse_diag = weights[:, ~singular] @ (1.0 / eigenvalues[~singular])
+            vif[features] = np.where(weights[:, singular].sum(axis=1) > 1e-8, np.inf, inverse_diag)
+            condition_number = np.inf if singular.any() else float(np.sqrt(eigenvalues.max() / eigenvalues.min()))
+
+        # Autocorrelation about the pooled residual mean:
+        # Σ(r_t - μ)(r_{t+k} - μ) = S_k - μ(lead_k + trail_k) + pairs_k·μ²
+        mu = acc.mean[-1]
+        lagged = acc.lag_sums - mu * (acc.lead + acc.trail) + acc.pairs * mu * mu
+        autocorrelation = lagged[1:] / lagged[0] if lagged[0] > 0 else np.full(acc.max_lag, np.nan)
+
+        regimes = {}
+        for dimension, groups in acc.regimes.items():
+            names = (regime_names or {}).get(dimension)
+            regimes[dimension] = {
+                (names[key] if names else str(key)): {
+                    'rows': int(count),
+                    'mean': total / count,
+                    'rmse': float(np.sqrt(squares / count)),
+                    'mae': absolute / count,
+                }
+                for key, (count, total, squares, absolute) in sorted(groups.items())
+            }
+
+        return _json_ready({
+            'rows': n,
+            'features': list(feature_names),
+            'correlation': corr[:p, :p].tolist(),
+            'vif': dict(zip(feature_names, vif.tolist())),
+            'condition_number': condition_number,
+            'residual': {
+                'mean': mu,
+                'std': sd[-1],
+                'rmse': float(np.sqrt(acc.comoment[-1, -1] / n + mu * mu)),
+                'mae': acc.abs_residual / n,
+                'feature_correlation': dict(zip(feature_names, corr[:p, -1].tolist())),
+                'autocorrelation': autocorrelation.tolist(),
+            },
+            'regimes': regimes,
+        })
+
+
+def _json_ready(value):
+    """NaN / ±inf become None and NumPy scalars become Python numbers"""
+    if isinstance(value, dict):
+        return {key: _json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def regime_names(vol_edges=VOL_EDGES):
+    edges = [f'{edge:.1%}' for edge in vol_edges]
+    volatility = [f'ATR < {edges[0]}'] + [f'ATR {a}–{b}' for a, b in zip(edges, edges[1:])] + [f'ATR ≥ {edges[-1]}']
+    return {'volatility': volatility, 'trend': ['below SMA 20', 'above SMA 20']}
+
+
+def regime_codes(table, vol_edges=VOL_EDGES):
+    """Integer regime bucket of every feature row"""
+    close = table['close'].to_numpy(dtype=np.float64)
+    return {
+        'volatility': np.digitize(table['ATR_t-1'].to_numpy(dtype=np.float64) / close, vol_edges),
+        'trend': (close >= table['SMA_20_t-1'].to_numpy(dtype=np.float64)).astype(np.int64),
+        'year': table['date'].to_numpy().astype('datetime64[Y]').astype(np.int64) + 1970,
+    }
+
+
+# ----------------------------------------------------------------------
+# Workers
+# ----------------------------------------------------------------------
+_WORKER = {}
+
+
+def _init_worker(root, start, end, feature_names, coef, intercept, max_lag, vol_edges):
+    _WORKER.update(root=root, start=start, end=end, feature_names=feature_names, coef=coef,
+                   intercept=intercept, max_lag=max_lag, vol_edges=vol_edges, history={})
+
+
+def _history(symbol):
+    """Per-worker memory maps of a symbol's bars in the date range"""
+    from bar_store import BarStore
+
+    history = _WORKER['history'].get(symbol)
+    if history is None:
+        history = BarStore(_WORKER['root']).history(symbol, _WORKER['start'], _WORKER['end'])
+        _WORKER['history'][symbol] = history
+    return history
+
+
+def _diagnose_chunk(task):
+    """Accumulator for the feature rows of bars [lo, hi) of one symbol"""
+    from indicators import feature_table
+
+    symbol, lo, hi = task
+    dates, highs, lows, closes = _history(symbol)
+    a = max(0, lo - OVERLAP)
+    table = feature_table(dates[a:hi + 1], highs[a:hi + 1], lows[a:hi + 1], closes[a:hi + 1], warmup=lo - a)
+    X = table[_WORKER['feature_names']].to_numpy(dtype=np.float64)
+    residuals = table['target'].to_numpy(dtype=np.float64) - (X @ _WORKER['coef'] + _WORKER['intercept'])
+    return DiagnosticsAccumulator.from_rows(X, residuals, regime_codes(table, _WORKER['vol_edges']), _WORKER['max_lag'])
+
+
+def run_diagnostics(source, feature_names, coef, intercept, symbols=None, start=None, end=None,
+                    chunk_rows=100_000, processes=None, max_lag=10, vol_edges=VOL_EDGES):
+    """
+    Diagnostics of the linear model (coef, intercept over feature_names) on
+    every symbol of a bar store, or on a CSV history. A CSV is first streamed
+    into a temporary bar store, chunk_rows lines at a time, so neither this
+    process nor the workers ever hold the whole file. processes=1 runs in
+    this process; chunk results are merged in order as they arrive.
+    """
+    if os.path.isdir(source):
+        return _run_diagnostics(source, feature_names, coef, intercept, symbols, start, end,
+                                chunk_rows, processes, max_lag, vol_edges)
+    from bar_store import BarStore
+
+    with tempfile.TemporaryDirectory(prefix='diagnostics-') as root:
+        BarStore(root).ingest_csv(source, 'SPX', chunk_rows=chunk_rows)
+        return _run_diagnostics(root, feature_names, coef, intercept, ['SPX'], start, end,
+                                chunk_rows, processes, max_lag, vol_edges)
+
+
+def _run_diagnostics(root, feature_names, coef, intercept, symbols, start, end,
+                     chunk_rows, processes, max_lag, vol_edges):
+    from bar_store import BarStore
+
+    store = BarStore(root)
+    if symbols is None:
+        symbols = store.symbols()
+    tasks = []
+    for symbol in symbols:
+        n_bars = len(store.bars(symbol, start, end)['date'])
+        for lo in range(WARMUP, n_bars - 1, chunk_rows):
+            tasks.append((symbol, lo, min(lo + chunk_rows, n_bars - 1)))
+
+    initargs = (root, start, end, list(feature_names), np.asarray(coef, dtype=np.float64),
+                float(intercept), max_lag, tuple(vol_edges))
+    pool = None
+    if processes == 1:
+        _init_worker(*initargs)
+        results = map(_diagnose_chunk, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=initargs)
+        results = pool.map(_diagnose_chunk, tasks)
+
+    total = DiagnosticsAccumulator(len(feature_names) + 1, max_lag)
+    series, current = None, None
+    try:
+        for (symbol, _, _), chunk in zip(tasks, results):
+            if symbol == current:
+                series.append(chunk)
+                continue
+            if series is not None:
+                total.combine(series)
+            series, current = chunk, symbol
+        if series is not None:
+            total.combine(series)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    report = total.report(feature_names, regime_names(vol_edges))
+    report.update(symbols=len(symbols), chunks=len(tasks))
+    return report
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered, pre-compressed static pages
+
+The home page doesn't depend on the request, so it is rendered once, stored
+as identity/gzip/brotli bodies and served with an ETag. Clients that send a
+matching If-None-Match get a 304 without a body. The template file is
+re-checked at most every check_interval seconds and re-rendered only when
+its modification time changes.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from flask import Response, render_template
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip covers every browser
+    brotli = None
+
+
+class StaticPage:
+    """A rendered template kept in memory with its compressed variants"""
+
+    def __init__(self, app, template, cache_control='public, no-cache', check_interval=2.0):
+        self.app = app
+        self.template = template
+        self.cache_control = cache_control
+        self.check_interval = check_interval
+        self.path = os.path.join(app.root_path, app.template_folder, template)
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self.mtime = None
+        self.builds = 0
+        self.build()
+
+    def build(self):
+        """Render the template and prepare every encoding"""
+        mtime = os.path.getmtime(self.path)
+        # Jinja keeps compiled templates (and outside debug never re-checks
+        # them), so drop them or a rebuild would re-render the old template
+        if self.app.jinja_env.cache is not None:
+            self.app.jinja_env.cache.clear()
+        with self.app.app_context():
+            body = render_template(self.template).encode('utf-8')
+
+        bodies = {
+            'identity': body,
+            'gzip': gzip.compress(body, compresslevel=9),
+        }
+        if brotli is not None:
+            bodies['br'] = brotli.compress(body, quality=11)
+
+        # Weak ETag: the same validator covers every content-encoding
+        self.etag = 'W/"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        self.bodies = bodies
+        self.mtime = mtime
+        self.builds += 1
+
+    def _refresh(self):
+        """Re-render if the template changed (stat at most every check_interval)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                if os.path.getmtime(self.path) != self.mtime:
+                    self.build()
+            except OSError as e:
+                print(f"Error refreshing {self.template}: {e}, serving cached copy")
+
+    def _encoding(self, accept_encoding):
+        accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+        if 'br' in accepted and 'br' in self.bodies:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return 'identity'
+
+    def response(self, request):
+        """304 for a matching validator, otherwise the best pre-compressed body"""
+        self._refresh()
+        headers = {
+            'ETag': self.etag,
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(',')}
+            # Weak comparison: ignore the W/ prefix on either side
+            strip = lambda tag: tag[2:] if tag.startswith('W/') else tag
+            if '*' in tags or strip(self.etag) in {strip(tag) for tag in tags}:
+                return Response(status=304, headers=headers)
+
+        encoding = self._encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.bodies[encoding], status=200, headers=headers,
+                        content_type='text/html; charset=utf-8')
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+On-demand per-request profiling
+
+A request is profiled with cProfile when either
+  • it is a /predict request in the sampled fraction PROFILE_SAMPLE_RATE (0-1), or
+  • it carries a valid X-Profile-Signature header: "<unix ts>.<nonce>.<hex hmac>"
+    where the HMAC-SHA256 of "<unix ts>.<nonce>" is keyed with PROFILE_SECRET,
+    the timestamp is less than five minutes old and the nonce has not been
+    seen before (each signature profiles one request per worker process).
+
+Stats from every profiled request are merged in memory and can be downloaded
+from /admin/profile as a pstats dump (open with pstats, snakeviz or
+flameprof) or as plain text; that endpoint requires PROFILE_SECRET and
+answers 404 without it. When neither variable is set the profiler is not
+created at all and requests pay nothing.
+
+Sign a request from the shell:
+    python profiling.py sign
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import secrets
+import sys
+import threading
+import time
+
+SIGNATURE_MAX_AGE = 300
+
+
+def sign(secret, timestamp=None, nonce=None):
+    """Build an X-Profile-Signature header value"""
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    nonce = nonce if nonce is not None else secrets.token_hex(8)
+    message = f'{timestamp}.{nonce}'
+    digest = hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f'{message}.{digest}'
+
+
+class RequestProfiler:
+    """Samples requests under cProfile and aggregates their stats"""
+
+    def __init__(self, sample_rate=0.0, secret=None):
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self._stats = None
+        self._lock = threading.Lock()
+        self._seen_nonces = {}
+        self.profiled = 0
+        self.started_at = time.time()
+
+    def _signed(self, header):
+        if not header or not self.secret:
+            return False
+        try:
+            timestamp, nonce, digest = header.split('.')
+            now = time.time()
+            age = abs(now - int(timestamp))
+        except ValueError:
+            return False
+        if age > SIGNATURE_MAX_AGE or not hmac.compare_digest(sign(self.secret, timestamp, nonce), header):
+            return False
+        # Only a genuine signature reaches here, so the nonce table is bounded
+        # by how often the secret's holders sign, and pruned past the max age
+        with self._lock:
+            for seen, signed_at in list(self._seen_nonces.items()):
+                if now - signed_at > SIGNATURE_MAX_AGE:
+                    del self._seen_nonces[seen]
+            if nonce in self._seen_nonces:
+                return False
+            self._seen_nonces[nonce] = int(timestamp)
+        return True
+
+    def start(self, signature=None, sample=True):
+        """
+        Start a profiler for this request if it is signed, or if sample is
+        True and it falls in the sampled fraction
+        """
+        sampled = sample and self.sample_rate and random.random() < self.sample_rate
+        if not (self._signed(signature) or sampled):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile):
+        """Stop a request's profiler and merge its stats into the aggregate"""
+        profile.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.profiled += 1
+
+    def authorized(self, token):
+        return bool(self.secret) and hmac.compare_digest(self.secret, token or '')
+
+    def dump(self):
+        """Aggregated stats in the pstats file format (what Stats.dump_stats writes)"""
+        with self._lock:
+            if self._stats is None:
+                return None
+            return marshal.dumps(self._stats.stats)
+
+    def text(self, sort='cumulative', limit=40):
+        """Human-readable top functions"""
+        with self._lock:
+            if self._stats is None:
+                return 'No requests profiled yet\n'
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+            self._stats.stream = sys.stdout
+        return out.getvalue()
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+            self.profiled = 0
+            self.started_at = time.time()
+
+    def summary(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'signed_requests': bool(self.secret),
+            'profiled': self.profiled,
+            'since': self.started_at,
+        }
+
+
+def profiler_from_env():
+    """RequestProfiler configured from the environment, or None when switched off"""
+    sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    secret = os.environ.get('PROFILE_SECRET') or None
+    if sample_rate <= 0 and secret is None:
+        return None
+    if secret is None:
+        print("⚠️ PROFILE_SAMPLE_RATE is set without PROFILE_SECRET; /admin/profile stays disabled")
+    return RequestProfiler(sample_rate=min(sample_rate, 1.0), secret=secret)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'sign':
+        secret = os.environ.get('PROFILE_SECRET')
+        if not secret:
+            print("❌ Set PROFILE_SECRET first")
+            sys.exit(1)
+        print(f"X-Profile-Signature: {sign(secret)}")
+    else:
+        print("Usage: PROFILE_SECRET=... python profiling.py sign")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Shadow / A-B scoring of candidate models on live traffic
+
+The primary model and every candidate are linear, so their coefficients are
+stacked into one (n_models x n_features) matrix and a single matrix-vector
+product scores all of them. The caller only ever sees the primary's
+prediction; candidates are compared against it (disagreement) and, once
+realized closes arrive, against the truth (rolling error metrics).
+
+Configure candidates with SHADOW_MODELS, a comma-separated list of
+name=path entries (or bare paths, named after the file):
+    SHADOW_MODELS=ridge=ridge_model.pkl,lasso_model.pkl python app.py
+"""
+
+import os
+import threading
+import joblib
+import numpy as np
+from accuracy_tracker import AccuracyTracker
+
+
+def parse_shadow_models(spec):
+    """Turn 'a=path1,path2' into [('a', 'path1'), ('path2-stem', 'path2')]"""
+    entries = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        if '=' in item:
+            name, path = item.split('=', 1)
+        else:
+            path = item
+            name = os.path.splitext(os.path.basename(item))[0]
+        entries.append((name.strip(), path.strip()))
+    return entries
+
+
+def _aligned_coef(model, feature_names):
+    """Model coefficients re-ordered to the serving feature order"""
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    names = list(getattr(model, 'feature_names_in_', feature_names))
+    if len(names) != len(coef):
+        raise ValueError(f'Model has {len(coef)} coefficients but {len(names)} feature names')
+
+    position = {name: i for i, name in enumerate(feature_names)}
+    missing = [name for name in names if name not in position]
+    if missing:
+        raise ValueError(f'Model uses features the app does not build: {missing}')
+
+    # Features the candidate doesn't use get a zero weight
+    aligned = np.zeros(len(feature_names))
+    for name, value in zip(names, coef):
+        aligned[position[name]] = value
+    return aligned
+
+
+class ModelStack:
+    """Several linear models evaluated with one matrix product"""
+
+    def __init__(self, models, feature_names):
+        self.names = [name for name, _ in models]
+        self.feature_names = list(feature_names)
+        self.coef = np.vstack([_aligned_coef(model, self.feature_names) for _, model in models])
+        self.intercept = np.array([float(model.intercept_) for _, model in models])
+
+    def predict(self, vector):
+        """Predictions of every model for one feature vector (primary first)"""
+        return self.coef @ vector + self.intercept
+
+    def predict_many(self, X):
+        """Predictions of every model for a batch, shape (n_rows, n_models)"""
+        return X @ self.coef.T + self.intercept
+
+
+class ShadowScorer:
+    """Primary plus shadow candidates with in-memory comparison statistics"""
+
+    def __init__(self, primary, candidates, feature_names, window=250):
+        candidates = list(candidates)
+        names = [name for name, _ in candidates]
+        if 'primary' in names:
+            raise ValueError("'primary' is reserved for the serving model; rename the candidate")
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f'Duplicate shadow model names: {duplicates}')
+        self.stack = ModelStack([('primary', primary)] + candidates, feature_names)
+        n_candidates = len(self.stack.names) - 1
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._sum_diff = np.zeros(n_candidates)
+        self._sum_abs_diff = np.zeros(n_candidates)
+        self._sum_sq_diff = np.zeros(n_candidates)
+        self._max_abs_diff = np.zeros(n_candidates)
+        self.trackers = {name: AccuracyTracker(window=window) for name in self.stack.names}
+
+    @classmethod
+    def from_spec(cls, primary, spec, feature_names, window=250):
+        candidates = [(name, joblib.load(path)) for name, path in parse_shadow_models(spec)]
+        return cls(primary, candidates, feature_names, window=window)
+
+    def predict(self, vector, symbol=None, date=None, reference=None, record=True):
+        """Score every model, record the comparison, return the primary's prediction"""
+        predictions = self.stack.predict(vector)
+        if not record:
+            return float(predictions[0])
+        diff = predictions[1:] - predictions[0]
+        with self._lock:
+            self.requests += 1
+            self._sum_diff += diff
+            self._sum_abs_diff += np.abs(diff)
+            self._sum_sq_diff += diff * diff
+            np.maximum(self._max_abs_diff, np.abs(diff), out=self._max_abs_diff)
+        if date is not None:
+            for name, value in zip(self.stack.names, predictions):
+                self.trackers[name].record_prediction(symbol, date, float(value), reference)
+        return float(predictions[0])
+
+    def predict_many(self, X, symbols=None, date=None, references=None, record=True):
+        """Batch version of predict: one matrix product, returns the primary's predictions"""
+        predictions = self.stack.predict_many(X)
+        if not record or len(predictions) == 0:
+            return predictions[:, 0]
+        diff = predictions[:, 1:] - predictions[:, :1]
+        with self._lock:
+            self.requests += len(predictions)
+            self._sum_diff += diff.sum(axis=0)
+            self._sum_abs_diff += np.abs(diff).sum(axis=0)
+            self._sum_sq_diff += (diff * diff).sum(axis=0)
+            np.maximum(self._max_abs_diff, np.abs(diff).max(axis=0), out=self._max_abs_diff)
+        if date is not None:
+            for j, name in enumerate(self.stack.names):
+                for i, symbol in enumerate(symbols):
+                    self.trackers[name].record_prediction(symbol, date, float(predictions[i, j]), references[i])
+        return predictions[:, 0]
+
+    def record_actual(self, symbol, date, actual):
+        for tracker in self.trackers.values():
+            tracker.record_actual(symbol, date, actual)
+
+    def stats(self):
+        """Disagreement with the primary and realized accuracy per model"""
+        with self._lock:
+            n = self.requests
+            sums = (self._sum_diff.copy(), self._sum_abs_diff.copy(),
+                    self._sum_sq_diff.copy(), self._max_abs_diff.copy())
+
+        models = {'primary': {'accuracy': self.trackers['primary'].metrics()}}
+        for i, name in enumerate(self.stack.names[1:]):
+            sum_diff, sum_abs, sum_sq, max_abs = (s[i] for s in sums)
+            models[name] = {
+                'mean_diff': round(sum_diff / n, 4) if n else None,
+                'mean_abs_diff': round(sum_abs / n, 4) if n else None,
+                'rms_diff': round((sum_sq / n) ** 0.5, 4) if n else None,
+                'max_abs_diff': round(max_abs, 4),
+                'accuracy': self.trackers[name].metrics(),
+            }
+        return {'requests': n, 'models': models}
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Shared-memory model and feature state for multi-worker serving
+
+One process (the writer) creates the memory-mapped file and publishes the
+model weights; every worker maps the same file and publishes the latest
+per-symbol feature vectors it computes, so the state costs one copy in the
+page cache no matter how many workers are running, and all of them see the
+same values.
+
+Layout of the region:
+    [0, 4096)        JSON metadata (feature names, capacity, model version)
+    control          int64[8]   seq, n_symbols, updated_at_ns, model_id, ...
+    weights          float64[n_features + 1]   intercept, coef...
+    symbols          S16[max_symbols]
+    features         float64[max_symbols, n_features]
+    updated          float64[max_symbols]   unix time of last publish
+
+Writes are guarded by a sequence counter (seqlock): a writer bumps it to an
+odd value, writes, then bumps it to the next even value. Readers retry if the
+counter was odd or changed while they were reading. Writers in different
+processes are serialized by an flock on <path>.wlock (without fcntl only the
+writer process publishes).
+
+model_id is a hash of the model version, stamped together with the weights.
+A worker only treats the region as ready while it holds its own model's
+weights, and re-maps it when the writer has swapped in a new file (a new
+inode), so a worker never serves a previous deploy's weights or layout. The
+file is stat'ed at most once per check_interval seconds, so a swap is picked
+up within that window instead of costing a syscall on every request.
+
+Symbols are stored as at most 16 UTF-8 bytes; longer ones raise ValueError
+rather than being truncated into another symbol's row.
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the SHARED_STATE_WRITER variable
+    fcntl = None
+
+META_SIZE = 4096
+CONTROL_SLOTS = 8
+SYMBOL_DTYPE = 'S16'
+LAYOUT_VERSION = 1
+
+# Control slots
+SEQ = 0
+N_SYMBOLS = 1
+UPDATED_AT = 2
+MODEL_ID = 3
+
+
+def model_id(model_version):
+    """Non-zero int64 stamp of a model version"""
+    digest = hashlib.sha256(str(model_version).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little', signed=True) or 1
+
+
+def _align(offset, alignment=64):
+    """Round an offset up to the next multiple of alignment"""
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SharedModelState:
+    """Memory-mapped region holding model weights and latest per-symbol features"""
+
+    def __init__(self, path, feature_names=None, max_symbols=1024, model_version='', writer=None,
+                 check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        self.is_writer = False
+        self._lock_file = None
+        self._write_lock = None
+        self._rows = {}
+        self._mm = None
+        self._identity = None
+        self.expected_features = None if feature_names is None else list(feature_names)
+        self.model_id = model_id(model_version)
+
+        if writer is None:
+            writer = self._acquire_writer_lock()
+        self.is_writer = bool(writer)
+        # Any process can publish features when cross-process locking is available
+        self.can_publish = self.is_writer or fcntl is not None
+        if fcntl is not None:
+            self._write_lock = open(self.path + '.wlock', 'a+')
+
+        if self.is_writer:
+            self._create_or_reuse(list(feature_names), max_symbols, model_version)
+        self._attach()
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+    def _acquire_writer_lock(self):
+        """Become the single writer if nobody else holds the lock"""
+        env = os.environ.get('SHARED_STATE_WRITER')
+        if env is not None:
+            return env == '1'
+        if fcntl is None:
+            return False
+        lock_file = open(self.path + '.lock', 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Keep the handle open for the lifetime of the process
+        self._lock_file = lock_file
+        return True
+
+    @staticmethod
+    def _layout(n_features, max_symbols):
+        """Byte offsets of each block in the region"""
+        control = META_SIZE
+        weights = _align(control + CONTROL_SLOTS * 8)
+        symbols = _align(weights + (n_features + 1) * 8)
+        features = _align(symbols + max_symbols * np.dtype(SYMBOL_DTYPE).itemsize)
+        updated = _align(features + max_symbols * n_features * 8)
+        total = _align(updated + max_symbols * 8)
+        return {
+            'control': control,
+            'weights': weights,
+            'symbols': symbols,
+            'features': features,
+            'updated': updated,
+            'total': total,
+        }
+
+    @staticmethod
+    def _read_meta(path):
+        """Read the JSON metadata block, or None if the file is not usable"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read(META_SIZE)
+            return json.loads(raw.rstrip(b'\0').decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _create_or_reuse(self, feature_names, max_symbols, model_version):
+        """Create the region, or keep an existing one with the same layout"""
+        meta = self._read_meta(self.path)
+        if (meta is not None and meta.get('layout_version') == LAYOUT_VERSION
+                and meta.get('feature_names') == feature_names
+                and meta.get('max_symbols') == max_symbols):
+            if meta.get('model_version') == model_version:
+                return
+            # Same layout, new model: rewrite the metadata in place
+            meta['model_version'] = model_version
+            self._write_meta(self.path, meta)
+            return
+
+        meta = {
+            'layout_version': LAYOUT_VERSION,
+            'feature_names': feature_names,
+            'max_symbols': max_symbols,
+            'model_version': model_version,
+        }
+        layout = self._layout(len(feature_names), max_symbols)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.truncate(layout['total'])
+        self._write_meta(tmp_path, meta)
+        # Atomic swap so readers never map a half-written file
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _write_meta(path, meta):
+        raw = json.dumps(meta).encode('utf-8')
+        if len(raw) > META_SIZE:
+            raise ValueError('Shared state metadata does not fit in the header block')
+        with open(path, 'r+b') as f:
+            f.write(raw.ljust(META_SIZE, b'\0'))
+
+    @staticmethod
+    def _file_identity(stat):
+        return stat.st_dev, stat.st_ino
+
+    def _stale(self):
+        """True if nothing is mapped or the file was replaced since it was mapped"""
+        if self._mm is None:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            return self._file_identity(os.stat(self.path)) != self._identity
+        except OSError:
+            return True
+
+    def _attach(self):
+        """(Re)map the region; readers retry lazily until a compatible one exists"""
+        try:
+            with open(self.path, 'r+b' if self.can_publish else 'rb') as f:
+                identity = self._file_identity(os.fstat(f.fileno()))
+                meta = json.loads(f.read(META_SIZE).rstrip(b'\0').decode('utf-8'))
+                if self.expected_features is not None and meta['feature_names'] != self.expected_features:
+                    # A region for another feature layout: unusable until the writer replaces it
+                    self._mm = None
+                    return False
+                layout = self._layout(len(meta['feature_names']), meta['max_symbols'])
+                mm = np.memmap(f, dtype=np.uint8, mode='r+' if self.can_publish else 'r',
+                               shape=(layout['total'],))
+        except (OSError, ValueError, KeyError):
+            self._mm = None
+            return False
+
+        self.feature_names = meta['feature_names']
+        self.max_symbols = meta['max_symbols']
+        self.model_version = meta.get('model_version', '')
+        n_features = len(self.feature_names)
+        self._mm = mm
+        self._identity = identity
+        self._checked_at = time.monotonic()
+        buf = self._mm
+        self.control = np.ndarray((CONTROL_SLOTS,), np.int64, buf, layout['control'])
+        self.weights = np.ndarray((n_features + 1,), np.float64, buf, layout['weights'])
+        self.symbols = np.ndarray((self.max_symbols,), SYMBOL_DTYPE, buf, layout['symbols'])
+        self.features = np.ndarray((self.max_symbols, n_features), np.float64, buf, layout['features'])
+        self.updated = np.ndarray((self.max_symbols,), np.float64, buf, layout['updated'])
+        self._rows = {}
+        return True
+
+    def _current(self):
+        """Map (or re-map after a swap) the region; True if it is usable"""
+        return not self._stale() or self._attach()
+
+    @property
+    def ready(self):
+        """True while the mapped region is current and holds this worker's model weights"""
+        return self._current() and int(self.control[MODEL_ID]) == self.model_id
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _writing(self):
+        """One seqlock write, serialized across processes"""
+        if not self.can_publish:
+            raise PermissionError('Only the writer process can update shared state')
+        if self._write_lock is not None:
+            fcntl.flock(self._write_lock, fcntl.LOCK_EX)
+        self.control[SEQ] += 1
+        try:
+            yield
+        finally:
+            self.control[UPDATED_AT] = time.time_ns()
+            self.control[SEQ] += 1
+            if self._write_lock is not None:
+                fcntl.flock(self._write_lock, fcntl.LOCK_UN)
+
+    def publish_model(self, coef, intercept):
+        """Publish model weights (stamped with this model's id) to all workers"""
+        if not self.is_writer:
+            raise PermissionError('Only the writer process can publish the model')
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        if coef.shape[0] != len(self.feature_names):
+            raise ValueError(f'Expected {len(self.feature_names)} coefficients, got {coef.shape[0]}')
+        with self._writing():
+            self.weights[0] = float(intercept)
+            self.weights[1:] = coef
+            self.control[MODEL_ID] = self.model_id
+
+    def publish_features(self, symbol, vector):
+        """
+        Publish the latest feature vector for a symbol. Skipped (False) when
+        this process can't write or the region belongs to another model.
+        """
+        if not self.can_publish or not self.ready:
+            return False
+        with self._writing():
+            row = self._row_for(symbol, create=True)
+            self.features[row] = vector
+            self.updated[row] = time.time()
+        return True
+
+    # ------------------------------------------------------------------
+    # Reader side
+    # ------------------------------------------------------------------
+    def _row_for(self, symbol, create=False):
+        """
+        Row index for a symbol; rows are append-only so the cache never goes
+        stale. create=True must be called inside _writing().
+        """
+        row = self._rows.get(symbol)
+        if row is not None:
+            return row
+
+        key = symbol.encode('utf-8')
+        if len(key) > np.dtype(SYMBOL_DTYPE).itemsize:
+            raise ValueError(f'Symbol {symbol!r} is longer than {np.dtype(SYMBOL_DTYPE).itemsize} bytes')
+        n = int(self.control[N_SYMBOLS])
+        for i in range(len(self._rows), n):
+            self._rows[self.symbols[i].decode('utf-8')] = i
+        row = self._rows.get(symbol)
+        if row is not None or not create:
+            return row
+
+        if n >= self.max_symbols:
+            raise MemoryError(f'Shared state is full ({self.max_symbols} symbols)')
+        self.symbols[n] = key
+        self.control[N_SYMBOLS] = n + 1
+        self._rows[symbol] = n
+        return n
+
+    def _consistent(self, read):
+        """Run read() until it observes a stable, even sequence number"""
+        while True:
+            seq = int(self.control[SEQ])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            result = read()
+            if int(self.control[SEQ]) == seq:
+                return result
+
+    def _with_weights(self, compute):
+        """compute() over a consistent view of this model's shared weights"""
+        if not self.ready:
+            raise RuntimeError('Shared weights for this model version have not been published')
+        result = self._consistent(
+            lambda: compute() if int(self.control[MODEL_ID]) == self.model_id else None)
+        if result is None:
+            raise RuntimeError('Shared weights were replaced by another model version')
+        return result
+
+    def predict(self, vector):
+        """Linear prediction straight from the shared weights (no copy)"""
+        return self._with_weights(lambda: float(self.weights[0] + np.dot(self.weights[1:], vector)))
+
+    def predict_many(self, X):
+        """Linear predictions for a (n_rows, n_features) batch"""
+        return self._with_weights(lambda: X @ self.weights[1:] + self.weights[0])
+
+    def read_features(self, symbol):
+        """Latest feature vector and publish time for a symbol, or (None, None)"""
+        if not self._current():
+            return None, None
+        row = self._row_for(symbol)
+        if row is None:
+            return None, None
+        return self._consistent(lambda: (self.features[row].copy(), float(self.updated[row])))
+
+    def summary(self):
+        """Small description of the region for health checks"""
+        if not self._current():
+            return {'attached': False, 'path': self.path}
+        return {
+            'attached': True,
+            'ready': self.ready,
+            'path': self.path,
+            'writer': self.is_writer,
+            'model_version': self.model_version,
+            'symbols': int(self.control[N_SYMBOLS]),
+            'max_symbols': self.max_symbols,
+            'updated_at': int(self.control[UPDATED_AT]) / 1e9,
+        }
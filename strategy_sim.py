@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Vectorized trading-strategy simulator for the model's predictions
+
+Turns each predicted next close into a long / short / flat position:
+
+    expected return  e_t = predicted_t / close_t - 1
+    position         sign(e_t) * size   if |e_t| > threshold, else flat
+
+and books the realized next-day return minus transaction costs on every
+change of position. Instead of looping over parameter combinations, the
+whole grid (thresholds × costs × sizes) is evaluated as one broadcast
+array of shape (n_thresholds, n_costs, n_sizes, n_days).
+
+    python strategy_sim.py history.csv
+    python strategy_sim.py history.csv --thresholds 0,0.001,0.002,0.005 --costs 0,5,10 --long-only
+    python strategy_sim.py bars/ --symbol SPX --start 2015-01-01
+"""
+
+import argparse
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def simulate_grid(predicted, close, next_close, thresholds, costs_bps, sizes,
+                  allow_short=True):
+    """
+    Evaluate every (threshold, cost, size) combination at once.
+
+    predicted/close/next_close are aligned (n_days,) arrays: the prediction
+    made at the close of day t for day t+1, day t's close and day t+1's
+    close. Costs are in basis points of traded notional. Returns a dict of
+    (n_thresholds, n_costs, n_sizes) metric arrays. A day that loses 100% or
+    more (possible with leveraged sizes) wipes the account out: its loss is
+    clipped to -100%, equity stays at zero and 'ruined' is set.
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    next_close = np.asarray(next_close, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)[:, None, None, None]
+    costs = np.asarray(costs_bps, dtype=np.float64)[None, :, None, None] / 1e4
+    sizes = np.asarray(sizes, dtype=np.float64)[None, None, :, None]
+
+    expected = predicted / close - 1.0
+    realized = next_close / close - 1.0
+
+    direction = np.sign(expected)
+    if not allow_short:
+        direction = np.maximum(direction, 0.0)
+    # (n_thresholds, 1, 1, n_days) signal, scaled by size
+    signal = np.where(np.abs(expected) > thresholds, direction, 0.0)
+    position = signal * sizes
+
+    turnover = np.abs(np.diff(position, axis=-1, prepend=0.0))
+    pnl = position * realized - costs * turnover
+    ruined = (pnl <= -1.0).any(axis=-1)
+    pnl = np.maximum(pnl, -1.0)
+
+    equity = np.cumprod(1.0 + pnl, axis=-1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1.0
+
+    mean = pnl.mean(axis=-1)
+    std = pnl.std(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), 0.0)
+
+    active = position != 0
+    n_active = active.sum(axis=-1)
+    hits = (active & (position * realized > 0)).sum(axis=-1)
+
+    metrics = {
+        'total_return': equity[..., -1] - 1.0,
+        'annual_return': (1.0 + mean) ** TRADING_DAYS - 1.0,
+        'sharpe': sharpe,
+        'max_drawdown': drawdown.min(axis=-1),
+        'hit_rate': np.where(n_active > 0, hits / np.maximum(n_active, 1), np.nan),
+        'trades': (turnover > 0).sum(axis=-1),
+        'exposure': n_active / pnl.shape[-1],
+        'ruined': ruined,
+    }
+    # Trades, hit rate and exposure don't depend on cost; give every metric the full grid shape
+    return {name: np.broadcast_to(values, pnl.shape[:-1]) for name, values in metrics.items()}
+
+
+def grid_table(metrics, thresholds, costs_bps, sizes):
+    """Flatten the metric cube into a DataFrame, one row per combination"""
+    import pandas as pd
+
+    t, c, s = np.meshgrid(thresholds, costs_bps, sizes, indexing='ij')
+    table = pd.DataFrame({
+        'threshold': t.ravel(),
+        'cost_bps': c.ravel(),
+        'size': s.ravel(),
+    })
+    for name, values in metrics.items():
+        table[name] = np.asarray(values).ravel()
+    return table
+
+
+def _floats(text):
+    return [float(x) for x in text.split(',')]
+
+
+def main():
+    import joblib
+    from bar_store import load_history
+    from indicators import feature_table
+
+    parser = argparse.ArgumentParser(description='Backtest the model as a trading signal')
+    parser.add_argument('history', help='Daily OHLC history CSV or bar store directory')
+    parser.add_argument('--symbol', default='SPX', help='Symbol to read from a bar store')
+    parser.add_argument('--start', help='First date to use (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date to use (YYYY-MM-DD)')
+    parser.add_argument('--model', default='linear_regression_model.pkl')
+    parser.add_argument('--thresholds', type=_floats, default=list(np.linspace(0, 0.01, 21)))
+    parser.add_argument('--costs', type=_floats, default=[0, 1, 2, 5, 10], help='Basis points')
+    parser.add_argument('--sizes', type=_floats, default=[0.5, 1.0, 2.0])
+    parser.add_argument('--long-only', action='store_true')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='Write the full grid to this CSV')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    table = feature_table(*load_history(args.history, args.symbol, args.start, args.end))
+    X = table[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+    predicted = X @ np.asarray(model.coef_, dtype=np.float64) + model.intercept_
+
+    metrics = simulate_grid(predicted, table['close'].to_numpy(), table['target'].to_numpy(),
+                            args.thresholds, args.costs, args.sizes, allow_short=not args.long_only)
+    results = grid_table(metrics, args.thresholds, args.costs, args.sizes)
+
+    print("📈 Strategy simulation")
+    print("=" * 60)
+    print(f"   • Days: {len(table):,}   Combinations: {len(results):,}")
+    print(f"\n🏆 Best by Sharpe:")
+    print(results.sort_values('sharpe', ascending=False).head(args.top).to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n💾 Full grid saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
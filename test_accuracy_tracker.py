@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the rolling accuracy tracker matches sklearn's metrics
+"""
+
+import numpy as np
+from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from accuracy_tracker import AccuracyTracker, RollingAccuracy
+
+def test_rolling_metrics_match_sklearn():
+    """Rolling sums should agree with a full recomputation over the window"""
+    print("🧪 Testing rolling metrics against sklearn")
+
+    rng = np.random.default_rng(0)
+    predicted = 4500 + rng.normal(0, 50, 1000)
+    actual = predicted + rng.normal(0, 20, 1000)
+
+    rolling = RollingAccuracy(window=100)
+    for p, a in zip(predicted, actual):
+        rolling.add(p, a)
+
+    metrics = rolling.metrics()
+    window_pred, window_actual = predicted[-100:], actual[-100:]
+    mape = np.mean(np.abs((window_actual - window_pred) / window_actual)) * 100
+
+    print(f"   • R²:   {metrics['r2_score']} vs {r2_score(window_actual, window_pred):.3f}")
+    print(f"   • MAE:  {metrics['mae']} vs {mean_absolute_error(window_actual, window_pred):.2f}")
+
+    assert metrics['samples'] == 100
+    assert abs(metrics['r2_score'] - r2_score(window_actual, window_pred)) < 1e-3
+    assert abs(metrics['mae'] - mean_absolute_error(window_actual, window_pred)) < 1e-2
+    assert abs(metrics['rmse'] - np.sqrt(mean_squared_error(window_actual, window_pred))) < 1e-2
+    assert abs(metrics['mape'] - mape) < 1e-2
+
+def test_tracker_matches_predictions_to_actuals():
+    """Only predictions with a realized close should be scored"""
+    print("🧪 Testing prediction/actual matching")
+
+    tracker = AccuracyTracker(window=10)
+    assert tracker.metrics() is None
+
+    tracker.record_prediction('SPX', '2024-08-05', 4510.0, reference=4500.0)
+    tracker.record_prediction('SPX', '2024-08-06', 4490.0, reference=4500.0)
+    assert tracker.record_actual('SPX', '2024-08-05', 4520.0)
+    assert not tracker.record_actual('SPX', '2024-08-07', 4520.0)
+
+    metrics = tracker.metrics()
+    print(f"   • Metrics: {metrics}")
+    assert metrics['samples'] == 1
+    assert metrics['pending'] == 1
+    assert metrics['mae'] == 10.0
+    assert metrics['directional_accuracy'] == 100.0
+
+def test_sources_are_kept_apart():
+    """/predict and /bars predictions for the same day are each scored in their own window"""
+    print("🧪 Testing per-source accuracy windows")
+
+    tracker = AccuracyTracker(window=10)
+    tracker.record_prediction('SPX', '2024-08-05', 4510.0, reference=4500.0)
+    tracker.record_prediction('SPX', '2024-08-05', 4560.0, reference=4500.0, source='bars')
+    assert tracker.metrics() is None
+    assert tracker.record_actual('SPX', '2024-08-05', 4520.0)
+
+    metrics = tracker.metrics()
+    print(f"   • Sources: {sorted(metrics['sources'])}")
+    assert metrics['source'] == 'predict' and metrics['pending'] == 0
+    assert metrics['samples'] == 1 and metrics['mae'] == 10.0
+    assert metrics['sources']['predict']['mae'] == 10.0
+    assert metrics['sources']['bars']['mae'] == 40.0
+    assert metrics['sources']['bars']['samples'] == 1
+
+    # Before any /predict prediction is settled, the bar pipeline is the headline
+    bars_only = AccuracyTracker(window=10)
+    bars_only.record_prediction('SPX', '2024-08-05', 4560.0, source='bars')
+    bars_only.record_prediction('SPX', '2024-08-06', 4500.0)
+    bars_only.record_actual('SPX', '2024-08-05', 4520.0)
+    metrics = bars_only.metrics()
+    assert metrics['source'] == 'bars' and list(metrics['sources']) == ['bars']
+    assert metrics['pending'] == 1 and metrics['sources']['bars']['pending'] == 0
+
+    # Checkpoints keep each source's window and pending predictions
+    tracker.record_prediction('SPX', '2024-08-06', 4540.0, source='bars')
+    meta, arrays = tracker.checkpoint()
+    assert sorted(arrays) == ['bars', 'predict']
+    restored = AccuracyTracker(window=10)
+    assert restored.restore(meta, arrays)
+    assert restored.metrics() == tracker.metrics()
+    assert restored.record_actual('SPX', '2024-08-06', 4550.0)
+    assert restored.metrics()['sources']['bars']['samples'] == 2
+    assert restored.metrics()['sources']['predict']['samples'] == 1
+    assert not AccuracyTracker(window=10).restore(meta, arrays, same_model=False)
+
+if __name__ == "__main__":
+    test_rolling_metrics_match_sklearn()
+    test_tracker_matches_predictions_to_actuals()
+    test_sources_are_kept_apart()
+    print("\n🎉 All accuracy tracker tests passed!")
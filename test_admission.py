@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify admission control and per-client rate limiting
+"""
+
+import threading
+import time
+from admission import AdmissionController, TokenBucketLimiter
+
+def test_admission_queue_and_shedding():
+    """Slots are capped, waiters are admitted on release, and overflow is shed"""
+    print("🧪 Testing admission control")
+
+    admission = AdmissionController(max_concurrent=2, max_queue=1, queue_timeout=0.05)
+    assert admission.acquire() and admission.acquire()
+    assert admission.status == 'busy'
+
+    # A queued request times out when no slot frees up
+    assert not admission.acquire()
+    assert admission.rejected_timeout == 1 and admission.status == 'saturated'
+
+    # A queued request gets the slot released while it waits
+    admission.queue_timeout = 1.0
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(admission.acquire()))
+    waiter.start()
+    while admission.waiting == 0:
+        time.sleep(0.001)
+    # The queue holds one request, so the next one is rejected immediately
+    assert not admission.acquire()
+    assert admission.rejected_queue_full == 1
+    admission.release()
+    waiter.join(timeout=1)
+    assert results == [True] and admission.active == 2
+
+    admission.release()
+    admission.release()
+    stats = admission.stats()
+    assert stats['active'] == 0 and stats['admitted'] == 3
+
+def test_token_buckets():
+    """Each client gets its burst, then refills at the configured rate"""
+    print("🧪 Testing token buckets")
+
+    limiter = TokenBucketLimiter(rate=20, burst=3, max_clients=2)
+    assert all(limiter.allow('a')[0] for _ in range(3))
+    allowed, wait = limiter.allow('a')
+    assert not allowed and 0 < wait <= 0.05
+    # Other clients have their own buckets
+    assert limiter.allow('b')[0]
+
+    time.sleep(wait + 0.01)
+    assert limiter.allow('a')[0]
+
+    # The least recently seen client is evicted past max_clients
+    limiter.allow('c')
+    assert limiter.stats()['clients'] == 2 and 'b' not in limiter._buckets
+    assert limiter.stats()['limited'] == 1
+
+if __name__ == "__main__":
+    test_admission_queue_and_shedding()
+    test_token_buckets()
+    print("\n🎉 All admission tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script to keep the /predict hot path within its allocation budgets
+"""
+
+import os
+os.environ.setdefault('AUDIT_LOG_PATH', '')
+os.environ.setdefault('WARMUP', '0')
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import app
+import alloc_budget
+
+FEATURE_NAMES = list(app.build_features(4500.0, 4520.0, 4480.0).keys())
+
+def fitted_model():
+    """A LinearRegression with the production feature layout"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(64, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+    model = LinearRegression()
+    model.fit(X, rng.normal(4500, 50, 64))
+    return model
+
+def check_budget(path, result):
+    budget = alloc_budget.BUDGETS[path]
+    print(f"   • {path}: peak {result['peak']:,} / {budget['peak']:,} bytes, "
+          f"net {result['net']:,} / {budget['net']:,} bytes")
+    failures = alloc_budget.over_budget({path: result}, {path: budget})
+    assert not failures, f"Allocation budget exceeded: {failures}"
+
+def test_build_features_budget():
+    """Building one feature row should stay small"""
+    check_budget('build_features', alloc_budget.measure_build_features(app))
+
+def test_predict_request_budget():
+    """A full /predict dispatch should stay within budget"""
+    original = app.model
+    app.model = fitted_model()
+    try:
+        check_budget('predict_request', alloc_budget.measure_predict_request(app))
+    finally:
+        app.model = original
+
+def test_batch_row_budget():
+    """Each row of a batch should cost a bounded number of bytes"""
+    original = app.model
+    app.model = fitted_model()
+    try:
+        check_budget('batch_row', alloc_budget.measure_batch_row(app))
+    finally:
+        app.model = original
+
+def test_measure_without_reset_peak():
+    """Python 3.8 (the Docker image) has no tracemalloc.reset_peak()"""
+    import tracemalloc
+    reset_peak = getattr(tracemalloc, 'reset_peak', None)
+    if reset_peak is not None:
+        del tracemalloc.reset_peak
+    try:
+        result = alloc_budget.measure(lambda _: bytearray(100_000), repeat=5)
+    finally:
+        if reset_peak is not None:
+            tracemalloc.reset_peak = reset_peak
+    assert 100_000 <= result['peak'] < 200_000 and result['net'] < 10_000
+
+if __name__ == "__main__":
+    print("🧪 Checking hot-path allocation budgets")
+    test_build_features_budget()
+    test_predict_request_budget()
+    test_batch_row_budget()
+    test_measure_without_reset_peak()
+    print("\n🎉 All paths within budget!")
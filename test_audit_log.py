@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the write-behind audit log: batching, drops and flushing
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from audit_log import AuditLogger
+
+def make_logger(**kwargs):
+    return AuditLogger(os.path.join(tempfile.mkdtemp(), 'audit.db'), flush_interval=0.01, **kwargs)
+
+def hold_writer(logger):
+    """Make the writer block on its first batch until the returned event is set; records batch sizes"""
+    release, taken, sizes = threading.Event(), threading.Event(), []
+    write = logger._write
+
+    def gated(conn, batch):
+        sizes.append(len(batch))
+        taken.set()
+        release.wait(5)
+        write(conn, batch)
+
+    logger._write = gated
+    return release, taken, sizes
+
+def stored_rows(logger):
+    conn = sqlite3.connect(logger.path)
+    try:
+        return conn.execute('SELECT symbol, output FROM predictions ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+def test_batching_and_final_flush():
+    """Records queued while the writer is busy go out in batch_size batches; close() flushes the rest"""
+    print("🧪 Testing audit batching")
+
+    logger = make_logger(batch_size=10)
+    release, taken, sizes = hold_writer(logger)
+    logger.log('SPX', 'v1', {'open': 1.0}, {'f': 1.0}, 0.0)
+    assert taken.wait(5)
+    for i in range(1, 25):
+        assert logger.log('SPX', 'v1', {'open': 1.0}, {'f': 1.0}, float(i))
+    release.set()
+    logger.close()
+
+    assert sizes == [1, 10, 10, 4]
+    assert logger.stats()['written'] == 25 and logger.stats()['batches'] == 4
+    assert [output for _, output in stored_rows(logger)] == [float(i) for i in range(25)]
+
+def test_queue_full_drops():
+    """A full queue sheds records instead of blocking the request"""
+    print("🧪 Testing audit backpressure")
+
+    logger = make_logger(max_queue=2)
+    release, taken, _ = hold_writer(logger)
+    logger.log('SPX', 'v1', {}, {}, 0.0)
+    assert taken.wait(5)
+    results = [logger.log('SPX', 'v1', {}, {}, float(i)) for i in range(1, 5)]
+    assert results == [True, True, False, False]
+    release.set()
+    logger.close()
+    stats = logger.stats()
+    assert stats['dropped'] == 2 and stats['written'] == 3 and stats['enqueued'] == 3
+
+def test_bad_record_keeps_writer_alive():
+    """An unserializable record is counted and skipped; later records are still written"""
+    print("🧪 Testing audit error handling")
+
+    logger = make_logger()
+    logger.log('BAD', 'v1', {}, {'f': object()}, 0.0)
+    logger.log('SPX', 'v1', {}, {'f': 1.0}, 1.0)
+    logger.close()
+    assert not logger._thread.is_alive()
+    assert logger.stats()['errors'] == 1
+    assert stored_rows(logger) == [('SPX', 1.0)]
+
+    # The writer survives errors that reach the database too
+    logger = make_logger()
+    logger.log('SPX', 'v1', {}, {}, object())
+    logger.log('SPX', 'v1', {}, {}, 2.0)
+    logger.close()
+    assert logger.stats()['errors'] == 1 and stored_rows(logger) == [('SPX', 2.0)]
+
+if __name__ == "__main__":
+    test_batching_and_final_flush()
+    test_queue_full_drops()
+    test_bad_record_keeps_writer_alive()
+    print("\n🎉 All audit log tests passed!")
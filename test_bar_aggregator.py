@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script to verify intraday-to-daily bar aggregation
+"""
+
+import numpy as np
+import pandas as pd
+from bar_aggregator import DailyAggregator
+
+def make_prints(n=20000, n_symbols=7, seed=11):
+    rng = np.random.default_rng(seed)
+    # Tue 2024-01-02 through Mon 2024-01-08, so some prints fall on the weekend
+    offsets = np.sort(rng.integers(0, 7 * 24 * 3600, n))
+    timestamps = np.datetime64('2024-01-02T00:00', 's') + offsets.astype('timedelta64[s]')
+    symbols = np.array([f'S{i}' for i in range(n_symbols)])[rng.integers(0, n_symbols, n)]
+    prices = 100 + rng.normal(0, 1, n)
+    volumes = rng.integers(1, 100, n).astype(np.float64)
+    return symbols, timestamps, prices, volumes
+
+def test_bulk_matches_pandas():
+    """Bars from chunked bulk ingestion should equal a pandas groupby"""
+    print("🧪 Testing bulk aggregation against pandas")
+
+    symbols, timestamps, prices, volumes = make_prints()
+    bars = []
+    aggregator = DailyAggregator(on_bars=lambda b: bars.append(pd.DataFrame(b)))
+    ids = aggregator.symbol_ids(list(symbols))
+    for a in range(0, len(ids), 3000):
+        aggregator.add_ticks(ids[a:a + 3000], timestamps[a:a + 3000], prices[a:a + 3000], volumes[a:a + 3000])
+    aggregator.flush()
+    result = pd.concat(bars).sort_values(['symbol', 'date']).reset_index(drop=True)
+
+    df = pd.DataFrame({'symbol': symbols, 'price': prices, 'volume': volumes})
+    df['date'] = np.busday_offset(timestamps.astype('datetime64[D]'), 0, roll='forward')
+    expected = df.groupby(['symbol', 'date']).agg(
+        open=('price', 'first'), high=('price', 'max'), low=('price', 'min'),
+        close=('price', 'last'), volume=('volume', 'sum'),
+    ).reset_index()
+
+    assert len(result) == len(expected)
+    assert not np.isin(result['date'].to_numpy().astype('datetime64[D]'), np.array(['2024-01-06', '2024-01-07'], dtype='datetime64[D]')).any()
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        assert np.allclose(result[column], expected[column]), column
+
+def test_sessions_close_on_the_calendar():
+    """Sessions close at the closing time; later prints for them are dropped"""
+    print("🧪 Testing session close and late prints")
+
+    bars = []
+    aggregator = DailyAggregator(on_bars=bars.append, holidays=['2024-01-15'], session_close='16:00')
+    aggregator.add_tick('SPX', '2024-01-12T09:30', 4780.0, 10)
+    aggregator.add_tick('SPX', '2024-01-12T15:59', 4790.0, 5)
+    assert aggregator.close_due('2024-01-12T15:59') == 0
+    assert aggregator.close_due('2024-01-12T16:00') == 1
+    assert bars[0]['close'][0] == 4790.0 and bars[0]['volume'][0] == 15
+
+    aggregator.add_tick('SPX', '2024-01-12T16:05', 4795.0)
+    assert aggregator.late_ticks == 1
+
+    # Saturday through the Monday holiday roll into Tuesday's session
+    aggregator.add_tick('SPX', '2024-01-13T10:00', 4800.0)
+    aggregator.add_tick('SPX', '2024-01-15T10:00', 4810.0)
+    aggregator.add_tick('SPX', '2024-01-16T10:00', 4805.0)
+    aggregator.add_tick('SPX', '2024-01-17T10:00', 4820.0)
+    assert str(bars[1]['date'][0]) == '2024-01-16'
+    assert (bars[1]['open'][0], bars[1]['high'][0], bars[1]['close'][0]) == (4800.0, 4810.0, 4805.0)
+
+    state = aggregator.checkpoint()
+    restored = DailyAggregator()
+    restored.restore(*state)
+    assert restored.stats() == aggregator.stats()
+
+if __name__ == "__main__":
+    test_bulk_matches_pandas()
+    test_sessions_close_on_the_calendar()
+    print("\n🎉 All aggregation tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the memory-mapped bar store
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from bar_store import BarStore, load_history
+
+def make_csv(path, n_bars=500, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2020-01-02', np.arange(n_bars))
+    close = 4500 + np.cumsum(rng.normal(0, 20, n_bars))
+    pd.DataFrame({
+        'Date': dates.astype(str),
+        'Open': close - 2,
+        'High': close + 10,
+        'Low': close - 10,
+        'Close': close,
+        'Volume': rng.integers(1e6, 5e6, n_bars),
+    }).to_csv(path, index=False)
+    return dates, close
+
+def test_ingest_slice_and_append():
+    """Store reads should match the CSV, slice by date and only ever append"""
+    print("🧪 Testing bar store ingest and date slicing")
+
+    root = tempfile.mkdtemp()
+    csv_path = os.path.join(root, 'history.csv')
+    dates, close = make_csv(csv_path)
+    store = BarStore(os.path.join(root, 'bars'))
+
+    assert store.ingest_csv(csv_path) == 500
+    assert store.ingest_csv(csv_path) == 0
+    for stored, parsed in zip(load_history(store.root), load_history(csv_path)):
+        assert np.array_equal(stored, parsed)
+
+    window = store.bars('SPX', '2020-03-01', '2020-03-31')
+    expected = (dates >= np.datetime64('2020-03-01')) & (dates <= np.datetime64('2020-03-31'))
+    assert np.array_equal(window['date'], dates[expected])
+    assert np.allclose(window['close'], close[expected])
+    assert isinstance(window['close'], np.memmap)
+
+    added = store.append('SPX', ['2020-01-03', '2022-01-03'], [1.0, 2.0])
+    assert added == 1 and store.rows('SPX') == 501
+    assert store.last_date('SPX') == np.datetime64('2022-01-03')
+
+def test_chunked_csv_ingest():
+    """Streaming a CSV in chunks should store exactly what a single read does"""
+    print("🧪 Testing chunked CSV ingest")
+
+    root = tempfile.mkdtemp()
+    csv_path = os.path.join(root, 'history.csv')
+    make_csv(csv_path)
+    whole, chunked = BarStore(os.path.join(root, 'whole')), BarStore(os.path.join(root, 'chunked'))
+    whole.ingest_csv(csv_path)
+    assert chunked.ingest_csv(csv_path, chunk_rows=64) == 500
+    assert chunked.ingest_csv(csv_path, chunk_rows=64) == 0
+    for name, values in whole.bars('SPX').items():
+        assert np.array_equal(chunked.bars('SPX')[name], values, equal_nan=True)
+
+    # Chunks can't be sorted against each other, so an unsorted file is refused
+    pd.read_csv(csv_path).iloc[::-1].to_csv(csv_path, index=False)
+    try:
+        BarStore(os.path.join(root, 'reversed')).ingest_csv(csv_path, chunk_rows=64)
+        assert False, 'a reversed CSV cannot be streamed'
+    except ValueError as e:
+        assert 'not in date order' in str(e)
+
+def test_uncommitted_append_is_ignored():
+    """Bytes written past the committed row count should be invisible and overwritten"""
+    print("🧪 Testing crash-safe appends")
+
+    store = BarStore(tempfile.mkdtemp())
+    store.append('NDX', ['2024-01-02', '2024-01-03'], [100.0, 101.0])
+    with open(os.path.join(store.root, 'NDX', 'close.f64'), 'ab') as f:
+        f.write(np.array([999.0]).tobytes())
+
+    assert len(store.bars('NDX')['close']) == 2
+    store.append('NDX', ['2024-01-04'], [102.0])
+    assert list(store.bars('NDX')['close']) == [100.0, 101.0, 102.0]
+
+if __name__ == "__main__":
+    test_ingest_slice_and_append()
+    test_chunked_csv_ingest()
+    test_uncommitted_append_is_ignored()
+    print("\n🎉 All bar store tests passed!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script to verify checkpoint files: round trips, damage and model changes
+"""
+
+import os
+import tempfile
+import threading
+import numpy as np
+from checkpoint import Checkpointer, load_checkpoint, save_checkpoint
+
+class Source:
+    """Minimal checkpointable state: one array and a counter"""
+
+    def __init__(self, values=(), model_dependent=False):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.counter = len(self.values)
+        self.model_dependent = model_dependent
+
+    def checkpoint(self):
+        return {'counter': self.counter}, {'values': self.values, 'empty': np.zeros((0, 3))}
+
+    def restore(self, meta, arrays, same_model=True):
+        if self.model_dependent and not same_model:
+            return False
+        self.values = arrays['values']
+        self.counter = meta['counter']
+        return True
+
+def test_round_trip():
+    """Metadata, arrays of every shape and the model version survive a save/load"""
+    print("🧪 Testing checkpoint round trip")
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    dates = np.array(['2024-01-02', 'NaT'], dtype='datetime64[D]')
+    size = save_checkpoint(path, 'v1', {
+        'a': ({'symbols': ['SPX']}, {'matrix': np.arange(12.0).reshape(3, 4), 'dates': dates}),
+        'b': ({}, {'empty': np.zeros(0, dtype=np.int64)}),
+    })
+    assert size == os.path.getsize(path)
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.tmp')]
+
+    header, arrays = load_checkpoint(path)
+    assert header['model_version'] == 'v1' and header['sections']['a'] == {'symbols': ['SPX']}
+    assert np.array_equal(arrays['a']['matrix'], np.arange(12.0).reshape(3, 4))
+    assert np.array_equal(arrays['a']['dates'], dates, equal_nan=True)
+    assert arrays['b']['empty'].shape == (0,)
+    # Copy-on-write: restored arrays can be changed without touching the file
+    arrays['a']['matrix'][0, 0] = -1
+    assert load_checkpoint(path)[1]['a']['matrix'][0, 0] == 0
+
+def test_damaged_files_are_refused():
+    """Truncated files and foreign files raise instead of loading garbage"""
+    print("🧪 Testing truncated checkpoints")
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    save_checkpoint(path, 'v1', {'a': ({}, {'values': np.arange(1000.0)})})
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 8)
+    try:
+        load_checkpoint(path)
+        assert False, 'a truncated checkpoint must not load'
+    except ValueError as e:
+        assert 'truncated' in str(e)
+
+    with open(path, 'wb') as f:
+        f.write(b'not a checkpoint')
+    try:
+        load_checkpoint(path)
+        assert False, 'a foreign file must not load'
+    except ValueError as e:
+        assert 'not a checkpoint' in str(e)
+
+def test_model_version_mismatch():
+    """Another model's snapshot restores only the sections that don't depend on it"""
+    print("🧪 Testing model version mismatch")
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    Checkpointer(path, 'v1', {'feed': Source([1.0, 2.0]), 'accuracy': Source([3.0], True)}).save()
+
+    feed, accuracy = Source(), Source(model_dependent=True)
+    restored = Checkpointer(path, 'v2', {'feed': feed, 'accuracy': accuracy}).restore()
+    assert restored['sections'] == ['feed'] and not restored['same_model']
+    assert feed.values.tolist() == [1.0, 2.0] and accuracy.counter == 0
+
+    assert Checkpointer(os.path.join(os.path.dirname(path), 'missing.ckpt'), 'v1', {}).restore() is None
+
+def test_concurrent_writers_and_state_lock():
+    """Writers sharing a path never publish a torn file; saves wait for the state lock"""
+    print("🧪 Testing concurrent checkpoint writers")
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    writers = [Checkpointer(path, 'v1', {'feed': Source(np.full(50000, float(i)))}) for i in range(4)]
+    threads = [threading.Thread(target=lambda w=w: [w.save() for _ in range(10)]) for w in writers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    values = load_checkpoint(path)[1]['feed']['values']
+    assert len(set(values.tolist())) == 1
+
+    state_lock = threading.RLock()
+    checkpointer = Checkpointer(path, 'v1', {'feed': Source([1.0])}, state_lock=state_lock)
+    saver = threading.Thread(target=checkpointer.save)
+    with state_lock:
+        saver.start()
+        saver.join(timeout=0.2)
+        assert saver.is_alive() and checkpointer.saved == 0
+    saver.join()
+    assert checkpointer.saved == 1
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_damaged_files_are_refused()
+    test_model_version_mismatch()
+    test_concurrent_writers_and_state_lock()
+    print("\n🎉 All checkpoint tests passed!")
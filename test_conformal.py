@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script to verify conformal calibration and its coverage guarantee
+"""
+
+import numpy as np
+from conformal import calibrate, interval_bounds
+
+def test_rank_and_small_sets():
+    """The ceil((n + 1)·level)-th residual is used, and too-small sets are refused"""
+    print("🧪 Testing conformal ranks")
+
+    residuals = np.arange(1.0, 20.0)
+    widths = calibrate(np.zeros(19), residuals, levels=(0.5, 0.95))
+    assert widths == {'0.5': 10.0, '0.95': 19.0}
+
+    try:
+        calibrate(np.zeros(18), np.arange(1.0, 19.0), levels=(0.95,))
+        assert False, '18 points cannot guarantee 95% coverage'
+    except ValueError as e:
+        assert 'at least 19' in str(e)
+
+    bounds = interval_bounds(np.array([100.0, 200.0]), widths, ['0.5'])
+    assert np.array_equal(bounds['0.5'][0], [90.0, 190.0])
+
+def test_marginal_coverage():
+    """Over many calibration draws, coverage of a fresh point is at least the level"""
+    print("🧪 Testing conformal coverage")
+
+    rng = np.random.default_rng(0)
+    n, trials = 30, 20000
+    covered = {0.8: 0, 0.9: 0}
+    for _ in range(trials):
+        residuals = rng.standard_t(3, n + 1)
+        widths = calibrate(np.zeros(n), residuals[:n], levels=tuple(covered))
+        for level in covered:
+            covered[level] += abs(residuals[n]) <= widths[f'{level:g}']
+    for level, hits in covered.items():
+        # Exact coverage is ceil((n + 1)·level) / (n + 1)
+        assert level - 0.01 <= hits / trials <= level + 1 / (n + 1) + 0.01
+
+if __name__ == "__main__":
+    test_rank_and_small_sets()
+    test_marginal_coverage()
+    print("\n🎉 All conformal tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the content-hashed evaluation cache
+"""
+
+import os
+import tempfile
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from calculate_accuracy import EVAL_CONFIG, METRICS, calculate_accuracy_metrics, generate_test_data
+from eval_cache import BuildCache, hash_arrays, write_if_changed
+
+def fitted_model(test_df, actual_prices):
+    return LinearRegression().fit(test_df, actual_prices)
+
+def test_unchanged_inputs_are_reused():
+    """A second run with the same model, data and config should compute nothing"""
+    print("🧪 Testing cache reuse")
+
+    root = tempfile.mkdtemp()
+    test_df, actual_prices = generate_test_data(n_samples=50, seed=1)
+    assert hash_arrays(test_df) == hash_arrays(generate_test_data(n_samples=50, seed=1)[0])
+    model = fitted_model(test_df, actual_prices)
+
+    first = BuildCache(root)
+    metrics, predicted = calculate_accuracy_metrics(model, test_df, actual_prices, first, 'model-a')
+    assert len(first.misses) == 7 and not first.hits
+
+    def must_not_load():
+        raise AssertionError('model should not be loaded on a cache hit')
+
+    second = BuildCache(root)
+    cached, cached_predicted = calculate_accuracy_metrics(must_not_load, test_df, actual_prices, second, 'model-a')
+    assert cached == metrics and not second.misses
+    assert np.array_equal(cached_predicted, predicted)
+
+def test_only_affected_metrics_recompute():
+    """Changing one input should only recompute the artifacts that depend on it"""
+    print("🧪 Testing incremental recomputation")
+
+    root = tempfile.mkdtemp()
+    test_df, actual_prices = generate_test_data(n_samples=50, seed=2)
+    model = fitted_model(test_df, actual_prices)
+    calculate_accuracy_metrics(model, test_df, actual_prices, BuildCache(root), 'model-a')
+
+    cache = BuildCache(root)
+    wider = dict(EVAL_CONFIG, near_points=25)
+    calculate_accuracy_metrics(model, test_df, actual_prices, cache, 'model-a', wider)
+    assert cache.misses == ['accuracy_percentage']
+
+    cache = BuildCache(root)
+    calculate_accuracy_metrics(model, test_df, actual_prices, cache, 'model-b')
+    assert len(cache.misses) == 7
+
+    # Reports are only rewritten when their content changes
+    path = os.path.join(root, 'report.json')
+    assert write_if_changed(path, {'mae': 1.0})
+    assert not write_if_changed(path, {'mae': 1.0})
+    assert write_if_changed(path, {'mae': 2.0})
+
+def cached_files(root):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(root) for f in files)
+
+def test_disabled_and_refreshing_caches():
+    """A disabled cache writes nothing; a refreshing one recomputes and overwrites"""
+    print("🧪 Testing cache modes")
+
+    root = tempfile.mkdtemp()
+    test_df, actual_prices = generate_test_data(n_samples=50, seed=3)
+    model = fitted_model(test_df, actual_prices)
+
+    calculate_accuracy_metrics(model, test_df, actual_prices, BuildCache(root, enabled=False), 'model-a')
+    # Without a model hash nothing identifies the predictions
+    calculate_accuracy_metrics(model, test_df, actual_prices, BuildCache(root))
+    assert cached_files(root) == []
+
+    metrics, _ = calculate_accuracy_metrics(model, test_df, actual_prices, BuildCache(root), 'model-a')
+    written = cached_files(root)
+    assert len(written) == 7
+
+    refresh = BuildCache(root, refresh=True)
+    assert calculate_accuracy_metrics(model, test_df, actual_prices, refresh, 'model-a')[0] == metrics
+    assert len(refresh.misses) == 7 and cached_files(root) == written
+
+def test_metric_code_is_part_of_the_key():
+    """Editing a metric's formula invalidates only that metric"""
+    print("🧪 Testing code salt")
+
+    root = tempfile.mkdtemp()
+    test_df, actual_prices = generate_test_data(n_samples=50, seed=4)
+    model = fitted_model(test_df, actual_prices)
+    calculate_accuracy_metrics(model, test_df, actual_prices, BuildCache(root), 'model-a')
+
+    original = METRICS['mae']
+    METRICS['mae'] = ((), lambda a, p, c: round(float(np.median(np.abs(a - p))), 2))
+    try:
+        cache = BuildCache(root)
+        calculate_accuracy_metrics(model, test_df, actual_prices, cache, 'model-a')
+    finally:
+        METRICS['mae'] = original
+    assert cache.misses == ['mae']
+
+if __name__ == "__main__":
+    test_unchanged_inputs_are_reused()
+    test_only_affected_metrics_recompute()
+    test_disabled_and_refreshing_caches()
+    test_metric_code_is_part_of_the_key()
+    print("\n🎉 All evaluation cache tests passed!")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the Gram-matrix cross-validation against sklearn refits
+"""
+
+import itertools
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from feature_selection import GramCV, beam_search, exhaustive_search
+
+def fixture(n=203, n_features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 1, (n, n_features)) * [1, 10, 100, 0.1, 5, 50] + [0, 4500, 0, 1, 0, 30]
+    X[:, 4] = X[:, 0] * 2 + rng.normal(0, 0.5, n)
+    y = 3 * X[:, 0] - 0.02 * X[:, 1] + 0.5 * X[:, 4] + rng.normal(0, 1, n)
+    return X, y
+
+def sklearn_cv_rmse(X, y, subset, folds=5):
+    """Refit LinearRegression on every contiguous fold, as GramCV splits them"""
+    bounds = np.linspace(0, len(X), folds + 1).astype(int)
+    sse = 0.0
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        train = np.r_[0:a, b:len(X)]
+        model = LinearRegression().fit(X[train][:, subset], y[train])
+        sse += np.sum((y[a:b] - model.predict(X[a:b][:, subset])) ** 2)
+    return np.sqrt(sse / len(X))
+
+def test_score_matches_sklearn_refits():
+    """Every subset's CV RMSE equals refitting the model fold by fold"""
+    print("🧪 Testing GramCV against sklearn")
+
+    X, y = fixture()
+    cv = GramCV(X, y, folds=5)
+    for size in (1, 2, 3, 6):
+        subsets = np.array(list(itertools.combinations(range(6), size)))
+        rmse = cv.score(subsets)
+        expected = [sklearn_cv_rmse(X, y, list(subset)) for subset in subsets]
+        assert np.allclose(rmse, expected, rtol=1e-8, atol=0)
+
+def test_searches_agree():
+    """Exhaustive search finds the true support; the beam finds the same best subset"""
+    print("🧪 Testing subset searches")
+
+    X, y = fixture()
+    cv = GramCV(X, y)
+    best, evaluated = exhaustive_search(cv, top=3, processes=1)
+    assert evaluated == 2 ** 6 - 1
+    assert set(best[0][1]) >= {0, 1, 4}
+    assert beam_search(cv, width=10, top=3)[0][0] == best[0]
+
+if __name__ == "__main__":
+    test_score_matches_sklearn_refits()
+    test_searches_agree()
+    print("\n🎉 All feature selection tests passed!")
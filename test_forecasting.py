@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script to verify forecast horizons follow the exchange calendar
+"""
+
+import os
+os.environ.setdefault('AUDIT_LOG_PATH', '')
+os.environ.setdefault('WARMUP', '0')
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import app
+from forecasting import forecast_from_bars
+
+# Thursday 2024-07-03 is followed by the Independence Day holiday
+HISTORY = [
+    {'date': str(day), 'high': 4510.0 + i, 'low': 4490.0 + i, 'close': 4500.0 + i}
+    for i, day in enumerate(np.busday_offset('2024-05-01', np.arange(60), roll='forward'))
+    if day <= np.datetime64('2024-07-03')
+]
+
+def test_horizon_skips_holidays():
+    """forecast_from_bars never dates a step on a holiday or weekend"""
+    print("🧪 Testing forecast dates around a holiday")
+
+    names = ['SMA_5_t-1', 'EMA_20_t-1', 'day_of_week']
+    result = forecast_from_bars(HISTORY, np.array([0.5, 0.5, 0.0]), 0.0, names, horizon=3,
+                                holidays=['2024-07-04'])
+    assert HISTORY[-1]['date'] == '2024-07-03'
+    assert result['dates'] == ['2024-07-05', '2024-07-08', '2024-07-09']
+
+def test_forecast_route_uses_market_holidays():
+    """/forecast passes MARKET_HOLIDAYS through to the engine"""
+    print("🧪 Testing /forecast with MARKET_HOLIDAYS")
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(64, len(app.FEATURE_NAMES))), columns=app.FEATURE_NAMES)
+    model = LinearRegression().fit(X, rng.normal(4500, 50, 64))
+
+    saved = (app.model, app.MARKET_HOLIDAYS)
+    app.model, app.MARKET_HOLIDAYS = model, ['2024-07-04']
+    try:
+        response = app.app.test_client().post('/forecast', json={'history': HISTORY, 'horizon': 2})
+        body = response.get_json()
+        assert body['success'], body
+        assert [point['date'] for point in body['forecast']] == ['2024-07-05', '2024-07-08']
+    finally:
+        app.model, app.MARKET_HOLIDAYS = saved
+
+if __name__ == "__main__":
+    test_horizon_skips_holidays()
+    test_forecast_route_uses_market_holidays()
+    print("\n🎉 Forecasts follow the exchange calendar!")
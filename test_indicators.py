@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script to verify incremental indicators and recursive forecasts
+"""
+
+import numpy as np
+import pandas as pd
+from indicators import IndicatorState, calendar_features, feature_table
+from forecasting import forecast
+
+def make_history(n_series=3, n_bars=120, seed=1):
+    rng = np.random.default_rng(seed)
+    closes = 4500 + np.cumsum(rng.normal(0, 30, (n_series, n_bars)), axis=1)
+    highs = closes + rng.uniform(1, 20, closes.shape)
+    lows = closes - rng.uniform(1, 20, closes.shape)
+    dates = np.busday_offset('2024-01-02', np.arange(n_bars))
+    return closes, highs, lows, dates
+
+def test_indicators_match_pandas():
+    """Incremental state should agree with batch pandas calculations"""
+    print("🧪 Testing incremental indicators against pandas")
+
+    closes, highs, lows, dates = make_history()
+    features = IndicatorState.from_history(closes, highs, lows, dates).indicator_features()
+
+    for i in range(closes.shape[0]):
+        close = pd.Series(closes[i])
+        macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        change = close.diff().dropna()
+        avg_gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+        avg_loss = (-change).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+
+        expected = {
+            'SMA_5_t-1': close.rolling(5).mean().iloc[-1],
+            'SMA_10_t-1': close.rolling(10).mean().iloc[-1],
+            'SMA_20_t-1': close.rolling(20).mean().iloc[-1],
+            'EMA_20_t-1': close.ewm(span=20, adjust=False).mean().iloc[-1],
+            'MACD_t-1': macd.iloc[-1],
+            'MACD_signal_t-1': macd.ewm(span=9, adjust=False).mean().iloc[-1],
+            'RSI_t-1': 100 - 100 / (1 + avg_gain / avg_loss),
+            'Price_Change_t-1': close.pct_change().iloc[-1],
+        }
+        for name, value in expected.items():
+            assert abs(features[name][i] - value) < 1e-6, f"{name}: {features[name][i]} != {value}"
+
+def test_row_subset_updates():
+    """Updating rows separately should give the same state as updating them together"""
+    print("🧪 Testing row-subset updates")
+
+    closes, highs, lows, _ = make_history()
+    together = IndicatorState.from_history(closes, highs, lows)
+    apart = IndicatorState(closes.shape[0])
+    for t in range(closes.shape[1]):
+        apart.update(closes[[0, 2], t], highs[[0, 2], t], lows[[0, 2], t], rows=np.array([0, 2]))
+        apart.update(closes[[1], t], highs[[1], t], lows[[1], t], rows=np.array([1]))
+
+    for name, values in together.indicator_features().items():
+        assert np.allclose(values, apart.indicator_features()[name]), name
+
+def test_calendar_features():
+    """Calendar columns should match pandas' date attributes"""
+    print("🧪 Testing calendar features")
+
+    index = pd.DatetimeIndex(['2024-01-31', '2024-02-01', '2024-02-29', '2024-03-15'])
+    calendar = calendar_features(index.values.astype('datetime64[D]'))
+    assert list(calendar['year']) == list(index.year)
+    assert list(calendar['month']) == list(index.month)
+    assert list(calendar['day']) == list(index.day)
+    assert list(calendar['day_of_week']) == list(index.dayofweek)
+    assert list(calendar['is_month_end']) == list(index.is_month_end.astype(int))
+    assert list(calendar['is_month_start']) == list(index.is_month_start.astype(int))
+
+def test_recursive_forecast_matches_step_by_step():
+    """The vectorized engine should equal predicting and appending one day at a time"""
+    print("🧪 Testing recursive forecast")
+
+    closes, highs, lows, dates = make_history(n_series=2)
+    names = list(IndicatorState(1).indicator_features().keys()) + list(calendar_features(dates[:1]).keys())
+    coef = np.random.default_rng(2).normal(0, 0.05, len(names))
+    coef[names.index('EMA_20_t-1')] = 1.0
+    state = IndicatorState.from_history(closes, highs, lows, dates)
+
+    path_dates, paths = forecast(state, coef, 1.0, names, horizon=5)
+
+    for i in range(2):
+        c, h, l, d = list(closes[i]), list(highs[i]), list(lows[i]), list(dates)
+        for step in range(5):
+            check = IndicatorState.from_history(np.array([c]), np.array([h]), np.array([l]), np.array(d))
+            target = np.busday_offset(d[-1], 1, roll='forward')
+            predicted = check.feature_matrix(names, np.array([target]))[0] @ coef + 1.0
+            assert abs(predicted - paths[i, step]) < 1e-6
+            assert path_dates[i, step] == target
+            # Forecast bars are single prints at the predicted close
+            c.append(paths[i, step])
+            h.append(paths[i, step])
+            l.append(paths[i, step])
+            d.append(target)
+
+def test_incremental_state_matches_feature_table():
+    """Serving features built bar by bar should equal the training table on the same bars"""
+    print("🧪 Testing incremental state against feature_table")
+
+    closes, highs, lows, dates = make_history(n_series=1)
+    table = feature_table(dates, highs[0], lows[0], closes[0])
+    names = [name for name in table.columns if name not in ('date', 'close', 'target')]
+
+    state = IndicatorState(1)
+    warmup = len(dates) - 1 - len(table)
+    for t in range(len(dates) - 1):
+        state.update(closes[:, t], highs[:, t], lows[:, t], dates=dates[t:t + 1])
+        if t < warmup:
+            continue
+        row = table.iloc[t - warmup]
+        assert row['date'] == dates[t + 1]
+        served = state.feature_matrix(names, dates[t + 1:t + 2])[0]
+        assert np.allclose(served, row[names].to_numpy(dtype=np.float64)), f"bar {t}"
+
+if __name__ == "__main__":
+    test_indicators_match_pandas()
+    test_row_subset_updates()
+    test_calendar_features()
+    test_recursive_forecast_matches_step_by_step()
+    test_incremental_state_matches_feature_table()
+    print("\n🎉 All indicator tests passed!")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script to verify live bar ingestion, the prediction stream fan-out and checkpoints
+"""
+
+import os
+import tempfile
+import numpy as np
+from accuracy_tracker import AccuracyTracker
+from checkpoint import Checkpointer
+from indicators import IndicatorState, calendar_features, next_trading_day
+from live_stream import LiveFeed
+
+NAMES = list(IndicatorState(1).indicator_features().keys()) + list(calendar_features(np.array(['2024-01-02'], dtype='datetime64[D]')).keys())
+
+def make_bars(symbols=('SPX', 'NDX', 'DJI'), n_bars=40, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2024-01-02', np.arange(n_bars))
+    bars = []
+    for t, date in enumerate(dates):
+        for i, symbol in enumerate(symbols):
+            close = 4500 + 100 * i + 10 * t + rng.normal(0, 5)
+            bars.append({'symbol': symbol, 'date': str(date), 'high': close + 5, 'low': close - 5, 'close': close})
+    return bars
+
+def test_live_predictions_match_history():
+    """Bars ingested one call at a time should predict like a full replay"""
+    print("🧪 Testing live predictions against a history replay")
+
+    coef = np.random.default_rng(4).normal(0, 0.05, len(NAMES))
+    feed = LiveFeed(coef, 2.0, NAMES)
+    bars = make_bars()
+    for start in range(0, len(bars), 7):
+        events, rejected = feed.ingest(bars[start:start + 7])
+        assert not rejected
+
+    for symbol in ('SPX', 'NDX', 'DJI'):
+        own = [b for b in bars if b['symbol'] == symbol]
+        state = IndicatorState.from_history(
+            [[b['close'] for b in own]], [[b['high'] for b in own]], [[b['low'] for b in own]],
+            np.array([b['date'] for b in own], dtype='datetime64[D]'),
+        )
+        target = next_trading_day(state.last_date)
+        expected = state.feature_matrix(NAMES, target)[0] @ coef + 2.0
+        assert abs(feed.latest[symbol]['predicted_close'] - round(expected, 2)) < 0.011
+
+    # Replayed bars are rejected instead of corrupting the state
+    _, rejected = feed.ingest(bars[:3])
+    assert len(rejected) == 3
+
+def test_slow_subscriber_drops_oldest():
+    """A subscriber that never reads keeps only its newest frames"""
+    print("🧪 Testing slow-subscriber back-pressure")
+
+    feed = LiveFeed(np.zeros(len(NAMES)), 1.0, NAMES, queue_size=5)
+    slow = feed.subscribe()
+    spx_only = feed.subscribe(['SPX'])
+    feed.ingest(make_bars(n_bars=10))
+
+    assert len(slow.frames) == 5 and slow.dropped == 25
+    assert spx_only.dropped == 5
+    last = slow.get(timeout=0)
+    while slow.frames:
+        last = slow.get(timeout=0)
+    assert b'"id": 30' in last
+    assert slow.get(timeout=0.01) is None
+
+    feed.unsubscribe(slow)
+    feed.unsubscribe(spx_only)
+    assert feed.stats()['subscribers'] == 0
+
+def test_cross_section_ranking():
+    """One universe mat-vec should agree with each symbol's own prediction"""
+    print("🧪 Testing cross-sectional ranking")
+
+    coef = np.random.default_rng(6).normal(0, 0.05, len(NAMES))
+    symbols = [f'S{i:02d}' for i in range(40)]
+    feed = LiveFeed(coef, 2.0, NAMES)
+    bars = make_bars(symbols=symbols, n_bars=30)
+    feed.ingest(bars[:-5])
+    feed.ingest(bars[-5:])
+
+    ranked = feed.cross_section()
+    assert sorted(ranked['symbol']) == symbols
+    assert np.all(np.diff(ranked['expected_return']) <= 0)
+    for i, symbol in enumerate(ranked['symbol']):
+        assert abs(ranked['predicted_close'][i] - feed.latest[symbol]['predicted_close']) < 0.006
+        assert abs(ranked['expected_return'][i] - (ranked['predicted_close'][i] / feed.latest[symbol]['close'] - 1)) < 1e-12
+
+    worst = feed.cross_section(top=3, ascending=True)
+    assert worst['symbol'] == ranked['symbol'][::-1][:3]
+
+def test_checkpoint_restore_and_replay():
+    """Restoring a snapshot and replaying newer bars should equal never restarting"""
+    print("🧪 Testing checkpoint restore")
+
+    coef = np.random.default_rng(5).normal(0, 0.05, len(NAMES))
+    bars = make_bars(n_bars=60)
+    uninterrupted = LiveFeed(coef, 2.0, NAMES)
+    uninterrupted.ingest(bars)
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.ckpt')
+    before = LiveFeed(coef, 2.0, NAMES)
+    tracker = AccuracyTracker(window=10)
+    before.ingest(bars[:90])
+    for i in range(15):
+        tracker.record_prediction('SPX', f'2024-02-{i + 1:02d}', 4500.0 + i, 4490.0)
+        tracker.record_actual('SPX', f'2024-02-{i + 1:02d}', 4505.0)
+    tracker.record_prediction('SPX', '2024-03-01', 4600.0, 4590.0)
+    Checkpointer(path, 'v1', {'live_feed': before, 'accuracy': tracker}).save()
+
+    after = LiveFeed(coef, 2.0, NAMES)
+    restored_tracker = AccuracyTracker(window=10)
+    result = Checkpointer(path, 'v1', {'live_feed': after, 'accuracy': restored_tracker}).restore()
+    assert result['sections'] == ['live_feed', 'accuracy']
+    assert restored_tracker.metrics() == tracker.metrics()
+
+    # Replay the whole history per symbol; only the bars after the snapshot are ingested
+    for symbol in ('SPX', 'NDX', 'DJI'):
+        own = [b for b in bars if b['symbol'] == symbol]
+        events, _ = after.replay(symbol, np.array([b['date'] for b in own], dtype='datetime64[D]'),
+                                 [b['high'] for b in own], [b['low'] for b in own], [b['close'] for b in own])
+        assert len(events) == 30
+        assert after.latest[symbol]['predicted_close'] == uninterrupted.latest[symbol]['predicted_close']
+    assert np.allclose(after.cross_section()['predicted_close'], uninterrupted.cross_section()['predicted_close'])
+
+    # A snapshot from another model keeps the indicator state but not the accuracy accumulators
+    other = Checkpointer(path, 'v2', {'live_feed': LiveFeed(coef, 2.0, NAMES), 'accuracy': AccuracyTracker()})
+    assert other.restore()['sections'] == ['live_feed']
+
+def test_full_feed_applies_nothing():
+    """A batch that overflows max_symbols is refused before any bar is applied"""
+    print("🧪 Testing a full live feed")
+
+    coef = np.random.default_rng(4).normal(0, 0.05, len(NAMES))
+    feed = LiveFeed(coef, 2.0, NAMES, max_symbols=3)
+    subscription = feed.subscribe()
+    bars = make_bars(symbols=('SPX', 'NDX'), n_bars=2)
+    feed.ingest(bars[:2])
+    assert len(subscription.frames) == 2
+
+    # One new symbol would fit, two don't: neither may take a row
+    date = bars[2]['date']
+    overflow = [bars[2], {'symbol': 'DJI', 'date': date, 'close': 100.0},
+                {'symbol': 'RUT', 'date': date, 'close': 200.0}]
+    try:
+        feed.ingest(overflow)
+        assert False, 'a fourth symbol does not fit'
+    except MemoryError:
+        pass
+    assert feed.symbols == ['SPX', 'NDX'] and list(feed.rows) == ['SPX', 'NDX']
+    assert feed.bars_ingested == 2 and feed.sequence == 2
+    assert feed.latest['SPX']['bar_date'] == bars[0]['date']
+    assert len(subscription.frames) == 2
+
+    # Without the overflow the same bars are accepted, DJI taking the last row
+    events, rejected = feed.ingest(overflow[:2])
+    assert len(events) == 2 and not rejected
+    assert feed.rows['DJI'] == 2
+
+if __name__ == "__main__":
+    test_live_predictions_match_history()
+    test_slow_subscriber_drops_oldest()
+    test_cross_section_ranking()
+    test_checkpoint_restore_and_replay()
+    test_full_feed_applies_nothing()
+    print("\n🎉 All live stream tests passed!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the load generator's statistics and report
+"""
+
+import ssl
+from load_test import LoadTest, latency_summary, percentile, print_report, summarize
+
+def test_percentile():
+    """Nearest-rank percentiles on a sorted list"""
+    print("🧪 Testing percentiles")
+
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 99.9) == 100
+    assert percentile(values, 0) == 1
+    assert percentile([7], 99.9) == 7
+    assert percentile([], 50) is None
+
+def test_latency_summary():
+    """Seconds in, milliseconds out, with every latency in exactly one bucket"""
+    print("🧪 Testing latency summaries")
+
+    summary = latency_summary([0.0005, 0.001, 0.003, 0.003, 0.25, 9.0])
+    assert summary['count'] == 6
+    assert summary['max_ms'] == 9000.0
+    assert summary['p50_ms'] == 3.0 and summary['p99_ms'] == 9000.0
+    assert summary['histogram']['<=1ms'] == 2
+    assert summary['histogram']['<=5ms'] == 2
+    assert summary['histogram']['<=500ms'] == 1
+    assert summary['histogram']['>5000ms'] == 1
+    assert sum(summary['histogram'].values()) == 6
+
+    empty = latency_summary([])
+    assert empty['count'] == 0 and empty['mean_ms'] is None and empty['p99_ms'] is None
+
+def test_summarize_and_report():
+    """Errors count toward the error rate, and an empty run still prints"""
+    print("🧪 Testing summaries and reports")
+
+    test = LoadTest('http://127.0.0.1:5000')
+    test.latencies = {'predict': [0.002, 0.004, 0.006], 'predict/batch': [0.05]}
+    test.statuses = {'200': 3, 'ConnectionError': 1}
+    results = summarize(test, 2.0, {})
+    assert results['requests'] == 4 and results['throughput_rps'] == 2.0
+    assert results['error_rate'] == 0.25
+    assert results['by_endpoint']['predict']['count'] == 3
+    print_report(results, baseline=results)
+
+    empty = summarize(LoadTest('http://127.0.0.1:5000'), 0.0, {})
+    assert empty['throughput_rps'] is None and empty['error_rate'] is None
+    print_report(empty)
+    print_report(empty, baseline=results)
+
+def test_url_schemes():
+    """https:// connects with TLS on 443 by default; other schemes are refused"""
+    print("🧪 Testing URL schemes")
+
+    plain = LoadTest('http://example.com/api/')
+    assert (plain.host, plain.port, plain.prefix, plain.tls) == ('example.com', 80, '/api', None)
+    secure = LoadTest('https://example.com')
+    assert secure.port == 443 and isinstance(secure.tls, ssl.SSLContext)
+    assert LoadTest('https://example.com:8443').port == 8443
+    try:
+        LoadTest('ftp://example.com')
+        assert False, 'ftp is not HTTP'
+    except ValueError as e:
+        assert 'ftp' in str(e)
+
+if __name__ == "__main__":
+    test_percentile()
+    test_latency_summary()
+    test_summarize_and_report()
+    test_url_schemes()
+    print("\n🎉 Load test statistics are correct!")
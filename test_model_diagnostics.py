@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the chunked model diagnostics against a single in-memory pass
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from indicators import feature_table
+from model_diagnostics import DiagnosticsAccumulator, run_diagnostics
+
+NAMES = ['SMA_5_t-1', 'Price_Change_t-1', 'RSI_t-1', 'ATR_t-1', 'MACD_t-1', 'month', 'day_of_week']
+SYMBOLS = ('AAA', 'BBB', 'CCC')
+
+def make_store(n_bars=1500, seed=8):
+    rng = np.random.default_rng(seed)
+    store = BarStore(tempfile.mkdtemp())
+    dates = np.busday_offset('2015-01-02', np.arange(n_bars))
+    for i, symbol in enumerate(SYMBOLS):
+        closes = 100 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 0.01 + 0.005 * i, n_bars)))
+        spread = closes * rng.uniform(0.002, 0.03, n_bars)
+        store.append(symbol, dates, closes, highs=closes + spread, lows=closes - spread)
+    return store
+
+def reference(store, coef, intercept, max_lag):
+    """Direct computation over the whole history at once"""
+    X, residuals, acf_num = [], [], []
+    for symbol in SYMBOLS:
+        table = feature_table(*store.history(symbol))
+        x = table[NAMES].to_numpy(dtype=np.float64)
+        X.append(x)
+        residuals.append(table['target'].to_numpy() - (x @ coef + intercept))
+    mu = np.concatenate(residuals).mean()
+    centered = [r - mu for r in residuals]
+    denominator = sum(c @ c for c in centered)
+    acf = [sum(c[:-k] @ c[k:] for c in centered) / denominator for k in range(1, max_lag + 1)]
+    return np.vstack(X), np.concatenate(residuals), np.array(acf)
+
+def test_chunked_matches_single_pass():
+    """Small chunks across several processes should agree with one full pass"""
+    print("🧪 Testing chunked diagnostics against a full pass")
+
+    store = make_store()
+    coef = np.random.default_rng(2).normal(0, 0.1, len(NAMES))
+    coef[0] = 1.0
+    X, residuals, acf = reference(store, coef, 0.5, max_lag=5)
+
+    serial = run_diagnostics(store.root, NAMES, coef, 0.5, chunk_rows=211, processes=1, max_lag=5)
+    parallel = run_diagnostics(store.root, NAMES, coef, 0.5, chunk_rows=211, processes=2, max_lag=5)
+    assert serial == parallel
+    assert serial['rows'] == len(residuals) and serial['chunks'] == 3 * 7
+
+    assert np.allclose(serial['correlation'], np.corrcoef(X, rowvar=False), atol=1e-9)
+    assert np.allclose(serial['residual']['autocorrelation'], acf, atol=1e-9)
+    assert abs(serial['residual']['rmse'] - np.sqrt(np.mean(residuals ** 2))) < 1e-9
+    assert abs(serial['condition_number'] - np.linalg.cond(np.corrcoef(X, rowvar=False)) ** 0.5) < 1e-6
+
+    # VIF_j = 1 / (1 - R²_j) of feature j regressed on the others
+    for j, name in enumerate(NAMES):
+        others = np.column_stack([np.ones(len(X)), np.delete(X, j, axis=1)])
+        fitted = others @ np.linalg.lstsq(others, X[:, j], rcond=None)[0]
+        r2 = 1 - np.sum((X[:, j] - fitted) ** 2) / np.sum((X[:, j] - X[:, j].mean()) ** 2)
+        assert abs(serial['vif'][name] - 1 / (1 - r2)) < 1e-6 * serial['vif'][name]
+
+    years = serial['regimes']['year']
+    assert sum(group['rows'] for group in years.values()) == len(residuals)
+    assert set(serial['regimes']['trend']) == {'below SMA 20', 'above SMA 20'}
+
+def test_csv_source_matches_bar_store():
+    """A CSV is streamed into a temporary store and diagnosed like the store itself"""
+    print("🧪 Testing diagnostics on a CSV history")
+
+    store = make_store(n_bars=900)
+    bars = store.bars('BBB')
+    csv_path = os.path.join(tempfile.mkdtemp(), 'history.csv')
+    pd.DataFrame({'Date': bars['date'].astype(str), 'High': bars['high'], 'Low': bars['low'],
+                  'Close': bars['close']}).to_csv(csv_path, index=False)
+    coef = np.random.default_rng(3).normal(0, 0.1, len(NAMES))
+
+    from_csv = run_diagnostics(csv_path, NAMES, coef, 0.5, start='2016-01-01', chunk_rows=150, processes=2)
+    from_store = run_diagnostics(store.root, NAMES, coef, 0.5, symbols=['BBB'], start='2016-01-01',
+                                 chunk_rows=150, processes=1)
+    assert from_csv['rows'] == from_store['rows'] and from_csv['symbols'] == 1
+    assert np.allclose(from_csv['correlation'], from_store['correlation'], atol=1e-12)
+    assert np.allclose(from_csv['residual']['autocorrelation'], from_store['residual']['autocorrelation'], atol=1e-12)
+
+def test_boundary_lags_and_collinearity():
+    """Lag products spanning tiny chunks are kept; exactly collinear features get no finite VIF"""
+    print("🧪 Testing chunk boundaries and collinear features")
+
+    rng = np.random.default_rng(1)
+    r = rng.normal(0, 1, 40).cumsum()
+    X = rng.normal(0, 1, (40, 3))
+    X[:, 2] = X[:, 0] - X[:, 1]
+    whole = DiagnosticsAccumulator.from_rows(X, r, max_lag=6)
+    pieces = DiagnosticsAccumulator.from_rows(X[:3], r[:3], max_lag=6)
+    for a, b in ((3, 4), (4, 11), (11, 40)):
+        pieces.append(DiagnosticsAccumulator.from_rows(X[a:b], r[a:b], max_lag=6))
+
+    full, chunked = whole.report(['a', 'b', 'c']), pieces.report(['a', 'b', 'c'])
+    assert np.allclose(full['residual']['autocorrelation'], chunked['residual']['autocorrelation'])
+    assert chunked['vif'] == {'a': None, 'b': None, 'c': None}
+    assert chunked['condition_number'] is None
+
+if __name__ == "__main__":
+    test_chunked_matches_single_pass()
+    test_csv_source_matches_bar_store()
+    test_boundary_lags_and_collinearity()
+    print("\n🎉 All model diagnostics tests passed!")
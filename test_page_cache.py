@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the pre-rendered home page: ETags, encodings and reloads
+"""
+
+import gzip
+import os
+import tempfile
+from flask import Flask, request
+from page_cache import StaticPage, brotli
+
+def make_page(body):
+    root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(root, 'templates'))
+    path = os.path.join(root, 'templates', 'index.html')
+    with open(path, 'w') as f:
+        f.write(body)
+    app = Flask(__name__, root_path=root)
+    page = StaticPage(app, 'index.html', check_interval=0.0)
+    app.add_url_rule('/', 'home', lambda: page.response(request))
+    return app, page, path
+
+def test_etag_and_encodings():
+    """Matching validators get a 304; bodies follow Accept-Encoding"""
+    print("🧪 Testing ETag and content negotiation")
+
+    app, page, _ = make_page('<p>{{ 1 + 1 }}</p>' * 50)
+    client = app.test_client()
+
+    plain = client.get('/')
+    assert plain.status_code == 200 and plain.data == b'<p>2</p>' * 50
+    assert 'Content-Encoding' not in plain.headers and plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/', headers={'If-None-Match': plain.headers['ETag']})
+    assert response.status_code == 304 and response.data == b''
+    # Weak comparison ignores W/, and any listed tag matches
+    strong = plain.headers['ETag'][2:]
+    assert client.get('/', headers={'If-None-Match': f'"other", {strong}'}).status_code == 304
+    assert client.get('/', headers={'If-None-Match': '"other"'}).status_code == 200
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, br;q=1.0'})
+    if brotli is not None:
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == plain.data
+    else:
+        assert response.headers['Content-Encoding'] == 'gzip'
+
+def test_template_change_is_served():
+    """Editing the template re-renders the new content, not Jinja's cached copy"""
+    print("🧪 Testing template reload")
+
+    app, page, path = make_page('<p>v1</p>')
+    client = app.test_client()
+    first = client.get('/')
+    assert first.data == b'<p>v1</p>'
+
+    with open(path, 'w') as f:
+        f.write('<p>v2</p>')
+    os.utime(path, (page.mtime + 10, page.mtime + 10))
+
+    second = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert page.builds == 2
+    assert second.status_code == 200 and second.data == b'<p>v2</p>'
+    assert second.headers['ETag'] != first.headers['ETag']
+
+if __name__ == "__main__":
+    test_etag_and_encodings()
+    test_template_change_is_served()
+    print("\n🎉 All page cache tests passed!")
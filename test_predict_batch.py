@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script to verify /predict/batch is served and recorded like /predict
+"""
+
+import os
+os.environ.setdefault('AUDIT_LOG_PATH', '')
+os.environ.setdefault('WARMUP', '0')
+
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import app
+from accuracy_tracker import AccuracyTracker
+from conformal import load_intervals
+from shadow_models import ShadowScorer
+
+FEATURE_NAMES = list(app.build_features(4500.0, 4520.0, 4480.0).keys())
+ROWS = [
+    {'symbol': 'SPX', 'open': 4500.0, 'high': 4520.0, 'low': 4480.0},
+    {'symbol': 'NDX', 'open': 15500.0, 'high': 15600.0, 'low': 15400.0, 'close': 15550.0},
+    {'symbol': 'RUT', 'open': 1900.0, 'high': 1910.0, 'low': 1890.0},
+]
+
+def fitted_model(seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(64, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+    model = LinearRegression()
+    model.fit(X, rng.normal(4500, 50, 64))
+    return model
+
+class Patched:
+    """Swap the app's model, shadow scorer and tracker for the duration of a test"""
+
+    def __init__(self, shadow=True):
+        self.shadow = shadow
+
+    def __enter__(self):
+        self.saved = (app.model, app.shadow, app.accuracy_tracker, app.shared_state,
+                      app.drift_monitor, app.FEATURE_NAMES)
+        app.FEATURE_NAMES = FEATURE_NAMES
+        app.model = fitted_model(0)
+        app.shadow = ShadowScorer(app.model, [('alt', fitted_model(1))], FEATURE_NAMES) if self.shadow else None
+        app.accuracy_tracker = AccuracyTracker()
+        app.shared_state = None
+        app.drift_monitor = None
+        return app.app.test_client()
+
+    def __exit__(self, *exc):
+        (app.model, app.shadow, app.accuracy_tracker, app.shared_state,
+         app.drift_monitor, app.FEATURE_NAMES) = self.saved
+
+def test_batch_matches_predict():
+    """A batch row gets the prediction /predict gives and leaves the same records"""
+    print("🧪 Testing /predict/batch against /predict")
+
+    with Patched() as client:
+        batch = client.post('/predict/batch', json={'rows': ROWS}).get_json()
+        assert batch['success'], batch
+        assert app.shadow.requests == 3
+        assert len(app.accuracy_tracker._pending) == 3
+        assert all(len(tracker._pending) == 3 for tracker in app.shadow.trackers.values())
+        batch_stats = app.shadow.stats()
+
+        for row, result in zip(ROWS, batch['predictions']):
+            single = client.post('/predict', json=row).get_json()
+            assert single['predicted_close'] == result['predicted_close']
+        # /predict re-recorded the same keys, so nothing new is pending
+        assert app.shadow.requests == 6
+        assert len(app.accuracy_tracker._pending) == 3
+        stats = app.shadow.stats()['models']['alt']
+        assert np.isclose(stats['mean_abs_diff'], batch_stats['models']['alt']['mean_abs_diff'])
+
+        pending = app.accuracy_tracker._pending[('predict', 'NDX', batch['prediction_date'])]
+        assert pending[1] == 15550.0
+
+def test_batch_without_shadow():
+    """Without candidates the batch still records accuracy"""
+    print("🧪 Testing /predict/batch without shadow models")
+
+    with Patched(shadow=False) as client:
+        batch = client.post('/predict/batch', json=ROWS).get_json()
+        assert batch['success'], batch
+        assert len(app.accuracy_tracker._pending) == 3
+
+def test_warmup_batch_not_recorded():
+    """Warm-up batches exercise the path without leaving a trace"""
+    print("🧪 Testing warm-up batches")
+
+    with Patched() as client:
+        response = client.post('/predict/batch', json=ROWS, headers={'X-Warmup': app.WARMUP_TOKEN})
+        assert response.get_json()['success']
+        assert app.shadow.requests == 0
+        assert len(app.accuracy_tracker._pending) == 0
+
+def test_corrupt_intervals_raise():
+    """A damaged sidecar raises, which the app turns into 'intervals disabled'"""
+    print("🧪 Testing corrupt interval files")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intervals.json')
+        for content in ('{"model_version": "v1", "half_wid', '{"model_version": "v1"}'):
+            with open(path, 'w') as f:
+                f.write(content)
+            try:
+                load_intervals(path, 'v1')
+                assert False, f'{content!r} should not load'
+            except (ValueError, KeyError):
+                pass
+        with open(path, 'w') as f:
+            json.dump({'model_version': 'v1', 'half_widths': {'0.9': 12}}, f)
+        assert load_intervals(path, 'v1') == {'0.9': 12.0}
+
+if __name__ == "__main__":
+    print("🧪 Testing batch predictions")
+    test_batch_matches_predict()
+    test_batch_without_shadow()
+    test_warmup_batch_not_recorded()
+    test_corrupt_intervals_raise()
+    print("\n🎉 Batch predictions are recorded like single ones!")
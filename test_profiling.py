@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script to verify profiling signatures, sampling and the admin endpoint
+"""
+
+import os
+os.environ.setdefault('AUDIT_LOG_PATH', '')
+os.environ.setdefault('WARMUP', '0')
+
+import time
+import profiling
+from profiling import RequestProfiler, sign
+
+def started(profiler, signature=None, sample=True):
+    profile = profiler.start(signature, sample=sample)
+    if profile is None:
+        return False
+    profiler.stop(profile)
+    return True
+
+def test_signatures():
+    """Fresh, genuine signatures profile once; replays, stale and forged ones don't"""
+    print("🧪 Testing profile signatures")
+
+    profiler = RequestProfiler(secret='s3cret')
+    header = sign('s3cret')
+    assert started(profiler, header)
+    assert not started(profiler, header), 'a replayed signature must be refused'
+    assert started(profiler, sign('s3cret')), 'a new nonce signs again'
+
+    assert not started(profiler, sign('s3cret', time.time() - profiling.SIGNATURE_MAX_AGE - 10))
+    assert not started(profiler, sign('other'))
+    timestamp, nonce, digest = sign('s3cret').split('.')
+    assert not started(profiler, f'{timestamp}.{nonce}x.{digest}')
+    assert not started(profiler, f'{timestamp}.{digest}')
+    assert not started(profiler, 'garbage')
+    assert profiler.profiled == 2
+
+def test_nonces_expire():
+    """Nonces older than the signature window are forgotten"""
+    print("🧪 Testing nonce pruning")
+
+    profiler = RequestProfiler(secret='s3cret')
+    old = time.time() - profiling.SIGNATURE_MAX_AGE + 1
+    assert started(profiler, sign('s3cret', old, nonce='a'))
+    profiler._seen_nonces['a'] -= 10
+    assert started(profiler, sign('s3cret', nonce='b'))
+    assert list(profiler._seen_nonces) == ['b']
+
+def test_sampling_only_when_asked():
+    """Random sampling applies only to requests the app marks as sampleable"""
+    print("🧪 Testing sampling scope")
+
+    profiler = RequestProfiler(sample_rate=1.0)
+    assert started(profiler, sample=True)
+    assert not started(profiler, sample=False)
+    assert started(profiler, sign('s3cret'), sample=False) is False
+
+def test_admin_endpoint_requires_secret():
+    """/admin/profile answers 404 unless a secret is configured and presented"""
+    print("🧪 Testing /admin/profile access")
+
+    import app
+    client = app.app.test_client()
+    saved = app.profiler
+    try:
+        app.profiler = None
+        assert client.get('/admin/profile?format=summary').status_code == 404
+
+        app.profiler = RequestProfiler(sample_rate=1.0)
+        assert client.get('/admin/profile?format=summary').status_code == 404
+        assert client.get('/admin/profile?format=summary',
+                          environ_base={'REMOTE_ADDR': '127.0.0.1'}).status_code == 404
+
+        app.profiler = RequestProfiler(secret='s3cret')
+        assert client.get('/admin/profile?format=summary',
+                          headers={'X-Admin-Token': 'wrong'}).status_code == 404
+        response = client.get('/admin/profile?format=summary', headers={'X-Admin-Token': 's3cret'})
+        assert response.status_code == 200
+        assert response.get_json()['profile']['profiled'] == 0
+    finally:
+        app.profiler = saved
+
+if __name__ == "__main__":
+    test_signatures()
+    test_nonces_expire()
+    test_sampling_only_when_asked()
+    test_admin_endpoint_requires_secret()
+    print("\n🎉 Profiling access is locked down!")
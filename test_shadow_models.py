@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script to verify stacked shadow scoring against the individual models
+"""
+
+import os
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, Ridge
+from shadow_models import ModelStack, ShadowScorer, parse_shadow_models
+
+FEATURE_NAMES = ['SMA_5_t-1', 'EMA_20_t-1', 'RSI_t-1', 'ATR_t-1', 'day_of_week']
+
+def fitted(model, names, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(64, len(names))), columns=names)
+    return model.fit(X, rng.normal(4500, 50, 64))
+
+def models():
+    primary = fitted(LinearRegression(), FEATURE_NAMES, 0)
+    # Trained on a different column order and on a subset of the features
+    reordered = fitted(Ridge(alpha=1.0), FEATURE_NAMES[::-1], 1)
+    subset = fitted(LinearRegression(), ['RSI_t-1', 'SMA_5_t-1'], 2)
+    return primary, [('reordered', reordered), ('subset', subset)]
+
+def test_stack_matches_models():
+    """One stacked product gives every model's own predict()"""
+    print("🧪 Testing stacked predictions")
+
+    primary, candidates = models()
+    stack = ModelStack([('primary', primary)] + candidates, FEATURE_NAMES)
+    X = pd.DataFrame(np.random.default_rng(3).normal(size=(20, len(FEATURE_NAMES))), columns=FEATURE_NAMES)
+
+    expected = np.column_stack([primary.predict(X)] + [
+        model.predict(X[list(model.feature_names_in_)]) for _, model in candidates
+    ])
+    assert np.allclose(stack.predict_many(X.to_numpy()), expected)
+    assert np.allclose(stack.predict(X.to_numpy()[0]), expected[0])
+
+def test_unknown_feature_rejected():
+    """A candidate that needs a feature the app doesn't build can't be stacked"""
+    print("🧪 Testing unknown candidate features")
+
+    stray = fitted(LinearRegression(), ['SMA_5_t-1', 'VWAP_t-1'], 4)
+    try:
+        ModelStack([('stray', stray)], FEATURE_NAMES)
+        assert False, 'VWAP_t-1 is not a serving feature'
+    except ValueError as e:
+        assert 'VWAP_t-1' in str(e)
+
+def test_reserved_and_duplicate_names():
+    """'primary' is the serving model's name, and names must be unique"""
+    print("🧪 Testing candidate names")
+
+    primary, candidates = models()
+    for bad in ([('primary', candidates[0][1])], [candidates[0], candidates[0]]):
+        try:
+            ShadowScorer(primary, bad, FEATURE_NAMES)
+            assert False, f'{[name for name, _ in bad]} should be refused'
+        except ValueError:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'primary.pkl')
+        joblib.dump(candidates[0][1], path)
+        assert parse_shadow_models(f'alt={path}, {path}') == [('alt', path), ('primary', path)]
+        for spec in (f'primary={path}', path):
+            try:
+                ShadowScorer.from_spec(primary, spec, FEATURE_NAMES)
+                assert False, f'{spec} names a candidate primary'
+            except ValueError as e:
+                assert 'reserved' in str(e)
+        assert ShadowScorer.from_spec(primary, f'alt={path}', FEATURE_NAMES).stack.names == ['primary', 'alt']
+
+def test_batch_scoring_matches_single():
+    """predict_many records the same statistics as row-by-row predict"""
+    print("🧪 Testing batch shadow scoring")
+
+    primary, candidates = models()
+    single = ShadowScorer(primary, candidates, FEATURE_NAMES)
+    batch = ShadowScorer(primary, candidates, FEATURE_NAMES)
+    X = np.random.default_rng(5).normal(size=(12, len(FEATURE_NAMES)))
+    symbols = [f'S{i}' for i in range(12)]
+    references = list(np.linspace(4400, 4600, 12))
+
+    served = [single.predict(X[i], symbols[i], '2024-07-05', references[i]) for i in range(12)]
+    assert np.allclose(batch.predict_many(X, symbols, '2024-07-05', references), served)
+    assert single.stats() == batch.stats()
+
+    for i, symbol in enumerate(symbols):
+        for scorer in (single, batch):
+            scorer.record_actual(symbol, '2024-07-05', 4500.0 + i)
+    assert single.stats() == batch.stats()
+    assert batch.stats()['models']['subset']['accuracy']['samples'] == 12
+
+    unrecorded = ShadowScorer(primary, candidates, FEATURE_NAMES)
+    unrecorded.predict_many(X, record=False)
+    assert unrecorded.stats()['requests'] == 0
+
+if __name__ == "__main__":
+    test_stack_matches_models()
+    test_unknown_feature_rejected()
+    test_reserved_and_duplicate_names()
+    test_batch_scoring_matches_single()
+    print("\n🎉 Shadow scoring matches the individual models!")
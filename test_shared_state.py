@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared-memory model state: layout, seqlock, versions and re-mapping
+"""
+
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from shared_state import SEQ, SharedModelState
+
+NAMES = ['a', 'b', 'c']
+
+def region(feature_names=NAMES, model_version='v1', writer=False, path=None, max_symbols=8,
+           check_interval=0.0):
+    path = path or os.path.join(tempfile.mkdtemp(), 'state.bin')
+    return SharedModelState(path, feature_names=feature_names, max_symbols=max_symbols,
+                            model_version=model_version, writer=writer, check_interval=check_interval)
+
+def test_layout_publish_and_read():
+    """Blocks are aligned and disjoint; weights and features published anywhere are seen everywhere"""
+    print("🧪 Testing layout and publishing")
+
+    layout = SharedModelState._layout(3, 8)
+    offsets = [layout[name] for name in ('control', 'weights', 'symbols', 'features', 'updated', 'total')]
+    assert all(offset % 64 == 0 for offset in offsets) and offsets == sorted(offsets)
+    assert layout['features'] + 8 * 3 * 8 <= layout['updated']
+
+    writer = region(writer=True)
+    reader = region(path=writer.path)
+    assert not reader.ready
+    writer.publish_model([1.0, 2.0, 3.0], 0.5)
+    assert reader.ready
+    assert reader.predict(np.array([1.0, 1.0, 1.0])) == 6.5
+    assert np.allclose(reader.predict_many(np.eye(3)), [1.5, 2.5, 3.5])
+
+    # Features computed by a non-writer worker reach every worker
+    assert reader.publish_features('SPX', [4.0, 5.0, 6.0])
+    vector, updated = writer.read_features('SPX')
+    assert np.array_equal(vector, [4.0, 5.0, 6.0]) and updated > 0
+    assert writer.summary()['symbols'] == 1 and reader.read_features('NDX') == (None, None)
+
+def test_model_version_and_redeploy():
+    """Workers never serve another version's weights and follow the writer to a new file"""
+    print("🧪 Testing model versions and re-mapping")
+
+    writer = region(writer=True)
+    writer.publish_model([1.0, 1.0, 1.0], 0.0)
+
+    # A worker from the next deploy boots against the old region
+    upgraded = region(model_version='v2', path=writer.path)
+    assert not upgraded.ready and not upgraded.publish_features('SPX', [1.0, 2.0, 3.0])
+    try:
+        upgraded.predict(np.ones(3))
+        assert False, 'predict should refuse another version'
+    except RuntimeError:
+        pass
+
+    # The new writer changes the layout, which swaps the file under the old mapping
+    wider = region(['a', 'b', 'c', 'd'], model_version='v2', path=writer.path)
+    assert not wider.ready
+    new_writer = region(['a', 'b', 'c', 'd'], model_version='v2', writer=True, path=writer.path)
+    new_writer.publish_model([1.0, 1.0, 1.0, 1.0], 10.0)
+    assert wider.ready and wider.predict(np.ones(4)) == 14.0
+    # Workers still on the old feature layout drop out instead of failing every request
+    assert not writer.ready and not upgraded.ready
+
+def test_seqlock_waits_for_writer():
+    """Readers never observe a write in progress"""
+    print("🧪 Testing the seqlock")
+
+    writer = region(writer=True)
+    writer.publish_model([1.0, 1.0, 1.0], 0.0)
+    reader = region(path=writer.path)
+
+    writer.control[SEQ] += 1
+    writer.weights[0] = 100.0
+    results = []
+    thread = threading.Thread(target=lambda: results.append(reader.predict(np.zeros(3))))
+    thread.start()
+    time.sleep(0.05)
+    assert not results
+    writer.weights[0] = 7.0
+    writer.control[SEQ] += 1
+    thread.join(timeout=1)
+    assert results == [7.0]
+
+def test_symbol_length_limit():
+    """Symbols that don't fit the 16-byte slot are refused, not truncated"""
+    print("🧪 Testing symbol length")
+
+    writer = region(writer=True)
+    writer.publish_model([1.0, 1.0, 1.0], 0.0)
+    assert writer.publish_features('A' * 16, [1.0, 2.0, 3.0])
+    for symbol in ('A' * 17, 'É' * 9):
+        try:
+            writer.publish_features(symbol, [9.0, 9.0, 9.0])
+            assert False, f'{symbol!r} does not fit in 16 bytes'
+        except ValueError:
+            pass
+        try:
+            writer.read_features(symbol)
+            assert False, f'{symbol!r} cannot have a row'
+        except ValueError:
+            pass
+    vector, _ = writer.read_features('A' * 16)
+    assert np.array_equal(vector, [1.0, 2.0, 3.0]) and writer.summary()['symbols'] == 1
+
+def test_swap_checked_once_per_interval():
+    """ready stats the file at most once per check_interval, then follows a swap"""
+    print("🧪 Testing the cached staleness check")
+
+    writer = region(writer=True)
+    writer.publish_model([1.0, 1.0, 1.0], 0.0)
+    reader = region(path=writer.path, check_interval=60.0)
+    assert reader.ready
+
+    stats = []
+    real_stat = os.stat
+    os.stat = lambda path, *args, **kwargs: stats.append(path) or real_stat(path, *args, **kwargs)
+    try:
+        for _ in range(100):
+            assert reader.ready
+    finally:
+        os.stat = real_stat
+    assert stats == []
+
+    # A redeploy swaps the file; the reader keeps its mapping until the window passes
+    new_writer = region(['a', 'b', 'c', 'd'], model_version='v1', writer=True, path=writer.path)
+    new_writer.publish_model([1.0, 1.0, 1.0, 1.0], 0.0)
+    assert reader.ready
+    reader._checked_at -= 60.0
+    assert not reader.ready
+
+if __name__ == "__main__":
+    test_layout_publish_and_read()
+    test_model_version_and_redeploy()
+    test_seqlock_waits_for_writer()
+    test_symbol_length_limit()
+    test_swap_checked_once_per_interval()
+    print("\n🎉 All shared state tests passed!")
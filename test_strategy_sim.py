@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the vectorized strategy simulator on a hand-computed grid
+"""
+
+import numpy as np
+from strategy_sim import grid_table, simulate_grid
+
+CLOSE = np.array([100.0, 101.0, 99.0, 102.0])
+NEXT_CLOSE = np.array([101.0, 99.0, 102.0, 100.0])
+# Expected returns -2%, -0.5%, +1%, -3%
+PREDICTED = CLOSE * np.array([0.98, 0.995, 1.01, 0.97])
+
+def test_hand_computed_grid():
+    """Positions, turnover, costs and hit rate for a 2 x 2 x 2 grid"""
+    print("🧪 Testing the strategy grid")
+
+    metrics = simulate_grid(PREDICTED, CLOSE, NEXT_CLOSE, thresholds=[0.0, 0.008],
+                            costs_bps=[0.0, 10.0], sizes=[1.0, 2.0])
+    assert metrics['sharpe'].shape == (2, 2, 2)
+
+    # Threshold 0: positions -1, -1, +1, -1 -> 3 position changes, hits on days 2-4
+    # Threshold 0.8%: positions -1, 0, +1, -1 -> 4 changes, hits on days 3-4
+    assert metrics['trades'][:, 0, 0].tolist() == [3, 4]
+    assert np.allclose(metrics['hit_rate'][:, 1, 1], [3 / 4, 2 / 3])
+    assert np.allclose(metrics['exposure'][:, 0, 0], [1.0, 0.75])
+
+    # Threshold 0.8%, 10 bps, size 1: turnover 1, 1, 1, 2
+    realized = NEXT_CLOSE / CLOSE - 1
+    pnl = [-realized[0] - 0.001, -0.001, realized[2] - 0.001, -realized[3] - 0.002]
+    assert np.isclose(metrics['total_return'][1, 1, 0], np.prod(1 + np.array(pnl)) - 1)
+    # Costs scale with size: at size 2 every cost doubles along with the exposure
+    pnl2 = [2 * p - c for p, c in zip([-realized[0], 0, realized[2], -realized[3]], [0.002, 0.002, 0.002, 0.004])]
+    assert np.isclose(metrics['total_return'][1, 1, 1], np.prod(1 + np.array(pnl2)) - 1)
+    assert not metrics['ruined'].any()
+
+    table = grid_table(metrics, [0.0, 0.008], [0.0, 10.0], [1.0, 2.0])
+    assert len(table) == 8 and table.iloc[-1]['threshold'] == 0.008
+
+def test_leverage_ruin_is_clipped():
+    """A leveraged day losing more than 100% leaves equity at zero, not negative"""
+    print("🧪 Testing ruin clipping")
+
+    metrics = simulate_grid(PREDICTED, CLOSE, NEXT_CLOSE, thresholds=[0.0], costs_bps=[0.0],
+                            sizes=[1.0, 60.0], allow_short=False)
+    # Long-only: the only position is day 3 (+3.03%), so even 60x never loses
+    assert not metrics['ruined'].any()
+
+    metrics = simulate_grid(CLOSE * 1.01, CLOSE, NEXT_CLOSE, thresholds=[0.0], costs_bps=[0.0],
+                            sizes=[1.0, 60.0])
+    # Always long at 60x: day 2 loses 60 x 1.98% = 119%
+    assert metrics['ruined'][0, 0].tolist() == [False, True]
+    assert metrics['total_return'][0, 0, 1] == -1.0
+    assert metrics['max_drawdown'][0, 0, 1] == -1.0
+
+if __name__ == "__main__":
+    test_hand_computed_grid()
+    test_leverage_ruin_is_clipped()
+    print("\n🎉 All strategy simulator tests passed!")